@@ -0,0 +1,191 @@
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.analytics import CustomerSales, ProductDailySales, ProductSales
+from app.models.order import Order
+from app.models.product import Product
+from app.schemas import analytics as analytics_schemas
+from app.utils.upsert import upsert_add
+
+
+def record_orders(db: Session, orders: Sequence[dict]):
+    """
+    Add new order lines to the sales summary tables inside the caller's transaction.
+
+    The lines are aggregated per product, product and day, and customer first,
+    then every summary table gets one multi-row upsert that adds the new units
+    and revenue to the stored totals. Revenue uses the current product prices,
+    which are looked up with one query. Nothing is committed here; call this in
+    the transaction that inserts the orders, so the summaries always match them.
+
+    Args:
+        db (Session): Database session.
+        orders (Sequence[dict]): The new order lines with p_id, c_id, amount and created_at.
+    """
+    if not orders:
+        return
+    prices = dict(db.execute(
+        select(Product.p_id, Product.price).where(Product.p_id.in_({order["p_id"] for order in orders}))
+    ).all())
+
+    daily: Dict[tuple, dict] = {}
+    products: Dict[int, dict] = {}
+    customers: Dict[int, dict] = {}
+    for order in orders:
+        p_id, c_id, units = order["p_id"], order["c_id"], order["amount"]
+        revenue = prices[p_id] * units
+        created_at = order.get("created_at")
+        if created_at is not None:
+            day = daily.setdefault((p_id, created_at.date()), {
+                "p_id": p_id, "day": created_at.date(), "units": 0, "revenue": 0.0
+            })
+            day["units"] += units
+            day["revenue"] += revenue
+        product = products.setdefault(p_id, {"p_id": p_id, "units": 0, "revenue": 0.0})
+        product["units"] += units
+        product["revenue"] += revenue
+        customer = customers.setdefault(c_id, {
+            "c_id": c_id, "order_lines": 0, "units": 0, "revenue": 0.0, "last_order_at": None
+        })
+        customer["order_lines"] += 1
+        customer["units"] += units
+        customer["revenue"] += revenue
+        if created_at is not None and (customer["last_order_at"] is None or created_at > customer["last_order_at"]):
+            customer["last_order_at"] = created_at
+
+    upsert_add(db, ProductDailySales, list(daily.values()), keys=("p_id", "day"), add=("units", "revenue"))
+    upsert_add(db, ProductSales, list(products.values()), keys=("p_id",), add=("units", "revenue"))
+    upsert_add(db, CustomerSales, list(customers.values()), keys=("c_id",),
+               add=("order_lines", "units", "revenue"), latest=("last_order_at",))
+
+
+def rebuild_analytics(db: Session):
+    """
+    Recompute all sales summary tables from the order table.
+
+    The summary tables are emptied and refilled with one INSERT ... SELECT ...
+    GROUP BY per table in a single transaction, so readers never see a partly
+    rebuilt state. This scans the whole order table; use it to backfill the
+    summaries, e.g. after they were introduced, not on a schedule. Revenue is
+    computed at the current product prices, and orders without a creation time
+    only count towards the lifetime totals.
+
+    Args:
+        db (Session): Database session.
+
+    Returns:
+        Dict[str, int]: Number of rows written per summary table.
+    """
+    revenue = func.sum(Order.amount * Product.price)
+    day = func.date(Order.created_at)
+    sources = {
+        ProductDailySales: select(Order.p_id, day, func.sum(Order.amount), revenue)
+        .join(Product, Product.p_id == Order.p_id)
+        .where(Order.created_at.is_not(None))
+        .group_by(Order.p_id, day),
+        ProductSales: select(Order.p_id, func.sum(Order.amount), revenue)
+        .join(Product, Product.p_id == Order.p_id)
+        .group_by(Order.p_id),
+        CustomerSales: select(Order.c_id, func.count(), func.sum(Order.amount), revenue, func.max(Order.created_at))
+        .join(Product, Product.p_id == Order.p_id)
+        .group_by(Order.c_id),
+    }
+    counts = {}
+    try:
+        for model, source in sources.items():
+            db.execute(delete(model))
+            columns = [column.name for column in model.__table__.c]
+            result = db.execute(insert(model).from_select(columns, source))
+            counts[model.__tablename__] = result.rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return counts
+
+
+def get_product_daily_sales(db: Session, p_id: int, start: date, end: date):
+    """
+    Get the daily sales of a product, read from the product_daily_sales summary table.
+
+    Args:
+        db (Session): Database session.
+        p_id (int): ID of the product.
+        start (date): First UTC day, inclusive.
+        end (date): Last UTC day, inclusive.
+
+    Returns:
+        List[ProductDailySales]: One row per day with sales, oldest first.
+    """
+    return (
+        db.query(ProductDailySales)
+        .filter(ProductDailySales.p_id == p_id, ProductDailySales.day.between(start, end))
+        .order_by(ProductDailySales.day)
+        .all()
+    )
+
+
+def get_top_products(db: Session, metric: analytics_schemas.SalesMetric, limit: int = 10,
+                     day: Optional[date] = None) -> List[analytics_schemas.ProductSales]:
+    """
+    Get the best-selling products of all time or of one day.
+
+    The rows are read from the product_sales or product_daily_sales summary
+    table in index order, so the cost depends on limit and not on the number
+    of orders.
+
+    Args:
+        db (Session): Database session.
+        metric (analytics_schemas.SalesMetric): Rank by units or by revenue.
+        limit (int, optional): Maximum number of products. Defaults to 10.
+        day (Optional[date], optional): Only count this UTC day. Defaults to None (all time).
+
+    Returns:
+        List[analytics_schemas.ProductSales]: The products, best first.
+    """
+    table = ProductDailySales if day is not None else ProductSales
+    query = (
+        select(table.p_id, Product.name, table.units, table.revenue)
+        .join(Product, Product.p_id == table.p_id)
+        .order_by(getattr(table, metric.value).desc(), table.p_id.desc())
+        .limit(limit)
+    )
+    if day is not None:
+        query = query.where(table.day == day)
+    return [analytics_schemas.ProductSales(**row) for row in db.execute(query).mappings()]
+
+
+def get_customer_sales(db: Session, c_id: int):
+    """
+    Get the lifetime value of a customer, read from the customer_sales summary table.
+
+    Args:
+        db (Session): Database session.
+        c_id (int): ID of the customer.
+
+    Returns:
+        CustomerSales: The totals, or None if the customer has not ordered yet.
+    """
+    return db.get(CustomerSales, c_id)
+
+
+def get_top_customers(db: Session, limit: int = 10):
+    """
+    Get the customers with the highest lifetime revenue.
+
+    Args:
+        db (Session): Database session.
+        limit (int, optional): Maximum number of customers. Defaults to 10.
+
+    Returns:
+        List[CustomerSales]: The customers, highest revenue first.
+    """
+    return (
+        db.query(CustomerSales)
+        .order_by(CustomerSales.revenue.desc(), CustomerSales.c_id.desc())
+        .limit(limit)
+        .all()
+    )
@@ -1,8 +1,26 @@
+import os
+from typing import Optional
+
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.models import customer as models
 from app.schemas import customer as customer_schemas
+from app.utils.cache import TTLCache
+from app.utils.pagination import apply_keyset
 from app.utils.password import password_hash
+from app.utils.token_versions import TokenVersionTable
+
+# Cache of authenticated customers by ID, so authorizing a request does not
+# load the customer. Changes through this module invalidate the entry; the
+# cache is per worker process, so other workers see a change after the TTL.
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+# Current token versions of the customers whose tokens were revoked
+token_versions = TokenVersionTable()
 
 
 def create_customer(db: Session, customer: customer_schemas.CustomerCreate):
@@ -24,19 +42,29 @@ def create_customer(db: Session, customer: customer_schemas.CustomerCreate):
     return db_customer
 
 
-def get_customer(db: Session, skip: int = 0, limit: int = 10):
+def get_customer(db: Session, skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
     """
     Retrieve a list of customers with pagination.
 
+    Customers are ordered by ID. When a cursor is given, the page starts right
+    after the cursor position and skip is ignored.
+
     Args:
         db (Session): Database session.
         skip (int, optional): Number of customers to skip. Defaults to 0.
         limit (int, optional): Maximum number of customers to return. Defaults to 10.
+        cursor (Optional[str], optional): Cursor returned with the previous page. Defaults to None.
 
     Returns:
         list[models.Customer]: List of customers with is_admin properly set.
+
+    Raises:
+        ValueError: If the cursor is invalid.
     """
-    customers = db.query(models.Customer).offset(skip).limit(limit).all()
+    query = apply_keyset(db.query(models.Customer), models.Customer.c_id, cursor)
+    if cursor is None and skip:
+        query = query.offset(skip)
+    customers = query.limit(limit).all()
     # Ensure is_admin is always a boolean
     for customer in customers:
         if customer.is_admin is None:
@@ -61,6 +89,36 @@ def get_customer_by_id(db: Session, customer_id: int):
     return customer
 
 
+def get_principal(db: Session, customer_id: int) -> Optional[customer_schemas.Principal]:
+    """
+    Get the authenticated customer of a request, served from the principal cache when possible.
+
+    Args:
+        db (Session): Database session.
+        customer_id (int): ID of the customer from the access token.
+
+    Returns:
+        customer_schemas.Principal: The customer's ID, name, email and role, or None if not found.
+    """
+    principal = principal_cache.get(customer_id)
+    if principal is not None:
+        return principal
+
+    generation = principal_cache.generation
+    row = (
+        db.query(models.Customer.c_id, models.Customer.name, models.Customer.email, models.Customer.is_admin)
+        .filter(models.Customer.c_id == customer_id)
+        .first()
+    )
+    if row is None:
+        return None
+    principal = customer_schemas.Principal(
+        c_id=row.c_id, name=row.name, email=row.email, is_admin=bool(row.is_admin)
+    )
+    principal_cache.set(customer_id, principal, generation=generation)
+    return principal
+
+
 def update_customer(db: Session, customer_id: int, customer_data: customer_schemas.CustomerUpdate):
     """
     Update a customer's information.
@@ -80,4 +138,67 @@ def update_customer(db: Session, customer_id: int, customer_data: customer_schem
             setattr(db_customer, key, value)
         db.commit()
         db.refresh(db_customer)
+        principal_cache.pop(customer_id)
+    return db_customer
+
+
+def set_customer_admin(db: Session, customer_id: int, is_admin: bool):
+    """
+    Grant or revoke a customer's admin privileges.
+
+    Access tokens carry the role they were issued with, so a role change also
+    increments the customer's token version, which revokes the customer's
+    tokens; the customer logs in again to get a token with the new role.
+
+    Args:
+        db (Session): Database session.
+        customer_id (int): ID of the customer to update.
+        is_admin (bool): Whether the customer has admin privileges.
+
+    Returns:
+        models.Customer: The updated customer, or None if not found.
+    """
+    db_customer = get_customer_by_id(db, customer_id)
+    if db_customer is None or db_customer.is_admin == is_admin:
+        return db_customer
+
+    db.execute(
+        update(models.Customer)
+        .where(models.Customer.c_id == customer_id)
+        .values(is_admin=is_admin, token_version=models.Customer.token_version + 1)
+    )
+    db.commit()
+    db.refresh(db_customer)
+    token_versions.set(customer_id, db_customer.token_version)
+    principal_cache.pop(customer_id)
     return db_customer
+
+
+def load_token_versions(db: Session):
+    """
+    Refresh the token version table from the database.
+
+    Only customers with revoked tokens (token version above 0) are read, which
+    also picks up revocations made by other worker processes.
+
+    Args:
+        db (Session): Database session.
+    """
+    token_versions.refresh(
+        db.query(models.Customer.c_id, models.Customer.token_version)
+        .filter(models.Customer.token_version > 0)
+        .all()
+    )
+
+
+def get_cache_stats():
+    """
+    Get the counters of the principal cache and the token version table.
+
+    Returns:
+        dict: Statistics of the principal cache and the token version table.
+    """
+    return {
+        "principal": principal_cache.stats(),
+        "token_versions": token_versions.stats(),
+    }
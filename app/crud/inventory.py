@@ -0,0 +1,397 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation
+from app.schemas import inventory as inventory_schemas
+from app.schemas.order import CheckoutLine
+from app.utils.bulk import bulk_insert
+from app.utils.snowflake import new_order_nr
+
+# Seconds a reservation holds its stock before the sweeper releases it
+RESERVATION_TTL_SECONDS = int(os.getenv("RESERVATION_TTL_SECONDS", "900"))
+# Maximum number of distinct products in one checkout or reservation
+CHECKOUT_MAX_LINES = 100
+# Expired reservation lines released per sweeper transaction
+RESERVATION_SWEEP_BATCH_SIZE = 500
+
+
+def utcnow() -> datetime:
+    """
+    Get the current UTC time as a naive datetime, as stored in DateTime columns.
+
+    Returns:
+        datetime: The current UTC time without tzinfo.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def merge_lines(lines: Iterable[CheckoutLine]) -> Dict[int, int]:
+    """
+    Validate cart lines and merge lines for the same product.
+
+    Args:
+        lines (Iterable[CheckoutLine]): The cart lines.
+
+    Returns:
+        Dict[int, int]: Amount per product ID, in order of first appearance.
+
+    Raises:
+        HTTPException: If the cart is empty or too large or an amount is not positive.
+    """
+    amounts: Dict[int, int] = {}
+    for line in lines:
+        if line.amount <= 0:
+            raise HTTPException(status_code=400, detail=f"Amount for product {line.p_id} must be greater than zero")
+        amounts[line.p_id] = amounts.get(line.p_id, 0) + line.amount
+    if not amounts:
+        raise HTTPException(status_code=400, detail="Order must contain at least one line")
+    if len(amounts) > CHECKOUT_MAX_LINES:
+        raise HTTPException(status_code=400, detail=f"Order must not contain more than {CHECKOUT_MAX_LINES} products")
+    return amounts
+
+
+def get_stock_levels(db: Session, p_ids: Iterable[int]) -> Dict[int, Optional[int]]:
+    """
+    Check that products exist and read their stock with one query.
+
+    The stock is read without locking; take_stock re-checks it atomically.
+
+    Args:
+        db (Session): Database session.
+        p_ids (Iterable[int]): Product IDs.
+
+    Returns:
+        Dict[int, Optional[int]]: Stock per product ID, None for untracked stock.
+
+    Raises:
+        HTTPException: If a product does not exist.
+    """
+    p_ids = list(p_ids)
+    levels = dict(db.execute(select(Product.p_id, Product.stock).where(Product.p_id.in_(p_ids))).all())
+    unknown = [p_id for p_id in p_ids if p_id not in levels]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown products: {', '.join(map(str, unknown))}")
+    return levels
+
+
+def take_stock(db: Session, amounts: Dict[int, int]) -> List[int]:
+    """
+    Take stock for an order inside the caller's transaction.
+
+    Every product is decremented with a conditional
+    UPDATE ... SET stock = stock - :n WHERE p_id = :p AND stock >= :n, so the
+    check and the decrement are one atomic statement that only locks that
+    product's row; concurrent checkouts of the same product queue on the row
+    lock instead of overselling. Products are updated in ascending ID order, so
+    two transactions never wait for each other's rows in opposite order, which
+    rules out deadlocks between checkouts. Nothing is committed here; the caller
+    rolls back if any product is short.
+
+    Args:
+        db (Session): Database session.
+        amounts (Dict[int, int]): Units per product ID, for products with tracked stock.
+
+    Returns:
+        List[int]: IDs of the products without enough stock; empty on success.
+    """
+    short = []
+    for p_id in sorted(amounts):
+        amount = amounts[p_id]
+        result = db.execute(
+            update(Product)
+            .where(Product.p_id == p_id, Product.stock >= amount)
+            .values(stock=Product.stock - amount)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            short.append(p_id)
+    return short
+
+
+def return_stock(db: Session, amounts: Dict[int, int]):
+    """
+    Put units back into stock inside the caller's transaction.
+
+    Products whose stock is not tracked (anymore) are left untouched.
+
+    Args:
+        db (Session): Database session.
+        amounts (Dict[int, int]): Units per product ID.
+    """
+    for p_id in sorted(amounts):
+        db.execute(
+            update(Product)
+            .where(Product.p_id == p_id, Product.stock.is_not(None))
+            .values(stock=Product.stock + amounts[p_id])
+            .execution_options(synchronize_session=False)
+        )
+
+
+def reserve_stock(db: Session, amounts: Dict[int, int]):
+    """
+    Check the products of an order and take their stock inside the caller's transaction.
+
+    Args:
+        db (Session): Database session.
+        amounts (Dict[int, int]): Units per product ID.
+
+    Raises:
+        HTTPException: If a product does not exist (400) or is out of stock (409).
+    """
+    levels = get_stock_levels(db, amounts)
+    short = take_stock(db, {p_id: amount for p_id, amount in amounts.items() if levels[p_id] is not None})
+    if short:
+        raise HTTPException(
+            status_code=409, detail=f"Insufficient stock for products: {', '.join(map(str, short))}"
+        )
+
+
+def get_stock(db: Session, p_id: int):
+    """
+    Get the stock of a product.
+
+    Args:
+        db (Session): Database session.
+        p_id (int): ID of the product.
+
+    Returns:
+        inventory_schemas.StockLevel: The stock, or None if the product does not exist.
+    """
+    row = db.execute(select(Product.p_id, Product.stock).where(Product.p_id == p_id)).first()
+    if row is None:
+        return None
+    return inventory_schemas.StockLevel(p_id=row.p_id, stock=row.stock)
+
+
+def set_stock(db: Session, p_id: int, stock: Optional[int]):
+    """
+    Set the stock of a product.
+
+    Args:
+        db (Session): Database session.
+        p_id (int): ID of the product.
+        stock (Optional[int]): New units in stock, None to stop tracking stock.
+
+    Returns:
+        inventory_schemas.StockLevel: The new stock, or None if the product does not exist.
+    """
+    result = db.execute(
+        update(Product)
+        .where(Product.p_id == p_id)
+        .values(stock=stock)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount != 1:
+        return None
+    return inventory_schemas.StockLevel(p_id=p_id, stock=stock)
+
+
+def adjust_stock(db: Session, p_id: int, delta: int):
+    """
+    Add units to or remove units from the stock of a product atomically.
+
+    Unlike set_stock, this does not overwrite decrements of concurrent orders.
+
+    Args:
+        db (Session): Database session.
+        p_id (int): ID of the product.
+        delta (int): Units to add (positive) or remove (negative).
+
+    Returns:
+        inventory_schemas.StockLevel: The new stock, or None if the product does not exist.
+
+    Raises:
+        HTTPException: If stock is not tracked for the product or would become negative.
+    """
+    level = get_stock(db, p_id)
+    if level is None:
+        return None
+    if level.stock is None:
+        raise HTTPException(status_code=409, detail="Stock is not tracked for this product")
+
+    result = db.execute(
+        update(Product)
+        .where(Product.p_id == p_id, Product.stock + delta >= 0)
+        .values(stock=Product.stock + delta)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Stock cannot become negative")
+    db.commit()
+    return get_stock(db, p_id)
+
+
+def create_reservation(db: Session, c_id: int, lines: List[CheckoutLine]):
+    """
+    Reserve stock for a cart for RESERVATION_TTL_SECONDS.
+
+    The stock is taken right away, so the customer can check out the reserved
+    cart later without competing for stock again. Reservations that are not
+    checked out are released by release_expired_reservations.
+
+    Args:
+        db (Session): Database session.
+        c_id (int): ID of the customer.
+        lines (List[CheckoutLine]): The products and amounts to reserve.
+
+    Returns:
+        inventory_schemas.Reservation: The reservation.
+
+    Raises:
+        HTTPException: If a line is invalid, a product does not exist or is out
+            of stock, or a database error occurs.
+    """
+    amounts = merge_lines(lines)
+    reservation_id = new_order_nr()
+    expires_at = utcnow() + timedelta(seconds=RESERVATION_TTL_SECONDS)
+    try:
+        reserve_stock(db, amounts)
+        bulk_insert(db, StockReservation, [
+            {"reservation_id": reservation_id, "p_id": p_id, "c_id": c_id,
+             "amount": amount, "expires_at": expires_at}
+            for p_id, amount in amounts.items()
+        ])
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+    except SQLAlchemyError as error:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(error)}")
+
+    return inventory_schemas.Reservation(
+        reservation_id=reservation_id,
+        c_id=c_id,
+        expires_at=expires_at,
+        lines=[CheckoutLine(p_id=p_id, amount=amount) for p_id, amount in amounts.items()],
+    )
+
+
+def consume_reservation(db: Session, reservation_id: str, c_id: int) -> Dict[int, int]:
+    """
+    Claim an unexpired reservation for a checkout inside the caller's transaction.
+
+    The reservation lines are deleted with a condition on expires_at, so a
+    reservation is either consumed by the checkout or released by the sweeper,
+    never both. Nothing is committed here.
+
+    Args:
+        db (Session): Database session.
+        reservation_id (str): ID of the reservation.
+        c_id (int): ID of the customer checking out.
+
+    Returns:
+        Dict[int, int]: The reserved units per product ID.
+
+    Raises:
+        HTTPException: If the reservation does not exist, belongs to another
+            customer or has expired.
+    """
+    now = utcnow()
+    rows = db.execute(
+        select(StockReservation.p_id, StockReservation.amount).where(
+            StockReservation.reservation_id == reservation_id,
+            StockReservation.c_id == c_id,
+            StockReservation.expires_at > now,
+        )
+    ).all()
+    if rows:
+        result = db.execute(
+            delete(StockReservation)
+            .where(
+                StockReservation.reservation_id == reservation_id,
+                StockReservation.expires_at > now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == len(rows):
+            return {p_id: amount for p_id, amount in rows}
+    raise HTTPException(status_code=409, detail="Reservation not found or expired")
+
+
+def release_reservation(db: Session, reservation_id: str, c_id: int) -> bool:
+    """
+    Cancel a reservation and return its stock.
+
+    Args:
+        db (Session): Database session.
+        reservation_id (str): ID of the reservation.
+        c_id (int): ID of the customer holding the reservation.
+
+    Returns:
+        bool: True if the reservation was released, False if it was not found.
+    """
+    rows = db.execute(
+        select(StockReservation.p_id, StockReservation.amount).where(
+            StockReservation.reservation_id == reservation_id,
+            StockReservation.c_id == c_id,
+        )
+    ).all()
+    if not rows:
+        return False
+    result = db.execute(
+        delete(StockReservation)
+        .where(StockReservation.reservation_id == reservation_id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(rows):
+        # Consumed or swept concurrently; whoever deleted the rows owns the stock
+        db.rollback()
+        return False
+    return_stock(db, dict(rows))
+    db.commit()
+    return True
+
+
+def release_expired_reservations(db: Session, batch_size: int = RESERVATION_SWEEP_BATCH_SIZE) -> int:
+    """
+    Return the stock of expired reservations.
+
+    Expired lines are found through the expires_at index and released in
+    batches, one short transaction per batch. Each line is deleted with a
+    condition on expires_at and its stock is only returned if this delete
+    removed it, so a line consumed by a concurrent checkout is never returned.
+
+    Args:
+        db (Session): Database session.
+        batch_size (int, optional): Lines per transaction. Defaults to RESERVATION_SWEEP_BATCH_SIZE.
+
+    Returns:
+        int: Number of released reservation lines.
+    """
+    released = 0
+    while True:
+        now = utcnow()
+        rows = db.execute(
+            select(StockReservation.reservation_id, StockReservation.p_id, StockReservation.amount)
+            .where(StockReservation.expires_at <= now)
+            .order_by(StockReservation.expires_at)
+            .limit(batch_size)
+        ).all()
+        amounts: Dict[int, int] = {}
+        for reservation_id, p_id, amount in rows:
+            result = db.execute(
+                delete(StockReservation)
+                .where(
+                    StockReservation.reservation_id == reservation_id,
+                    StockReservation.p_id == p_id,
+                    StockReservation.expires_at <= now,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                amounts[p_id] = amounts.get(p_id, 0) + amount
+                released += 1
+        return_stock(db, amounts)
+        db.commit()
+        if len(rows) < batch_size:
+            return released
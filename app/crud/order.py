@@ -1,14 +1,28 @@
-from sqlalchemy.orm import Session
+from typing import Iterator, List, Optional, Union
 
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, selectinload
+
+from app.crud import analytics, inventory
 from app.models import order as models
+from app.models.product import Product
 from app.schemas import order as order_schemas
+from app.utils.bulk import bulk_insert
+from app.utils.pagination import apply_keyset
+from app.utils.snowflake import new_order_nr
+from app.utils.streaming import EXPORT_BATCH_SIZE
 
 
 def create_order(db: Session, order: order_schemas.OrderCreate):
     """
     Create a new order in the database.
 
-    This function creates a new order with the provided data.
+    This function creates a new order with the provided data and a newly
+    allocated order number. If stock is tracked for the product, the amount is
+    taken from it in the same transaction, which also updates the sales
+    summary tables.
 
     Args:
         db (Session): Database session.
@@ -16,34 +30,228 @@ def create_order(db: Session, order: order_schemas.OrderCreate):
 
     Returns:
         models.Order: The created order with its ID.
+
+    Raises:
+        HTTPException: If the amount is not positive, the product does not exist
+            (400) or is out of stock (409).
     """
-    # Create order with the order number from the request
-    order_data = order.model_dump()
+    order_data = {**order.model_dump(), "order_nr": new_order_nr(), "created_at": inventory.utcnow()}
+    try:
+        inventory.reserve_stock(db, inventory.merge_lines([order]))
+    except HTTPException:
+        db.rollback()
+        raise
     db_order = models.Order(**order_data)
     db.add(db_order)
+    analytics.record_orders(db, [order_data])
     db.commit()
     db.refresh(db_order)
     return db_order
 
 
-def get_order(db: Session, skip: int = 0, limit: int = 10):
+def create_orders(db: Session, orders: List[order_schemas.OrderCreate]
+                  ) -> List[Union[order_schemas.Order, HTTPException]]:
+    """
+    Create many independent orders with a single commit.
+
+    This is the group commit behind the write-behind order queue: every order
+    is checked and takes its stock on its own, so a rejected order does not
+    affect the others, but all accepted orders are written with one multi-row
+    INSERT, added to the sales summaries and made durable with one commit. All
+    products are looked up with one query, and stock is taken in ascending
+    product ID order like in create_checkout.
+
+    Args:
+        db (Session): Database session.
+        orders (List[order_schemas.OrderCreate]): The orders, in arrival order.
+
+    Returns:
+        List[Union[order_schemas.Order, HTTPException]]: For every order, in the
+        same order, either the created order with its ID and order number or the
+        error that rejected it.
+
+    Raises:
+        SQLAlchemyError: If a database error occurs. The transaction is rolled
+            back and none of the orders are created.
+    """
+    results: List[Union[order_schemas.Order, HTTPException, None]] = [None] * len(orders)
+    try:
+        levels = dict(db.execute(
+            select(Product.p_id, Product.stock).where(Product.p_id.in_({order.p_id for order in orders}))
+        ).all())
+        accepted = []
+        # A stable sort keeps the arrival order among orders of the same product
+        for index in sorted(range(len(orders)), key=lambda i: orders[i].p_id):
+            order = orders[index]
+            if order.amount <= 0:
+                results[index] = HTTPException(
+                    status_code=400, detail=f"Amount for product {order.p_id} must be greater than zero"
+                )
+            elif order.p_id not in levels:
+                results[index] = HTTPException(status_code=400, detail=f"Unknown products: {order.p_id}")
+            elif levels[order.p_id] is not None and inventory.take_stock(db, {order.p_id: order.amount}):
+                results[index] = HTTPException(
+                    status_code=409, detail=f"Insufficient stock for products: {order.p_id}"
+                )
+            else:
+                accepted.append(index)
+
+        accepted.sort()
+        created_at = inventory.utcnow()
+        rows = bulk_insert(db, models.Order, [
+            {**orders[index].model_dump(), "order_nr": new_order_nr(), "created_at": created_at}
+            for index in accepted
+        ], key_columns=("order_nr", "p_id"))
+        analytics.record_orders(db, rows)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+
+    for index, row in zip(accepted, rows):
+        results[index] = order_schemas.Order(**row)
+    return results
+
+
+def create_checkout(db: Session, c_id: int, checkout: order_schemas.CheckoutCreate):
+    """
+    Create all lines of an order in a single transaction.
+
+    Lines for the same product are merged and share a newly allocated order
+    number. All products are checked with one query and their stock is taken
+    with one conditional UPDATE per product, then the lines are written with one
+    multi-row INSERT, added to the sales summaries and committed once, so either
+    the whole order is stored or nothing is. With a reservation_id, the reserved
+    lines are ordered instead and their stock, already taken by the reservation,
+    is not touched again.
+
+    Args:
+        db (Session): Database session.
+        c_id (int): ID of the ordering customer.
+        checkout (order_schemas.CheckoutCreate): The cart lines or a reservation.
+
+    Returns:
+        order_schemas.Checkout: The order with all its lines and their IDs.
+
+    Raises:
+        HTTPException: If the cart is empty or too large, an amount is not
+            positive, a product does not exist (400), a product is out of stock
+            or the reservation has expired (409), or a database error occurs.
+    """
+    if checkout.reservation_id is None:
+        amounts = inventory.merge_lines(checkout.lines)
+    elif checkout.lines:
+        raise HTTPException(status_code=400, detail="Send either lines or a reservation_id, not both")
+
+    try:
+        if checkout.reservation_id is None:
+            inventory.reserve_stock(db, amounts)
+        else:
+            amounts = inventory.consume_reservation(db, checkout.reservation_id, c_id)
+
+        order_nr = new_order_nr()
+        created_at = inventory.utcnow()
+        rows = bulk_insert(db, models.Order, [
+            {"p_id": p_id, "c_id": c_id, "amount": amount, "order_nr": order_nr, "created_at": created_at}
+            for p_id, amount in amounts.items()
+        ], key_columns=("order_nr", "p_id"))
+        analytics.record_orders(db, rows)
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+    except SQLAlchemyError as error:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(error)}")
+
+    return order_schemas.Checkout(
+        order_nr=order_nr,
+        c_id=c_id,
+        lines=[order_schemas.Order(**row) for row in rows],
+    )
+
+
+def _order_query(db: Session, expand_product: bool = False):
+    """
+    Start an order query, optionally loading the ordered products.
+
+    The products of all orders are loaded with one extra SELECT ... WHERE p_id
+    IN (...) query, however many orders there are.
+
+    Args:
+        db (Session): Database session.
+        expand_product (bool, optional): Load Order.product. Defaults to False.
+
+    Returns:
+        Query: The order query.
+    """
+    query = db.query(models.Order)
+    if expand_product:
+        query = query.options(selectinload(models.Order.product))
+    return query
+
+
+def get_order(db: Session, skip: int = 0, limit: int = 10, cursor: Optional[str] = None,
+              c_id: Optional[int] = None, expand_product: bool = False):
     """
     Get a list of orders with pagination.
 
-    This function retrieves a paginated list of orders from the database.
+    This function retrieves a page of orders ordered by ID, optionally only the
+    orders of one customer and with their products. When a cursor is given, the
+    page starts right after the cursor position (keyset pagination) and skip is
+    ignored; skip is only kept for backwards compatibility.
 
     Args:
         db (Session): Database session.
         skip (int, optional): Number of orders to skip. Defaults to 0.
         limit (int, optional): Maximum number of orders to return. Defaults to 10.
+        cursor (Optional[str], optional): Cursor returned with the previous page. Defaults to None.
+        c_id (Optional[int], optional): Only return orders of this customer. Defaults to None (all customers).
+        expand_product (bool, optional): Load the product of every order. Defaults to False.
 
     Returns:
         list[models.Order]: List of orders.
+
+    Raises:
+        ValueError: If the cursor is invalid.
     """
-    return db.query(models.Order).offset(skip).limit(limit).all()
+    query = _order_query(db, expand_product)
+    if c_id is not None:
+        query = query.filter(models.Order.c_id == c_id)
+    query = apply_keyset(query, models.Order.o_id, cursor)
+    if cursor is None and skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 
-def get_order_by_id(db: Session, order_id: int):
+def get_order_by_number(db: Session, order_nr: str, expand_product: bool = False):
+    """
+    Get all lines of an order by its order number.
+
+    Args:
+        db (Session): Database session.
+        order_nr (str): The order number.
+        expand_product (bool, optional): Load the product of every line. Defaults to False.
+
+    Returns:
+        order_schemas.Checkout: The order with its lines, or None if not found.
+    """
+    lines = (
+        _order_query(db, expand_product)
+        .filter(models.Order.order_nr == order_nr)
+        .order_by(models.Order.o_id)
+        .all()
+    )
+    if not lines:
+        return None
+    return order_schemas.Checkout(
+        order_nr=order_nr,
+        c_id=lines[0].c_id,
+        lines=[order_schemas.Order.model_validate(line) for line in lines],
+    )
+
+
+def get_order_by_id(db: Session, order_id: int, expand_product: bool = False):
     """
     Get an order by ID.
 
@@ -52,8 +260,34 @@ def get_order_by_id(db: Session, order_id: int):
     Args:
         db (Session): Database session.
         order_id (int): ID of the order to retrieve.
+        expand_product (bool, optional): Load the ordered product. Defaults to False.
 
     Returns:
         models.Order: The requested order, or None if not found.
     """
-    return db.query(models.Order).filter(models.Order.o_id == order_id).first()
+    return _order_query(db, expand_product).filter(models.Order.o_id == order_id).first()
+
+
+# Columns of an order export, in table order
+ORDER_EXPORT_COLUMNS = [column.name for column in models.Order.__table__.c]
+
+
+def export_orders(db: Session) -> Iterator[dict]:
+    """
+    Read all orders for an export, ordered by ID.
+
+    Rows come from a server-side cursor, EXPORT_BATCH_SIZE at a time, as column
+    mappings rather than Order objects.
+
+    Args:
+        db (Session): Database session, kept open while the rows are consumed.
+
+    Yields:
+        dict: The columns of one order.
+    """
+    query = (
+        select(models.Order.__table__)
+        .order_by(models.Order.o_id)
+        .execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+    )
+    yield from db.execute(query).mappings()
@@ -1,9 +1,206 @@
+import os
+from typing import Iterator, List, Optional, Tuple
+
 from fastapi import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy import select, update
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models import product as models
 from app.schemas import product as product_schemas
+from app.utils.bulk import bulk_insert
+from app.utils.cache import TTLCache
+from app.utils.http_cache import Rendered, render_json
+from app.utils.pagination import apply_keyset
+from app.utils.search import SearchIndex
+from app.utils.similarity import SimilarityIndex
+from app.utils.streaming import EXPORT_BATCH_SIZE
+
+# Catalog caches. Product lists are keyed by their query parameters and single
+# products by ID; both hold Pydantic snapshots so they outlive the session,
+# rendered to JSON with their ETag so conditional GETs need no serialization.
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "1024"))
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "300"))
+
+product_list_cache = TTLCache(maxsize=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
+product_cache = TTLCache(maxsize=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
+
+# Maximum number of IDs in one batch lookup
+PRODUCT_BATCH_MAX_IDS = 500
+
+_product_adapter = TypeAdapter(product_schemas.Product)
+_product_list_adapter = TypeAdapter(Tuple[product_schemas.Product, ...])
+
+
+def invalidate_product_cache(p_id: Optional[int] = None):
+    """
+    Invalidate cached catalog data after a write.
+
+    All cached product lists are dropped, since any write can change their
+    content. Single products are only dropped for the given ID.
+
+    Args:
+        p_id (Optional[int], optional): ID of the changed product. Defaults to None.
+    """
+    product_list_cache.clear()
+    if p_id is not None:
+        product_cache.pop(p_id)
+
+
+# Full-text search and similarity indexes over the catalog, built at startup by
+# build_search_index and kept current by the write functions below.
+SEARCH_FIELD_WEIGHTS = {"name": 3.0, "genetic": 2.0, "effect": 1.0}
+SIMILARITY_FEATURES = ("thc", "cbd", "price")
+
+product_search_index = SearchIndex(weights=SEARCH_FIELD_WEIGHTS)
+product_similarity_index = SimilarityIndex(SIMILARITY_FEATURES, category_field="genetic")
+
+
+def _search_document(product):
+    """
+    Build the search index entry of a product.
+
+    Args:
+        product: The product (model or schema).
+
+    Returns:
+        tuple: (p_id, searchable fields, product snapshot).
+    """
+    snapshot = product_schemas.Product.model_validate(product)
+    fields = {"name": snapshot.name, "genetic": snapshot.genetic, "effect": snapshot.effect}
+    return snapshot.p_id, fields, snapshot
+
+
+def _similarity_document(snapshot: product_schemas.Product):
+    """
+    Build the similarity index entry of a product.
+
+    Args:
+        snapshot (product_schemas.Product): The product snapshot.
+
+    Returns:
+        tuple: (p_id, features, product snapshot).
+    """
+    features = {field: getattr(snapshot, field) for field in SIMILARITY_FEATURES}
+    features["genetic"] = snapshot.genetic
+    return snapshot.p_id, features, snapshot
+
+
+def _index_product(product):
+    """
+    Add or replace a product in the search and similarity indexes.
+
+    Args:
+        product: The product (model or schema).
+    """
+    p_id, fields, snapshot = _search_document(product)
+    product_search_index.add(p_id, fields, snapshot)
+    product_similarity_index.add(*_similarity_document(snapshot))
+
+
+def _product_written(product: models.Product):
+    """
+    Propagate a created or updated product to the caches and the catalog indexes.
+
+    Args:
+        product (models.Product): The committed product.
+    """
+    invalidate_product_cache(product.p_id)
+    _index_product(product)
+
+
+def _products_written(products: List[product_schemas.Product]):
+    """
+    Propagate many created or updated products to the caches and the catalog indexes.
+
+    Args:
+        products (List[product_schemas.Product]): The committed products.
+    """
+    invalidate_product_cache()
+    for product in products:
+        product_cache.pop(product.p_id)
+        _index_product(product)
+
+
+def _product_deleted(p_id: int):
+    """
+    Remove a deleted product from the caches and the catalog indexes.
+
+    Args:
+        p_id (int): ID of the deleted product.
+    """
+    invalidate_product_cache(p_id)
+    product_search_index.remove(p_id)
+    product_similarity_index.remove(p_id)
+
+
+def build_search_index(db: Session):
+    """
+    (Re)build the product search and similarity indexes from the database.
+
+    Both indexes share the same product snapshots.
+
+    Args:
+        db (Session): Database session.
+    """
+    documents = [_search_document(product) for product in db.query(models.Product).yield_per(1000)]
+    product_search_index.rebuild(documents)
+    product_similarity_index.rebuild(_similarity_document(snapshot) for _, _, snapshot in documents)
+
+
+def search_products(query: str, limit: int = 20):
+    """
+    Search products by name, genetic and effect.
+
+    The search runs against the in-memory index only and tolerates typos through
+    trigram matching. Name matches rank above genetic and effect matches.
+
+    Args:
+        query (str): The search text.
+        limit (int, optional): Maximum number of products to return. Defaults to 20.
+
+    Returns:
+        list[product_schemas.Product]: Matching products, most relevant first.
+    """
+    return [product for _, product in product_search_index.search(query, limit)]
+
+
+def get_similar_products(p_id: int, k: int = 10):
+    """
+    Get the products most similar to a product.
+
+    Similarity is the Euclidean distance over standardised THC, CBD and price
+    plus a one-hot encoding of the genetic, computed on the in-memory similarity
+    index without touching the database.
+
+    Args:
+        p_id (int): ID of the reference product, which is not part of the result.
+        k (int, optional): Maximum number of products to return. Defaults to 10.
+
+    Returns:
+        list[product_schemas.Product]: The k nearest products, most similar first.
+
+    Raises:
+        ValueError: If the product does not exist.
+    """
+    neighbours = product_similarity_index.nearest(p_id, k)
+    if neighbours is None:
+        raise ValueError(f"Product with id {p_id} does not exist")
+    return [product for _, product in neighbours]
+
+
+def get_cache_stats():
+    """
+    Get the counters of the catalog caches.
+
+    Returns:
+        dict: Statistics of the product list and single product caches.
+    """
+    return {
+        "product_list": product_list_cache.stats(),
+        "product": product_cache.stats(),
+    }
 
 
 def create_product(db: Session, product: product_schemas.ProductCreate):
@@ -23,16 +220,16 @@ def create_product(db: Session, product: product_schemas.ProductCreate):
     Raises:
         HTTPException: If validation fails or a database error occurs.
     """
-    if not product.name:
-        raise HTTPException(status_code=400, detail="Name cannot be empty")
-    if product.price <= 0:
-        raise HTTPException(status_code=400, detail="Price must be greater than zero")
+    error = validate_product(product)
+    if error is not None:
+        raise HTTPException(status_code=400, detail=error)
 
     db_product = models.Product(**product.model_dump())
     try:
         db.add(db_product)
         db.commit()
         db.refresh(db_product)
+        _product_written(db_product)
         return db_product
 
     except IntegrityError as error:
@@ -47,35 +244,268 @@ def create_product(db: Session, product: product_schemas.ProductCreate):
         raise HTTPException(status_code=500, detail=f"Unknown error: {str(error)}")
 
 
-def get_products(db: Session, skip: int = 0, limit: int = 10):
+def validate_product(product: product_schemas.ProductCreate) -> Optional[str]:
+    """
+    Check the business rules for a new product.
+
+    Args:
+        product (product_schemas.ProductCreate): Product data to check.
+
+    Returns:
+        Optional[str]: The error message, or None if the product is valid.
+    """
+    if not product.name:
+        return "Name cannot be empty"
+    if product.price <= 0:
+        return "Price must be greater than zero"
+    return None
+
+
+def create_products(db: Session, products: List[product_schemas.ProductCreate]):
+    """
+    Create many products in a single transaction.
+
+    The whole list is validated first, so either all products are created or
+    none. The rows are written with batched multi-row INSERT statements and one
+    commit, and the generated IDs come back from the INSERT itself instead of
+    refreshing every product.
+
+    Args:
+        db (Session): Database session.
+        products (List[product_schemas.ProductCreate]): Product data to create.
+
+    Returns:
+        List[product_schemas.Product]: The created products with their IDs, in input order.
+
+    Raises:
+        HTTPException: If any product fails validation or a database error occurs.
+    """
+    errors = [
+        f"Product {index}: {error}"
+        for index, error in enumerate(map(validate_product, products))
+        if error is not None
+    ]
+    if errors:
+        raise HTTPException(status_code=400, detail="; ".join(errors))
+
+    try:
+        rows = bulk_insert(db, models.Product, [product.model_dump() for product in products],
+                           marker_column="insert_batch")
+        db.commit()
+    except IntegrityError as error:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Integrity: {str(error)}")
+    except SQLAlchemyError as error:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(error)}")
+
+    created = [product_schemas.Product(**row) for row in rows]
+    _products_written(created)
+    return created
+
+
+def upsert_products_by_slug(db: Session, products: List[product_schemas.ProductCreate]):
+    """
+    Insert or update a chunk of products, matching existing products by slug.
+
+    Products whose slug already exists overwrite the existing product, all
+    others are inserted. The stock of an existing product is only overwritten
+    if the imported product has one, so re-importing the catalog does not stop
+    stock tracking. If a slug occurs several times in the chunk, the last
+    occurrence wins. The chunk is written with one lookup query, one batched
+    UPDATE, batched INSERTs and a single commit; on error nothing is written.
+
+    Args:
+        db (Session): Database session.
+        products (List[product_schemas.ProductCreate]): Validated product data.
+
+    Returns:
+        tuple[int, int]: Number of inserted and of updated products.
+
+    Raises:
+        SQLAlchemyError: If a database error occurs. The transaction is rolled back.
+    """
+    by_slug = {}
+    without_slug = []
+    for product in products:
+        if product.slug:
+            by_slug[product.slug] = product
+        else:
+            without_slug.append(product)
+
+    try:
+        existing = {}
+        if by_slug:
+            rows = (
+                db.query(models.Product.p_id, models.Product.slug)
+                .filter(models.Product.slug.in_(list(by_slug)))
+            )
+            for p_id, slug in rows:
+                existing.setdefault(slug, []).append(p_id)
+
+        updates = []
+        for slug, ids in existing.items():
+            product = by_slug[slug]
+            values = product.model_dump(exclude={"stock"} if product.stock is None else None)
+            updates.extend({"p_id": p_id, **values} for p_id in ids)
+        if updates:
+            db.execute(update(models.Product), updates)
+
+        new_rows = [product.model_dump() for slug, product in by_slug.items() if slug not in existing]
+        new_rows.extend(product.model_dump() for product in without_slug)
+        inserted = bulk_insert(db, models.Product, new_rows, marker_column="insert_batch")
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+
+    _products_written([product_schemas.Product(**row) for row in updates + inserted])
+    return len(inserted), len(updates)
+
+
+def _filter_products(query, filters: Optional[product_schemas.ProductFilter]):
+    """
+    Apply the catalog filters to a product query.
+
+    Args:
+        query: The product query.
+        filters (Optional[product_schemas.ProductFilter]): The filters to apply.
+
+    Returns:
+        The filtered query.
+    """
+    if filters is None:
+        return query
+    if filters.genetic is not None:
+        query = query.filter(models.Product.genetic == filters.genetic)
+    if filters.effect is not None:
+        query = query.filter(models.Product.effect == filters.effect)
+    for column, low, high in (
+        (models.Product.thc, filters.thc_min, filters.thc_max),
+        (models.Product.cbd, filters.cbd_min, filters.cbd_max),
+        (models.Product.price, filters.price_min, filters.price_max),
+    ):
+        if low is not None:
+            query = query.filter(column >= low)
+        if high is not None:
+            query = query.filter(column <= high)
+    return query
+
+
+def get_products(
+    db: Session,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    filters: Optional[product_schemas.ProductFilter] = None,
+    sort: Optional[product_schemas.ProductSort] = None,
+):
     """
     Get a list of products with pagination.
 
-    This function retrieves a paginated list of products from the database.
+    This function retrieves a page of products matching the filters, ordered by
+    the sort column and then by ID. When a cursor is given, the page starts right
+    after the cursor position (keyset pagination) and skip is ignored; skip is
+    only kept for backwards compatibility. Pages are served from the product
+    list cache when possible.
 
     Args:
         db (Session): Database session.
         skip (int, optional): Number of products to skip. Defaults to 0.
         limit (int, optional): Maximum number of products to return. Defaults to 10.
+        cursor (Optional[str], optional): Cursor returned with the previous page. Defaults to None.
+        filters (Optional[product_schemas.ProductFilter], optional): Catalog filters. Defaults to None.
+        sort (Optional[product_schemas.ProductSort], optional): Sort column. Defaults to None (by ID).
 
     Returns:
-        list[models.Product]: List of products.
+        list[product_schemas.Product]: List of products.
+
+    Raises:
+        ValueError: If the cursor is invalid or was issued for another sort order.
+    """
+    return list(get_rendered_products(db, skip, limit, cursor, filters, sort).data)
+
+
+def get_rendered_products(
+    db: Session,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    filters: Optional[product_schemas.ProductFilter] = None,
+    sort: Optional[product_schemas.ProductSort] = None,
+) -> Rendered:
     """
-    return db.query(models.Product).offset(skip).limit(limit).all()
+    Get a page of products together with its JSON body and ETag.
+
+    Takes the same arguments as get_products. The rendered page is what the
+    product list cache holds, so a cache hit costs no query and no serialization.
+
+    Returns:
+        Rendered: The products as a tuple, their JSON body and ETag.
+
+    Raises:
+        ValueError: If the cursor is invalid or was issued for another sort order.
+    """
+    if cursor is not None:
+        skip = 0
+    sort_key = sort.value if sort is not None else None
+    filter_key = tuple(filters.model_dump().values()) if filters is not None else None
+    key = (skip, limit, cursor, filter_key, sort_key)
+    cached = product_list_cache.get(key)
+    if cached is not None:
+        return cached
+
+    generation = product_list_cache.generation
+    query = _filter_products(db.query(models.Product), filters)
+    query = apply_keyset(
+        query,
+        models.Product.p_id,
+        cursor,
+        sort_key=sort_key,
+        sort_column=getattr(models.Product, sort_key) if sort_key else None,
+    )
+    if skip:
+        query = query.offset(skip)
+    products = tuple(
+        product_schemas.Product.model_validate(product)
+        for product in query.limit(limit).all()
+    )
+    rendered = render_json(products, _product_list_adapter)
+    product_list_cache.set(key, rendered, generation=generation)
+    return rendered
 
 
 def get_product_by_id(db: Session, p_id: int):
     """
     Get a product by ID.
 
-    This function retrieves a single product by its ID.
+    This function retrieves a single product by its ID, served from the product
+    cache when possible.
 
     Args:
         db (Session): Database session.
         p_id (int): ID of the product to retrieve.
 
     Returns:
-        models.Product: The requested product.
+        product_schemas.Product: The requested product.
+
+    Raises:
+        ValueError: If p_id is not an integer or the product does not exist.
+        RuntimeError: If a database error occurs.
+    """
+    return get_rendered_product(db, p_id).data
+
+
+def get_rendered_product(db: Session, p_id: int) -> Rendered:
+    """
+    Get a product together with its JSON body and ETag.
+
+    Args:
+        db (Session): Database session.
+        p_id (int): ID of the product to retrieve.
+
+    Returns:
+        Rendered: The product snapshot, its JSON body and ETag.
 
     Raises:
         ValueError: If p_id is not an integer or the product does not exist.
@@ -84,16 +514,65 @@ def get_product_by_id(db: Session, p_id: int):
     try:
         if not isinstance(p_id, int):
             raise ValueError("p_id must be an integer")
+        cached = product_cache.get(p_id)
+        if cached is not None:
+            return cached
+
+        generation = product_cache.generation
         product = db.query(models.Product).filter(models.Product.p_id == p_id).first()
         if product is None:
             raise ValueError(f"Product with id {p_id} does not exist")
-        return product
+        rendered = render_json(product_schemas.Product.model_validate(product), _product_adapter)
+        product_cache.set(p_id, rendered, generation=generation)
+        return rendered
     except ValueError:
         raise
     except Exception as e:
         raise RuntimeError(f"Failed to get product by id: {str(e)}")
 
 
+def get_products_by_ids(db: Session, ids: List[int]):
+    """
+    Get many products by ID with at most one query.
+
+    Cached products are taken from the product cache and all others are loaded
+    with a single WHERE p_id IN (...) query and cached. Duplicate IDs are
+    returned once.
+
+    Args:
+        db (Session): Database session.
+        ids (List[int]): IDs of the products, in the order they should be returned.
+
+    Returns:
+        tuple[list[product_schemas.Product], list[int]]: The found products in the
+        requested order, and the IDs without a product.
+
+    Raises:
+        ValueError: If more than PRODUCT_BATCH_MAX_IDS distinct IDs are requested.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > PRODUCT_BATCH_MAX_IDS:
+        raise ValueError(f"At most {PRODUCT_BATCH_MAX_IDS} ids can be requested at once")
+
+    found = {}
+    for p_id in ids:
+        cached = product_cache.get(p_id)
+        if cached is not None:
+            found[p_id] = cached.data
+
+    misses = [p_id for p_id in ids if p_id not in found]
+    if misses:
+        generation = product_cache.generation
+        for product in db.query(models.Product).filter(models.Product.p_id.in_(misses)):
+            snapshot = product_schemas.Product.model_validate(product)
+            product_cache.set(product.p_id, render_json(snapshot, _product_adapter), generation=generation)
+            found[product.p_id] = snapshot
+
+    products = [found[p_id] for p_id in ids if p_id in found]
+    missing = [p_id for p_id in ids if p_id not in found]
+    return products, missing
+
+
 def update_products(db: Session, p_id: int, update_data: product_schemas.ProductUpdate):
     """
     Update an existing product.
@@ -120,6 +599,7 @@ def update_products(db: Session, p_id: int, update_data: product_schemas.Product
             setattr(product, key, value)
         db.commit()
         db.refresh(product)
+        _product_written(product)
         return product
     except Exception as e:
         db.rollback()
@@ -152,6 +632,7 @@ def delete_product_by_id(db: Session, p_id: int):
     try:
         db.delete(product_to_delete)
         db.commit()
+        _product_deleted(p_id)
         return {"status_code": 204, "detail": "Product deleted successfully"}
 
     except SQLAlchemyError as e:
@@ -165,3 +646,29 @@ def delete_product_by_id(db: Session, p_id: int):
         raise HTTPException(
             status_code=500, detail=f"Unknown error during deletion: {str(e)}"
         )
+
+
+# Columns of a catalog export, in table order
+PRODUCT_EXPORT_COLUMNS = [column.name for column in models.Product.__table__.c]
+
+
+def export_products(db: Session) -> Iterator[dict]:
+    """
+    Read all products for an export, ordered by ID.
+
+    The rows are read through a server-side cursor in batches of
+    EXPORT_BATCH_SIZE as plain column mappings, without building ORM objects,
+    so memory use stays constant regardless of the table size.
+
+    Args:
+        db (Session): Database session, kept open while the rows are consumed.
+
+    Yields:
+        dict: The columns of one product, keyed by column name.
+    """
+    query = (
+        select(models.Product.__table__)
+        .order_by(models.Product.p_id)
+        .execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+    )
+    yield from db.execute(query).mappings()
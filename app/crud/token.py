@@ -0,0 +1,124 @@
+import os
+import threading
+from datetime import datetime
+from typing import Set
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud.inventory import utcnow
+from app.models.revoked_token import RevokedToken
+from app.utils.bloom import BloomFilter
+
+# Expected number of revoked, unexpired tokens, and the false positive rate of
+# the revocation filter at that number. The filter grows when it is reloaded.
+REVOKED_TOKEN_CAPACITY = int(os.getenv("REVOKED_TOKEN_CAPACITY", "100000"))
+REVOKED_TOKEN_ERROR_RATE = float(os.getenv("REVOKED_TOKEN_ERROR_RATE", "0.001"))
+
+# In-memory filter over the revoked_token denylist. A token that is not in the
+# filter is not revoked, so only the rare false positives query the database.
+revoked_tokens = BloomFilter(REVOKED_TOKEN_CAPACITY, REVOKED_TOKEN_ERROR_RATE)
+_revoked_lock = threading.Lock()
+# Tokens revoked by this process since the filter was last swapped
+_revoked_since_reload: Set[str] = set()
+
+
+def revoke_token(db: Session, jti: str, c_id: int, expires_at: datetime) -> bool:
+    """
+    Add a token to the denylist.
+
+    The token is added to this process's revocation filter right away; other
+    worker processes pick it up with their next load_revoked_tokens.
+
+    Args:
+        db (Session): Database session.
+        jti (str): The token's unique ID.
+        c_id (int): ID of the customer the token was issued to.
+        expires_at (datetime): UTC time the token expires.
+
+    Returns:
+        bool: True if the token was revoked by this call, False if it already was.
+    """
+    db.add(RevokedToken(jti=jti, c_id=c_id, expires_at=expires_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    with _revoked_lock:
+        revoked_tokens.add(jti)
+        _revoked_since_reload.add(jti)
+    return True
+
+
+def might_be_revoked(jti: str) -> bool:
+    """
+    Check a token against the in-memory revocation filter.
+
+    Args:
+        jti (str): The token's unique ID.
+
+    Returns:
+        bool: False if the token is certainly not revoked; True if it may be,
+        which is_token_revoked then confirms.
+    """
+    return jti in revoked_tokens
+
+
+def is_token_revoked(db: Session, jti: str) -> bool:
+    """
+    Check whether a token is on the denylist.
+
+    Only needed when might_be_revoked reports a token, so revocation checks do
+    not query the database for almost all requests.
+
+    Args:
+        db (Session): Database session.
+        jti (str): The token's unique ID.
+
+    Returns:
+        bool: True if the token is on the denylist.
+    """
+    return db.execute(select(RevokedToken.jti).where(RevokedToken.jti == jti)).first() is not None
+
+
+def load_revoked_tokens(db: Session) -> int:
+    """
+    Purge expired denylist entries and rebuild the revocation filter.
+
+    Bloom filters cannot forget keys, so the filter is rebuilt from the
+    unexpired entries, which also picks up tokens revoked by other worker
+    processes. Tokens revoked by this process while the denylist was read are
+    carried over into the new filter.
+
+    Args:
+        db (Session): Database session.
+
+    Returns:
+        int: Number of revoked, unexpired tokens.
+    """
+    global revoked_tokens, _revoked_since_reload
+    db.execute(delete(RevokedToken).where(RevokedToken.expires_at < utcnow()))
+    db.commit()
+    jtis = db.execute(select(RevokedToken.jti)).scalars().all()
+
+    reloaded = BloomFilter(max(REVOKED_TOKEN_CAPACITY, 2 * len(jtis)), REVOKED_TOKEN_ERROR_RATE)
+    for jti in jtis:
+        reloaded.add(jti)
+    with _revoked_lock:
+        for jti in _revoked_since_reload:
+            reloaded.add(jti)
+        revoked_tokens = reloaded
+        _revoked_since_reload = set()
+    return len(jtis)
+
+
+def get_revocation_stats():
+    """
+    Get the size and fill of the revocation filter.
+
+    Returns:
+        dict: Statistics of the revocation filter.
+    """
+    return revoked_tokens.stats()
@@ -0,0 +1,125 @@
+import os
+import secrets
+import time
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud.inventory import utcnow
+from app.models.worker_lease import WorkerLease
+from app.utils.snowflake import MAX_WORKER_ID, WORKER_ID, order_number_generator
+
+# Lifetime of a worker ID lease. Leases are renewed at a third of it, so a
+# process may miss two renewals; the clocks of the API hosts must agree to
+# well within it.
+WORKER_LEASE_SECONDS = float(os.getenv("WORKER_LEASE_SECONDS", "60"))
+
+# Random ID of this process as the owner of its lease, set when it leases
+_owner: Optional[str] = None
+
+
+def _claim(db: Session, worker_id: int, owner: str, existing: bool) -> bool:
+    expires_at = utcnow() + timedelta(seconds=WORKER_LEASE_SECONDS)
+    if existing:
+        # Only take the row over if nobody renewed it in the meantime
+        result = db.execute(
+            update(WorkerLease)
+            .where(WorkerLease.worker_id == worker_id, WorkerLease.expires_at < utcnow())
+            .values(owner=owner, expires_at=expires_at)
+        )
+        db.commit()
+        return result.rowcount == 1
+    db.add(WorkerLease(worker_id=worker_id, owner=owner, expires_at=expires_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def lease_worker_id(db: Session) -> int:
+    """
+    Lease a free worker ID and assign it to the order number generator.
+
+    Expired leases are taken over first, then unused IDs are claimed. Claims are
+    conditional writes, so processes starting at the same time get different
+    IDs. With WORKER_ID set, that ID is used without a lease.
+
+    Args:
+        db (Session): Database session.
+
+    Returns:
+        int: The worker ID of this process.
+
+    Raises:
+        RuntimeError: If all worker IDs are leased.
+    """
+    global _owner
+    if WORKER_ID:
+        order_number_generator.assign(int(WORKER_ID))
+        return int(WORKER_ID)
+
+    owner = secrets.token_hex(16)
+    leases = {lease.worker_id: lease.expires_at for lease in db.execute(select(WorkerLease)).scalars()}
+    now = utcnow()
+    candidates = [(worker_id, True) for worker_id, expires_at in leases.items() if expires_at < now]
+    candidates += [(worker_id, False) for worker_id in range(MAX_WORKER_ID + 1) if worker_id not in leases]
+    for worker_id, existing in candidates:
+        # Measured before the claim, so the local deadline is never later than the stored one
+        valid_until = time.monotonic() + WORKER_LEASE_SECONDS
+        if _claim(db, worker_id, owner, existing):
+            _owner = owner
+            order_number_generator.assign(worker_id, valid_until)
+            return worker_id
+    raise RuntimeError(f"All {MAX_WORKER_ID + 1} worker IDs are leased")
+
+
+def renew_worker_lease(db: Session) -> int:
+    """
+    Extend this process's lease, or lease a new worker ID if it was lost.
+
+    A process that missed its renewals may find its worker ID taken over; it
+    stops using that ID before leasing another.
+
+    Args:
+        db (Session): Database session.
+
+    Returns:
+        int: The worker ID of this process.
+    """
+    worker_id = order_number_generator.worker_id
+    if WORKER_ID or _owner is None or worker_id is None:
+        return lease_worker_id(db)
+
+    valid_until = time.monotonic() + WORKER_LEASE_SECONDS
+    result = db.execute(
+        update(WorkerLease)
+        .where(WorkerLease.worker_id == worker_id, WorkerLease.owner == _owner)
+        .values(expires_at=utcnow() + timedelta(seconds=WORKER_LEASE_SECONDS))
+    )
+    db.commit()
+    if result.rowcount == 1:
+        order_number_generator.assign(worker_id, valid_until)
+        return worker_id
+    order_number_generator.release()
+    return lease_worker_id(db)
+
+
+def release_worker_lease(db: Session):
+    """
+    Give up this process's lease, so a restarted process can reuse the ID at once.
+
+    Args:
+        db (Session): Database session.
+    """
+    global _owner
+    if _owner is None:
+        return
+    db.execute(delete(WorkerLease).where(WorkerLease.owner == _owner))
+    db.commit()
+    order_number_generator.release()
+    _owner = None
@@ -1,17 +1,131 @@
+import asyncio
+import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app import models  # noqa: F401
-from app.routers import product, order, customer, auth
-from app.utils.database import Base, engine
+from app.crud import customer as customer_crud
+from app.crud import inventory as inventory_crud
+from app.crud import product as product_crud
+from app.crud import token as token_crud
+from app.crud import worker_lease as worker_lease_crud
+from app.routers import product, order, customer, auth, metrics, inventory, analytics
+from app.utils.background import run_periodically
+from app.utils.idempotency import IDEMPOTENT_REPLAYED_HEADER
+from app.utils.database import Base, SessionLocal, engine
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.password import calibrate_password_hashing, password_pool
+
+
+# Interval for rebuilding the in-memory search index, which also picks up
+# catalog writes made by other worker processes. 0 disables the refresh.
+SEARCH_INDEX_REFRESH_SECONDS = float(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "300"))
+# Interval for returning the stock of expired reservations. 0 disables the sweeper.
+RESERVATION_SWEEP_SECONDS = float(os.getenv("RESERVATION_SWEEP_SECONDS", "30"))
+# Interval for reloading the token versions, which picks up tokens revoked by
+# other worker processes. 0 disables the refresh.
+TOKEN_VERSION_REFRESH_SECONDS = float(os.getenv("TOKEN_VERSION_REFRESH_SECONDS", "30"))
+# Interval for reloading the revoked tokens, which picks up logouts on other
+# worker processes and purges expired entries. 0 disables the reload.
+REVOKED_TOKEN_REFRESH_SECONDS = float(os.getenv("REVOKED_TOKEN_REFRESH_SECONDS", "30"))
+
+
+def lease_worker_id():
+    """
+    Lease the worker ID embedded in this process's order numbers.
+    """
+    with SessionLocal() as db:
+        worker_lease_crud.lease_worker_id(db)
+
+
+def renew_worker_lease():
+    """
+    Extend the lease of this process's worker ID.
+    """
+    with SessionLocal() as db:
+        worker_lease_crud.renew_worker_lease(db)
+
+
+def release_worker_lease():
+    """
+    Give up the lease of this process's worker ID.
+    """
+    with SessionLocal() as db:
+        worker_lease_crud.release_worker_lease(db)
+
+
+def rebuild_search_index():
+    """
+    Rebuild the product search index from the database.
+    """
+    with SessionLocal() as db:
+        product_crud.build_search_index(db)
+
+
+def release_expired_reservations():
+    """
+    Return the stock of expired reservations.
+    """
+    with SessionLocal() as db:
+        inventory_crud.release_expired_reservations(db)
+
+
+def refresh_token_versions():
+    """
+    Reload the token versions of customers with revoked tokens.
+    """
+    with SessionLocal() as db:
+        customer_crud.load_token_versions(db)
+
+
+def reload_revoked_tokens():
+    """
+    Purge expired revoked tokens and rebuild the revocation filter.
+    """
+    with SessionLocal() as db:
+        token_crud.load_revoked_tokens(db)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
+    # Fails the startup if no worker ID is free, instead of risking duplicate order numbers
+    lease_worker_id()
+    calibrate_password_hashing()
+    rebuild_search_index()
+    refresh_token_versions()
+    reload_revoked_tokens()
+
+    tasks = [asyncio.create_task(
+        run_periodically(worker_lease_crud.WORKER_LEASE_SECONDS / 3, renew_worker_lease)
+    )]
+    if order.ORDER_WRITE_BEHIND:
+        order.order_queue.start()
+    if SEARCH_INDEX_REFRESH_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            run_periodically(SEARCH_INDEX_REFRESH_SECONDS, rebuild_search_index)
+        ))
+    if RESERVATION_SWEEP_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            run_periodically(RESERVATION_SWEEP_SECONDS, release_expired_reservations)
+        ))
+    if TOKEN_VERSION_REFRESH_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            run_periodically(TOKEN_VERSION_REFRESH_SECONDS, refresh_token_versions)
+        ))
+    if REVOKED_TOKEN_REFRESH_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            run_periodically(REVOKED_TOKEN_REFRESH_SECONDS, reload_revoked_tokens)
+        ))
     yield
+    for task in tasks:
+        task.cancel()
+    # Write the queued orders before shutting down
+    await order.order_queue.stop()
+    password_pool.shutdown()
+    release_worker_lease()
 
 
 app = FastAPI(
@@ -30,6 +144,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", IDEMPOTENT_REPLAYED_HEADER],
 )
 
 
@@ -37,3 +152,6 @@ app.include_router(order.router, prefix="/api", tags=["order"])
 app.include_router(customer.router, prefix="/api", tags=["customer"])
 app.include_router(product.router, prefix="/api", tags=["product"])
 app.include_router(auth.router, prefix="/api", tags=["authentication"])
+app.include_router(metrics.router, prefix="/api", tags=["metrics"])
+app.include_router(inventory.router, prefix="/api", tags=["inventory"])
+app.include_router(analytics.router, prefix="/api", tags=["analytics"])
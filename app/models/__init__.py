@@ -1,3 +1,7 @@
+from app.models.analytics import CustomerSales, ProductDailySales, ProductSales
 from app.models.customer import Customer
 from app.models.order import Order
 from app.models.product import Product
+from app.models.revoked_token import RevokedToken
+from app.models.stock_reservation import StockReservation
+from app.models.worker_lease import WorkerLease
@@ -0,0 +1,82 @@
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Index, Integer
+
+from app.utils.database import Base
+
+
+class ProductDailySales(Base):
+    """
+    SQLAlchemy model for the product_daily_sales summary table.
+
+    One row per product and UTC day with sales, maintained incrementally when
+    orders are created, so the daily revenue of a product is read as one
+    primary key range instead of aggregating the order table.
+
+    Attributes:
+        p_id (int): Foreign key to the product.
+        day (date): UTC day of the orders.
+        units (int): Units sold.
+        revenue (float): Revenue at the product prices at order time.
+
+    Indexes:
+        The (day, revenue) index serves the best-selling products of a day.
+    """
+    __tablename__ = "product_daily_sales"
+    __table_args__ = (
+        Index("ix_product_daily_sales_day_revenue", "day", "revenue"),
+    )
+    p_id = Column(Integer, ForeignKey("product.p_id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    units = Column(Integer, nullable=False)
+    revenue = Column(Float, nullable=False)
+
+
+class ProductSales(Base):
+    """
+    SQLAlchemy model for the product_sales summary table.
+
+    Lifetime sales per product, maintained incrementally when orders are created.
+
+    Attributes:
+        p_id (int): Foreign key to the product.
+        units (int): Units sold.
+        revenue (float): Revenue at the product prices at order time.
+
+    Indexes:
+        The units and revenue indexes serve the top sellers as one index range.
+    """
+    __tablename__ = "product_sales"
+    __table_args__ = (
+        Index("ix_product_sales_units", "units"),
+        Index("ix_product_sales_revenue", "revenue"),
+    )
+    p_id = Column(Integer, ForeignKey("product.p_id"), primary_key=True)
+    units = Column(Integer, nullable=False)
+    revenue = Column(Float, nullable=False)
+
+
+class CustomerSales(Base):
+    """
+    SQLAlchemy model for the customer_sales summary table.
+
+    Lifetime value per customer, maintained incrementally when orders are created.
+
+    Attributes:
+        c_id (int): Foreign key to the customer.
+        order_lines (int): Order lines placed.
+        units (int): Units bought.
+        revenue (float): Revenue at the product prices at order time.
+        last_order_at (datetime): UTC time of the latest order, None for orders
+            placed before order times were recorded.
+
+    Indexes:
+        The revenue index serves the most valuable customers as one index range.
+    """
+    __tablename__ = "customer_sales"
+    __table_args__ = (
+        Index("ix_customer_sales_revenue", "revenue"),
+    )
+    c_id = Column(Integer, ForeignKey("customer.c_id"), primary_key=True)
+    order_lines = Column(Integer, nullable=False)
+    units = Column(Integer, nullable=False)
+    revenue = Column(Float, nullable=False)
+    last_order_at = Column(DateTime, nullable=True)
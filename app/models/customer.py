@@ -16,6 +16,8 @@ class Customer(Base):
         email (str): Customer's email address (unique).
         password (str): Customer's hashed password.
         is_admin (bool): Flag indicating whether the customer has admin privileges.
+        token_version (int): Version embedded in access tokens; incrementing it
+            revokes all tokens issued before.
     """
     __tablename__ = "customer"
 
@@ -25,3 +27,4 @@ class Customer(Base):
     email = Column(String(255), nullable=False, unique=True)
     password = Column(String(255), nullable=False)
     is_admin = Column(Boolean, default=False, nullable=False)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
@@ -1,12 +1,25 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Index
+from sqlalchemy.orm import relationship
 
 from app.utils.database import Base
 
 
 class Order(Base):
     __tablename__ = "order"
+    # An order number is shared by the lines of one order, one line per product;
+    # the index also serves lookups by order number. (c_id, o_id) serves a
+    # customer's order history page as one index range in keyset order.
+    __table_args__ = (
+        Index("ux_order_order_nr_p_id", "order_nr", "p_id", unique=True),
+        Index("ix_order_c_id_o_id", "c_id", "o_id"),
+    )
     o_id = Column(Integer, primary_key=True, autoincrement=True)
     p_id = Column(Integer, ForeignKey("product.p_id"), nullable=False)
     c_id = Column(Integer, ForeignKey("customer.c_id"), nullable=False)
     amount = Column(Integer, nullable=False)
-    order_nr = Column(String, nullable=False)
+    order_nr = Column(String(32), nullable=False)
+    # UTC creation time; NULL for orders placed before it was recorded
+    created_at = Column(DateTime, nullable=True)
+    # Only available when loaded with selectinload; accessing it otherwise raises
+    # instead of silently running one query per order line
+    product = relationship("Product", lazy="raise")
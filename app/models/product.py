@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Index
 
 from app.utils.database import Base
 
@@ -20,8 +20,31 @@ class Product(Base):
         cbd (float): CBD content of the weed.
         effect (str): Effect of the weed.
         slug (str): Path to the product picture (optional).
+        stock (int): Units in stock, or None if stock is not tracked for the product.
+        insert_batch (str): Marker of the bulk INSERT that created the product, used
+            to read back its generated ID (see app.utils.bulk.bulk_insert).
+
+    Indexes:
+        The composite indexes cover the catalog filters of GET /api/products/:
+        an equality filter on genetic or effect followed by the range/sort column,
+        plus one index per sort column for unfiltered sorting. Every index ends in
+        p_id, the keyset pagination tie breaker, so a filtered and sorted page is
+        read as one ordered index range. The slug index serves the upsert of
+        catalog imports, and the insert_batch index reading back bulk inserts.
     """
     __tablename__ = "product"
+    __table_args__ = (
+        Index("ix_product_genetic_price", "genetic", "price", "p_id"),
+        Index("ix_product_genetic_thc", "genetic", "thc", "p_id"),
+        Index("ix_product_genetic_cbd", "genetic", "cbd", "p_id"),
+        Index("ix_product_effect_price", "effect", "price", "p_id"),
+        Index("ix_product_price", "price", "p_id"),
+        Index("ix_product_thc", "thc", "p_id"),
+        Index("ix_product_cbd", "cbd", "p_id"),
+        Index("ix_product_name", "name", "p_id"),
+        Index("ix_product_slug", "slug"),
+        Index("ix_product_insert_batch", "insert_batch"),
+    )
     p_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(255), nullable=False)
     price = Column(Float, nullable=False)
@@ -30,6 +53,8 @@ class Product(Base):
     cbd = Column(Float, nullable=False)
     effect = Column(String(255), nullable=False)
     slug = Column(String(255), nullable=True)
+    stock = Column(Integer, nullable=True)
+    insert_batch = Column(String(32), nullable=True)
 
 
 class ProductBase(BaseModel):
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+
+from app.utils.database import Base
+
+
+class RevokedToken(Base):
+    """
+    SQLAlchemy model for the revoked_token table.
+
+    The denylist of tokens that were revoked before they expired, e.g. on logout
+    or when a refresh token was exchanged. A row is only needed until the token
+    expires, so expired rows are purged.
+
+    Attributes:
+        jti (str): The token's unique ID (jti claim).
+        c_id (int): Foreign key to the customer the token was issued to.
+        expires_at (datetime): UTC time the token expires.
+
+    Indexes:
+        The expires_at index lets the purge find expired rows without scanning
+        the table.
+    """
+    __tablename__ = "revoked_token"
+    __table_args__ = (
+        Index("ix_revoked_token_expires_at", "expires_at"),
+    )
+    jti = Column(String(32), primary_key=True)
+    c_id = Column(Integer, ForeignKey("customer.c_id"), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+
+from app.utils.database import Base
+
+
+class StockReservation(Base):
+    """
+    SQLAlchemy model for the stock_reservation table.
+
+    A reservation holds stock for a customer's cart for a limited time. Each row
+    is one product of a reservation; the reserved units are already taken from
+    Product.stock and are returned when the reservation expires or is released.
+
+    Attributes:
+        reservation_id (str): ID shared by all lines of a reservation.
+        p_id (int): Foreign key to the reserved product.
+        c_id (int): Foreign key to the customer holding the reservation.
+        amount (int): Number of reserved units.
+        expires_at (datetime): UTC time after which the reservation is released.
+
+    Indexes:
+        The expires_at index lets the sweeper find expired reservations without
+        scanning the table.
+    """
+    __tablename__ = "stock_reservation"
+    __table_args__ = (
+        Index("ix_stock_reservation_expires_at", "expires_at"),
+    )
+    reservation_id = Column(String(32), primary_key=True)
+    p_id = Column(Integer, ForeignKey("product.p_id"), primary_key=True)
+    c_id = Column(Integer, ForeignKey("customer.c_id"), nullable=False)
+    amount = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, Integer, String
+
+from app.utils.database import Base
+
+
+class WorkerLease(Base):
+    """
+    SQLAlchemy model for the worker_lease table.
+
+    Every API process leases one snowflake worker ID at startup and renews the
+    lease periodically, so no two running processes embed the same worker ID in
+    order numbers. A lease that is not renewed before it expires can be taken
+    over by another process.
+
+    Attributes:
+        worker_id (int): The leased worker ID (0-1023).
+        owner (str): Random ID of the process holding the lease.
+        expires_at (datetime): UTC time the lease expires unless renewed.
+    """
+    __tablename__ = "worker_lease"
+    worker_id = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String(32), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
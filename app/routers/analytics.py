@@ -0,0 +1,127 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.crud import analytics as crud
+from app.routers.oauth2 import get_admin_user
+from app.schemas import analytics as schemas
+from app.schemas.customer import Principal
+from app.utils.database import get_db
+
+router = APIRouter()
+
+# Longest date range of a daily sales report
+MAX_REPORT_DAYS = 366
+
+
+@router.get("/analytics/products/top", response_model=List[schemas.ProductSales])
+def get_top_products(
+    by: schemas.SalesMetric = schemas.SalesMetric.revenue,
+    day: Optional[date] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_admin_user)
+):
+    """
+    Get the best-selling products.
+
+    Requires admin privileges.
+
+    Args:
+        by (schemas.SalesMetric, optional): Rank by units or revenue. Defaults to revenue.
+        day (Optional[date], optional): Only count this UTC day. Defaults to all time.
+        limit (int, optional): Maximum number of products (1-100). Defaults to 10.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (Principal): The authenticated admin user.
+
+    Returns:
+        List[schemas.ProductSales]: The products, best first.
+    """
+    return crud.get_top_products(db, by, limit, day)
+
+
+@router.get("/analytics/products/{p_id}/daily", response_model=List[schemas.ProductDailySales])
+def get_product_daily_sales(
+    p_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_admin_user)
+):
+    """
+    Get the revenue of a product per day.
+
+    Days without sales are left out. Requires admin privileges.
+
+    Args:
+        p_id (int): ID of the product.
+        start (Optional[date], optional): First UTC day. Defaults to 29 days before end.
+        end (Optional[date], optional): Last UTC day. Defaults to today.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (Principal): The authenticated admin user.
+
+    Returns:
+        List[schemas.ProductDailySales]: One entry per day with sales, oldest first.
+
+    Raises:
+        HTTPException: If the range is empty or longer than MAX_REPORT_DAYS.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end or (end - start).days >= MAX_REPORT_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"start must be before end and cover at most {MAX_REPORT_DAYS} days"
+        )
+    return crud.get_product_daily_sales(db, p_id, start, end)
+
+
+@router.get("/analytics/customers/top", response_model=List[schemas.CustomerSales])
+def get_top_customers(
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_admin_user)
+):
+    """
+    Get the customers with the highest lifetime value.
+
+    Requires admin privileges.
+
+    Args:
+        limit (int, optional): Maximum number of customers (1-100). Defaults to 10.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (Principal): The authenticated admin user.
+
+    Returns:
+        List[schemas.CustomerSales]: The customers, highest revenue first.
+    """
+    return crud.get_top_customers(db, limit)
+
+
+@router.get("/analytics/customers/{c_id}", response_model=schemas.CustomerSales)
+def get_customer_sales(
+    c_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_admin_user)
+):
+    """
+    Get the lifetime value of a customer.
+
+    Requires admin privileges.
+
+    Args:
+        c_id (int): ID of the customer.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (Principal): The authenticated admin user.
+
+    Returns:
+        schemas.CustomerSales: The customer's totals.
+
+    Raises:
+        HTTPException: If the customer has no orders.
+    """
+    sales = crud.get_customer_sales(db, c_id)
+    if sales is None:
+        raise HTTPException(status_code=404, detail="No orders for this customer")
+    return sales
@@ -1,31 +1,166 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import os
+from functools import partial
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, status, Depends
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app import models
 from app.routers import oauth2
 from app.schemas import customer as schemas
 from app.utils.database import get_db
-from app.utils.password import verify_password, password_hash
+from app.utils.idempotency import check_idempotency_key, idempotency_store, request_fingerprint
+from app.utils.password import password_hash_async, verify_and_update_password_async
+from app.utils.rate_limit import TokenBucketLimiter, enforce_rate_limit
 
 router = APIRouter()
 
+# Rate limits of logins and registrations, which cost a bcrypt hash each:
+# sustained requests per minute and burst size, per client IP and per email.
+AUTH_IP_RATE_PER_MINUTE = float(os.getenv("AUTH_IP_RATE_PER_MINUTE", "30"))
+AUTH_IP_BURST = int(os.getenv("AUTH_IP_BURST", "20"))
+AUTH_EMAIL_RATE_PER_MINUTE = float(os.getenv("AUTH_EMAIL_RATE_PER_MINUTE", "6"))
+AUTH_EMAIL_BURST = int(os.getenv("AUTH_EMAIL_BURST", "5"))
+# Maximum number of rate-limit buckets per limiter and worker process
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+
+ip_limiter = TokenBucketLimiter(AUTH_IP_RATE_PER_MINUTE / 60, AUTH_IP_BURST, RATE_LIMIT_MAX_KEYS)
+email_limiter = TokenBucketLimiter(AUTH_EMAIL_RATE_PER_MINUTE / 60, AUTH_EMAIL_BURST, RATE_LIMIT_MAX_KEYS)
+
+_customer_adapter = TypeAdapter(schemas.Customer)
+
+
+def _get_customer_by_email(db: Session, email: str):
+    """
+    Look up a customer by email.
+
+    Args:
+        db (Session): Database session.
+        email (str): The email address.
+
+    Returns:
+        models.Customer: The customer, or None if the email is not registered.
+    """
+    return (
+        db.query(models.Customer)
+        .filter(models.Customer.email == email)
+        .first()
+    )
+
+
+def _add_customer(db: Session, customer_data: dict):
+    """
+    Store a new, non-admin customer.
+
+    Args:
+        db (Session): Database session.
+        customer_data (dict): Customer columns with the hashed password.
+
+    Returns:
+        models.Customer: The created customer with its ID.
+    """
+    # Create a new customer with is_admin explicitly set to False
+    new_customer = models.Customer(**customer_data, is_admin=False)
+
+    db.add(new_customer)
+    db.commit()
+    db.refresh(new_customer)
+    return new_customer
+
+
+def _update_password_hash(db: Session, customer: models.Customer, hashed_password: str):
+    """
+    Store a customer's password hash at the current bcrypt cost.
+
+    Args:
+        db (Session): Database session.
+        customer (models.Customer): The customer.
+        hashed_password (str): The new hash of the customer's password.
+    """
+    customer.password = hashed_password
+    db.commit()
+
+
+def _check_rate_limits(request: Request, email: str):
+    """
+    Take a token from the client IP's and the email's rate-limit buckets.
+
+    Runs before any database or password work, so a burst of rejected
+    requests costs next to nothing.
+
+    Args:
+        request (Request): The incoming request, for the client IP.
+        email (str): The email address of the login or registration.
+
+    Raises:
+        HTTPException: If either bucket is empty (429, with Retry-After).
+    """
+    enforce_rate_limit(ip_limiter, request.client.host if request.client else "unknown")
+    enforce_rate_limit(email_limiter, email.lower())
+
+
+async def _register(db: Session, customer: schemas.CustomerCreate):
+    """
+    Create a customer account with a hashed password.
+
+    The database calls run in the threadpool and the password is hashed in the
+    password process pool.
+
+    Args:
+        db (Session): Database session.
+        customer (schemas.CustomerCreate): Customer data including email and password.
+
+    Returns:
+        models.Customer: The created customer.
+
+    Raises:
+        HTTPException: If the email is already registered.
+    """
+    # Check for existing email
+    if await run_in_threadpool(_get_customer_by_email, db, customer.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    # Hash a copy, so the request body keeps the password the client sent
+    customer_data = customer.model_dump()
+    customer_data["password"] = await password_hash_async(customer.password)
+    return await run_in_threadpool(_add_customer, db, customer_data)
+
 
 @router.post("/register", response_model=schemas.Customer, status_code=status.HTTP_201_CREATED)
-def customer_register(customer: schemas.CustomerCreate, db: Session = Depends(get_db)):
+async def customer_register(
+    request: Request,
+    customer: schemas.CustomerCreate,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
     Register a new customer.
 
     This endpoint allows creating a new customer account.
 
+    With an Idempotency-Key header, a retry with the same key and body gets the
+    response of the first request (marked with Idempotent-Replayed: true)
+    without querying the database or hashing the password again; concurrent
+    retries wait for the first request.
+
+    Registrations are rate limited per client IP and per email before any
+    other work (see _check_rate_limits).
+
     Args:
+        request (Request): The incoming request.
         customer (schemas.CustomerCreate): Customer data including email and password.
+        idempotency_key (Optional[str], optional): Idempotency-Key header. Defaults to None.
         db (Session, optional): Database session. Defaults to Depends(get_db).
 
     Returns:
         schemas.Customer: The created customer with its ID.
 
     Raises:
-        HTTPException: If the email is already registered.
+        HTTPException: If the email is already registered, the Idempotency-Key
+            was used for a different registration (422), or too many
+            registrations came from the client or for the email (429).
 
     Example:
         ```
@@ -49,47 +184,45 @@ def customer_register(customer: schemas.CustomerCreate, db: Session = Depends(ge
         }
         ```
     """
-    # Check for existing email
-    existing = (
-        db.query(models.Customer)
-        .filter(models.Customer.email == customer.email)
-        .first()
+    _check_rate_limits(request, customer.email)
+    key = check_idempotency_key(idempotency_key)
+    if key is None:
+        return await _register(db, customer)
+    return await idempotency_store.run(
+        ("register", key), request_fingerprint(customer), partial(_register, db, customer),
+        _customer_adapter, status.HTTP_201_CREATED,
     )
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    hashed_password = password_hash(customer.password)
-    customer.password = hashed_password
-
-    # Create a new customer with is_admin explicitly set to False
-    customer_data = customer.model_dump()
-    new_customer = models.Customer(**customer_data, is_admin=False)
-
-    db.add(new_customer)
-    db.commit()
-    db.refresh(new_customer)
-    return new_customer
 
 
 @router.post("/login", response_model=dict, status_code=status.HTTP_200_OK)
-def customer_login(
-    user_cred: schemas.CustomerLogin, db: Session = Depends(get_db)
+async def customer_login(
+    request: Request, user_cred: schemas.CustomerLogin, db: Session = Depends(get_db)
 ):
     """
     Customer login.
 
-    This endpoint authenticates a customer and returns an access token.
-    The token should be included in the Authorization header for subsequent requests.
+    This endpoint authenticates a customer and returns an access token and a
+    refresh token. The access token should be included in the Authorization
+    header for subsequent requests; once it expires, the refresh token gets a
+    new one from /api/token/refresh without logging in again.
+    The password is verified in the password process pool, so a burst of logins
+    does not block other requests. A password hashed at a bcrypt cost more than
+    BCRYPT_ROUNDS_TOLERANCE away from the calibrated one is rehashed and
+    stored. Logins are rate limited per client IP and per email before the
+    customer is looked up (see _check_rate_limits).
 
     Args:
+        request (Request): The incoming request.
         user_cred (schemas.CustomerLogin): Customer credentials (email and password).
         db (Session, optional): Database session. Defaults to Depends(get_db).
 
     Returns:
-        dict: A dictionary containing the access token and token type.
+        dict: A dictionary containing the access token, refresh token and token type.
 
     Raises:
-        HTTPException: If the email doesn't exist or the password is incorrect.
+        HTTPException: If the email doesn't exist or the password is incorrect,
+            too many logins came from the client or for the email (429), or
+            too many logins are waiting for the password pool (503).
 
     Example:
         ```
@@ -103,6 +236,7 @@ def customer_login(
         # Response (200 OK)
         {
             "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+            "refresh_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
             "token_type": "bearer"
         }
 
@@ -114,23 +248,125 @@ def customer_login(
     # Email validation is handled by Pydantic's EmailStr
     # Additional validation can be added here if needed
 
+    _check_rate_limits(request, user_cred.email)
+
     # Check if email exists in the database
-    customer = (
-        db.query(models.Customer)
-        .filter(models.Customer.email == user_cred.email)
-        .first()
-    )
+    customer = await run_in_threadpool(_get_customer_by_email, db, user_cred.email)
     if not customer:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password"
         )
 
     # Validate password
-    if not verify_password(user_cred.password, customer.password):
+    verified, new_hash = await verify_and_update_password_async(user_cred.password, customer.password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Invalid email or password"
         )
+    # The stored hash's cost is off the calibrated one, so store a new hash
+    if new_hash:
+        await run_in_threadpool(_update_password_hash, db, customer, new_hash)
+
+    # Generate access and refresh tokens
+    return oauth2.issue_tokens(
+        customer.c_id,
+        role=oauth2.ROLE_ADMIN if customer.is_admin else oauth2.ROLE_CUSTOMER,
+        version=customer.token_version or 0,
+    )
+
+
+@router.post("/token/refresh", response_model=dict, status_code=status.HTTP_200_OK)
+def refresh_token(request: schemas.RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for new access and refresh tokens.
+
+    No password is verified, so renewing a session costs no bcrypt work. The
+    refresh token is rotated: it is revoked and a new one is returned, so each
+    refresh token can be used once. The role and token version are carried
+    over from the refresh token; a role change revokes it through the token
+    version, so the customer logs in again to get the new role.
+
+    Args:
+        request (schemas.RefreshRequest): The refresh token.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+
+    Returns:
+        dict: A dictionary containing the access token, refresh token and token type.
+
+    Raises:
+        HTTPException: If the refresh token is invalid, expired, revoked or
+            was already used (401).
+
+    Example:
+        ```
+        # Request
+        POST /api/token/refresh
+        {
+            "refresh_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9..."
+        }
+
+        # Response (200 OK)
+        {
+            "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+            "refresh_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+            "token_type": "bearer"
+        }
+        ```
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    token = oauth2.verify_refresh_token(request.refresh_token, credentials_exception)
+    # Revoking the used token fails if a concurrent refresh already used it
+    if not oauth2.revoke_token(db, token):
+        raise credentials_exception
+    return oauth2.issue_tokens(token.id, role=token.role or oauth2.ROLE_CUSTOMER, version=token.version)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    request: Optional[schemas.LogoutRequest] = None,
+    token: str = Depends(oauth2.oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Log out by revoking the access token and, if given, the refresh token.
+
+    The tokens are added to the denylist until they expire. This worker
+    process rejects them right away, other worker processes after their next
+    reload of the revocation filter (REVOKED_TOKEN_REFRESH_SECONDS).
+
+    Args:
+        request (Optional[schemas.LogoutRequest], optional): The refresh token to revoke. Defaults to None.
+        token (str): The access token from the Authorization header.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: If the access token is invalid (401), or the refresh
+            token belongs to another customer (403).
+    """
+    access_token = oauth2.verify_access_token(token, HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    ))
+
+    if request is not None and request.refresh_token:
+        try:
+            refresh = oauth2.verify_refresh_token(
+                request.refresh_token, HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+            )
+        except HTTPException:
+            # Expired, revoked or invalid: it cannot be used anymore anyway
+            refresh = None
+        if refresh is not None:
+            if refresh.id != access_token.id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Refresh token belongs to another customer",
+                )
+            oauth2.revoke_token(db, refresh)
 
-    # Generate access token
-    access_token = oauth2.create_access_token(data={"customer_id": customer.c_id})
-    return {"access_token": access_token, "token_type": "bearer"}
+    oauth2.revoke_token(db, access_token)
@@ -1,42 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from app.crud import customer as crud
-from app.models.customer import Customer
 from app.routers.oauth2 import get_admin_user, get_current_user
 from app.schemas import customer as schemas
 from app.utils.database import get_db
+from app.utils.pagination import next_cursor, set_next_cursor
 
 router = APIRouter()
 
 
 @router.get("/customers/", response_model=list[schemas.Customer])
 def get_customers(
+    response: Response,
     skip: int = 0, 
     limit: int = 10, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: Customer = Depends(get_admin_user)
+    current_user: schemas.Principal = Depends(get_admin_user)
 ):
     """
     Get a list of customers with pagination.
 
-    This endpoint returns a paginated list of customers.
+    This endpoint returns a paginated list of customers. The cursor for the next
+    page is returned in the X-Next-Cursor response header.
     Requires admin privileges.
 
     Args:
-        skip (int, optional): Number of customers to skip. Defaults to 0.
+        response (Response): The outgoing response, used to set the X-Next-Cursor header.
+        skip (int, optional): Number of customers to skip, ignored when a cursor is given. Defaults to 0.
         limit (int, optional): Maximum number of customers to return. Defaults to 10.
+        cursor (Optional[str], optional): Cursor from a previous page. Defaults to None.
         db (Session, optional): Database session. Defaults to Depends(get_db).
-        current_user (Customer): The authenticated admin user.
+        current_user (schemas.Principal): The authenticated admin user.
 
     Returns:
         list[schemas.Customer]: List of customers.
+
+    Raises:
+        HTTPException: If the cursor is invalid.
     """
-    return crud.get_customer(db=db, skip=skip, limit=limit)
+    try:
+        customers = crud.get_customer(db=db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+    set_next_cursor(response, next_cursor(customers, limit, "c_id"))
+    return customers
 
 
 @router.get("/customers/me", response_model=schemas.Customer)
-def get_customer_me(current_user: Customer = Depends(get_current_user)):
+def get_customer_me(
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
     """
     Get the current logged-in customer's information.
 
@@ -45,23 +63,31 @@ def get_customer_me(current_user: Customer = Depends(get_current_user)):
     For admin users, all fields are included.
 
     Args:
-        current_user (Customer): The authenticated customer.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (schemas.Principal): The authenticated customer.
 
     Returns:
         schemas.Customer or schemas.CustomerResponse: The current customer's data.
+
+    Raises:
+        HTTPException: If the customer was deleted since the principal was cached.
     """
+    db_customer = crud.get_customer_by_id(db=db, customer_id=current_user.c_id)
+    if db_customer is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+
     # Use different response models based on user role
     if current_user.is_admin:
         # Use the original response_model defined in the decorator
-        return current_user
+        return db_customer
     else:
         # Override the response_model for non-admin users
         from fastapi.responses import JSONResponse
         return JSONResponse(content={
-            "id": current_user.c_id,
-            "name": current_user.name,
-            "address": current_user.address,
-            "email": current_user.email
+            "id": db_customer.c_id,
+            "name": db_customer.name,
+            "address": db_customer.address,
+            "email": db_customer.email
         })
 
 
@@ -69,7 +95,7 @@ def get_customer_me(current_user: Customer = Depends(get_current_user)):
 def get_customer_by_id(
     customer_id: int, 
     db: Session = Depends(get_db),
-    current_user: Customer = Depends(get_current_user)
+    current_user: schemas.Principal = Depends(get_current_user)
 ):
     """
     Get a customer by ID.
@@ -82,7 +108,7 @@ def get_customer_by_id(
     Args:
         customer_id (int): ID of the customer to retrieve.
         db (Session, optional): Database session. Defaults to Depends(get_db).
-        current_user (Customer): The authenticated user.
+        current_user (schemas.Principal): The authenticated user.
 
     Returns:
         schemas.Customer or schemas.CustomerResponse: The requested customer.
@@ -120,7 +146,7 @@ def get_customer_by_id(
 def update_customer_me(
     customer_data: schemas.CustomerUpdate,
     db: Session = Depends(get_db),
-    current_user: Customer = Depends(get_current_user)
+    current_user: schemas.Principal = Depends(get_current_user)
 ):
     """
     Update the current customer's information.
@@ -132,7 +158,7 @@ def update_customer_me(
     Args:
         customer_data (schemas.CustomerUpdate): New customer data (name and address).
         db (Session, optional): Database session. Defaults to Depends(get_db).
-        current_user (Customer): The authenticated customer.
+        current_user (schemas.Principal): The authenticated customer.
 
     Returns:
         schemas.Customer or schemas.CustomerResponse: The updated customer data.
@@ -156,3 +182,40 @@ def update_customer_me(
             "address": updated_customer.address,
             "email": updated_customer.email
         })
+
+
+@router.patch("/customers/{customer_id}/admin", response_model=schemas.Customer)
+def update_customer_role(
+    customer_id: int,
+    role: schemas.CustomerRoleUpdate,
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_admin_user)
+):
+    """
+    Grant or revoke a customer's admin privileges.
+
+    Admin checks read the role claim of the access token, so changing the role
+    increments the customer's token version instead: all access and refresh
+    tokens issued before are revoked, and the customer has to log in again to
+    get tokens with the new role. The revocation applies at once on this
+    worker process and after at most TOKEN_VERSION_REFRESH_SECONDS on the
+    others, when they reload the token versions. Setting the role the customer
+    already has changes nothing.
+    Requires admin privileges.
+
+    Args:
+        customer_id (int): ID of the customer to update.
+        role (schemas.CustomerRoleUpdate): The new role.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (schemas.Principal): The authenticated admin user.
+
+    Returns:
+        schemas.Customer: The updated customer.
+
+    Raises:
+        HTTPException: If the customer is not found.
+    """
+    db_customer = crud.set_customer_admin(db=db, customer_id=customer_id, is_admin=role.is_admin)
+    if db_customer is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return db_customer
@@ -0,0 +1,144 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from app.crud import inventory as crud
+from app.routers.oauth2 import get_admin_user, get_current_user
+from app.schemas import inventory as schemas
+from app.schemas.customer import Principal
+from app.utils.database import get_db
+
+router = APIRouter()
+
+
+@router.get("/products/{p_id}/stock", response_model=schemas.StockLevel)
+def get_stock(p_id: int, db: Session = Depends(get_db)):
+    """
+    Get the stock of a product.
+
+    Args:
+        p_id (int): ID of the product.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+
+    Returns:
+        schemas.StockLevel: The units in stock, null if stock is not tracked.
+
+    Raises:
+        HTTPException: If the product is not found.
+    """
+    level = crud.get_stock(db, p_id)
+    if level is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return level
+
+
+@router.put("/products/{p_id}/stock", response_model=schemas.StockLevel)
+def set_stock(
+    p_id: int,
+    stock_update: schemas.StockUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_admin_user)
+):
+    """
+    Set the stock of a product, e.g. after a stocktake.
+
+    Setting the stock to null stops tracking it, so the product can be ordered
+    in any amount. Requires admin privileges.
+
+    Args:
+        p_id (int): ID of the product.
+        stock_update (schemas.StockUpdate): The new stock.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (Principal): The authenticated admin user.
+
+    Returns:
+        schemas.StockLevel: The new stock.
+
+    Raises:
+        HTTPException: If the product is not found.
+    """
+    level = crud.set_stock(db, p_id, stock_update.stock)
+    if level is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return level
+
+
+@router.patch("/products/{p_id}/stock", response_model=schemas.StockLevel)
+def adjust_stock(
+    p_id: int,
+    adjustment: schemas.StockAdjustment,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_admin_user)
+):
+    """
+    Add units to or remove units from the stock of a product.
+
+    The change is applied atomically, so it is safe while orders are placed.
+    Requires admin privileges.
+
+    Args:
+        p_id (int): ID of the product.
+        adjustment (schemas.StockAdjustment): The change in units.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (Principal): The authenticated admin user.
+
+    Returns:
+        schemas.StockLevel: The new stock.
+
+    Raises:
+        HTTPException: If the product is not found, its stock is not tracked or
+            would become negative.
+    """
+    level = crud.adjust_stock(db, p_id, adjustment.delta)
+    if level is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return level
+
+
+@router.post("/reservations", response_model=schemas.Reservation, status_code=status.HTTP_201_CREATED)
+def create_reservation(
+    reservation: schemas.ReservationCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Reserve stock for a cart.
+
+    The stock is held for the authenticated customer until the reservation
+    expires; pass the reservation_id to POST /order/checkout to order it.
+
+    Args:
+        reservation (schemas.ReservationCreate): The products and amounts to reserve.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (Principal): The authenticated user.
+
+    Returns:
+        schemas.Reservation: The reservation and its expiry time.
+
+    Raises:
+        HTTPException: If a line is invalid or a product does not exist (400),
+            or a product is out of stock (409).
+    """
+    return crud.create_reservation(db, current_user.c_id, reservation.lines)
+
+
+@router.delete("/reservations/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
+def release_reservation(
+    reservation_id: str,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Cancel a reservation and return its stock.
+
+    Args:
+        reservation_id (str): ID of the reservation.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (Principal): The authenticated user holding the reservation.
+
+    Raises:
+        HTTPException: If the reservation is not found, has already been checked
+            out or expired.
+    """
+    if not crud.release_reservation(db, reservation_id, current_user.c_id):
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends
+
+from app.crud import customer as customer_crud
+from app.crud import product as product_crud
+from app.crud import token as token_crud
+from app.routers.auth import email_limiter, ip_limiter
+from app.routers.oauth2 import get_admin_user, token_verifier
+from app.schemas.customer import Principal
+from app.utils.idempotency import idempotency_store
+from app.utils.password import password_pool
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_model=dict)
+def get_metrics(current_user: Principal = Depends(get_admin_user)):
+    """
+    Get in-process performance counters.
+
+    This endpoint reports the counters of the in-process caches (catalog,
+    verified tokens, authenticated principals, token versions and revoked
+    tokens), the idempotency store, the password process pool (including its
+    queue depth and bcrypt cost) and the login rate limiters (including the
+    most rejected client IPs and emails) so they can be sized from real
+    traffic. The counters are per worker process.
+    Requires admin privileges.
+
+    Args:
+        current_user (Principal): The authenticated admin user.
+
+    Returns:
+        dict: Counters grouped by component.
+
+    Example:
+        ```
+        # Request
+        GET /api/metrics
+
+        # Response (200 OK)
+        {
+            "product_cache": {
+                "product_list": {"size": 12, "maxsize": 1024, "ttl": 300.0, "hits": 5310,
+                                 "misses": 48, "hit_ratio": 0.99, "evictions": 0, "expirations": 36},
+                "product": {...}
+            },
+            "auth": {
+                "principal": {"size": 830, "maxsize": 10000, "ttl": 60.0, ...},
+                "token_versions": {"size": 3, "refreshes": 120},
+                "tokens": {"size": 410, "maxsize": 10000, "ttl": 900.0, ...},
+                "revoked_tokens": {"count": 52, "capacity": 100000, "bytes": 179720, "hash_functions": 10}
+            },
+            "idempotency": {"size": 310, "maxsize": 10000, ..., "running": 0},
+            "password_pool": {"workers": 4, "running": 4, "queued": 12, "max_queue": 256,
+                              "peak_in_flight": 40, "completed": 9120, "rejected": 0,
+                              "bcrypt_rounds": 12},
+            "rate_limit": {
+                "ip": {"keys": 210, "max_keys": 10000, "rate": 0.5, "burst": 20, "allowed": 1830,
+                       "rejected": 412, "evictions": 0, "overflowed": 0,
+                       "top_rejected": [{"key": "203.0.113.7", "rejected": 398}, ...]},
+                "email": {...}
+            }
+        }
+        ```
+    """
+    return {
+        "product_cache": product_crud.get_cache_stats(),
+        "auth": {
+            **customer_crud.get_cache_stats(),
+            "tokens": token_verifier.stats(),
+            "revoked_tokens": token_crud.get_revocation_stats(),
+        },
+        "idempotency": idempotency_store.stats(),
+        "password_pool": password_pool.stats(),
+        "rate_limit": {"ip": ip_limiter.stats(), "email": email_limiter.stats()},
+    }
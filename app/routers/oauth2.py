@@ -1,13 +1,17 @@
-from datetime import datetime, timedelta
+import os
+import secrets
+from datetime import datetime, timedelta, timezone
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import jwt
 from sqlalchemy.orm import Session
 
-from app import models
+from app.crud import customer as customer_crud
+from app.crud import token as token_crud
 from app.schemas import customer as schemas
-from app.utils.database import get_db
+from app.utils.database import SessionLocal, get_db
+from app.utils.jwt_verify import JWTVerifier
 
 # Configure OAuth2 with Password flow, pointing to our login endpoint
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
@@ -16,63 +20,186 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
 # Note: In production, SECRET_KEY should be a strong, random value stored securely
 SECRET_KEY = "123456"
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
+# Maximum number of verified tokens kept per worker process
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
 
-def create_access_token(data: dict):
+token_verifier = JWTVerifier(SECRET_KEY, ALGORITHM, cache_size=TOKEN_CACHE_SIZE,
+                             max_ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# Values of the role claim
+ROLE_ADMIN = "admin"
+ROLE_CUSTOMER = "customer"
+
+# Values of the typ claim; tokens without one are access tokens
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+
+def _encode_token(data: dict, token_type: str, expires_delta: timedelta, role: str, version: int) -> str:
+    to_encode = data.copy()
+
+    expire = datetime.now(timezone.utc) + expires_delta
+    to_encode.update({
+        "exp": expire, "role": role, "ver": version,
+        "typ": token_type, "jti": secrets.token_hex(16),
+    })
+
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def create_access_token(data: dict, role: str = ROLE_CUSTOMER, version: int = 0):
     """
     Create a JWT access token.
 
     This function creates a JWT token with the provided data and an expiration time.
-    The token is used for authenticating API requests.
+    The token is used for authenticating API requests. It also carries the
+    customer's role and token version, so admin checks need no database query,
+    and a unique ID (jti), so it can be revoked on logout.
 
     Args:
         data (dict): The data to encode in the token, typically contains customer_id.
+        role (str, optional): ROLE_ADMIN or ROLE_CUSTOMER. Defaults to ROLE_CUSTOMER.
+        version (int, optional): The customer's token version. Defaults to 0.
 
     Returns:
         str: The encoded JWT token.
 
     Example:
         ```python
-        # Creating a token for a customer with ID 1
-        token = create_access_token(data={"customer_id": 1})
+        # Creating a token for an admin with ID 1
+        token = create_access_token(data={"customer_id": 1}, role=ROLE_ADMIN)
         # Returns: "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9..."
         ```
     """
-    to_encode = data.copy()
+    return _encode_token(data, ACCESS_TOKEN, timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES), role, version)
+
+
+def create_refresh_token(data: dict, role: str = ROLE_CUSTOMER, version: int = 0):
+    """
+    Create a JWT refresh token.
+
+    A refresh token is exchanged at /api/token/refresh for a new access token
+    without the password, and is only accepted there. It carries the same
+    claims as an access token but lives for REFRESH_TOKEN_EXPIRE_DAYS.
+
+    Args:
+        data (dict): The data to encode in the token, typically contains customer_id.
+        role (str, optional): ROLE_ADMIN or ROLE_CUSTOMER. Defaults to ROLE_CUSTOMER.
+        version (int, optional): The customer's token version. Defaults to 0.
+
+    Returns:
+        str: The encoded JWT token.
+    """
+    return _encode_token(data, REFRESH_TOKEN, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS), role, version)
 
-    expire = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
 
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+def issue_tokens(customer_id: int, role: str, version: int) -> dict:
+    """
+    Create an access token and a refresh token for a customer.
+
+    Args:
+        customer_id (int): ID of the customer.
+        role (str): ROLE_ADMIN or ROLE_CUSTOMER.
+        version (int): The customer's token version.
 
-    return encoded_jwt
+    Returns:
+        dict: The access token, the refresh token and the token type.
+    """
+    data = {"customer_id": customer_id}
+    return {
+        "access_token": create_access_token(data, role=role, version=version),
+        "refresh_token": create_refresh_token(data, role=role, version=version),
+        "token_type": "bearer",
+    }
+
+
+def _verify_token(token: str, credentials_exception, token_type: str):
+    try:
+        payload = token_verifier.decode(token)
+        customer_id: str = payload.get("customer_id")
+        if customer_id is None or payload.get("typ", ACCESS_TOKEN) != token_type:
+            raise credentials_exception
+        token_data = schemas.TokenData(
+            id=customer_id, role=payload.get("role"), version=payload.get("ver", 0),
+            jti=payload.get("jti"), exp=payload.get("exp"),
+        )
+    except ValueError:
+        # InvalidTokenError, or claims that do not fit TokenData
+        raise credentials_exception
+    if not customer_crud.token_versions.is_current(token_data.id, token_data.version):
+        raise credentials_exception
+    if token_data.jti is not None and token_crud.might_be_revoked(token_data.jti):
+        # Rare: the token was revoked, or is a false positive of the filter
+        with SessionLocal() as db:
+            if token_crud.is_token_revoked(db, token_data.jti):
+                raise credentials_exception
+    return token_data
 
 
 def verify_access_token(token: str, credentials_exception):
     """
     Verify and decode a JWT access token.
 
+    The signature and expiry are checked by token_verifier, which caches the
+    claims of verified tokens until they expire, so a token reused across a
+    session is only decoded once. Revocation is checked on every request
+    without a query: tokens with a version older than the customer's current
+    token version (see crud.customer.token_versions) are rejected, and the
+    token's ID is looked up in the in-memory revocation filter, which only
+    sends tokens that may be on the denylist to the database.
 
     Args:
         token (str): The JWT token to verify.
         credentials_exception (HTTPException): Exception to raise if verification fails.
 
     Returns:
-        schemas.TokenData: The decoded token data containing the customer ID.
+        schemas.TokenData: The decoded token data containing the customer ID, role and token version.
 
     Raises:
-        HTTPException: If the token is invalid or expired.
+        HTTPException: If the token is invalid, expired, revoked or a refresh token.
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        customer_id: str = payload.get("customer_id")
-        if customer_id is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(id=customer_id)
-    except JWTError:
-        raise credentials_exception
-    return token_data
+    return _verify_token(token, credentials_exception, ACCESS_TOKEN)
+
+
+def verify_refresh_token(token: str, credentials_exception):
+    """
+    Verify and decode a JWT refresh token.
+
+    Checked like an access token (see verify_access_token), but only refresh
+    tokens are accepted.
+
+    Args:
+        token (str): The JWT token to verify.
+        credentials_exception (HTTPException): Exception to raise if verification fails.
+
+    Returns:
+        schemas.TokenData: The decoded token data.
+
+    Raises:
+        HTTPException: If the token is invalid, expired, revoked or not a refresh token.
+    """
+    return _verify_token(token, credentials_exception, REFRESH_TOKEN)
+
+
+def revoke_token(db: Session, token_data: schemas.TokenData) -> bool:
+    """
+    Revoke a verified token until it expires.
+
+    Args:
+        db (Session): Database session.
+        token_data (schemas.TokenData): The verified token.
+
+    Returns:
+        bool: True if the token was revoked by this call, False if it already
+        was revoked or cannot be revoked because it has no ID or expiry.
+    """
+    if token_data.jti is None or token_data.exp is None:
+        return False
+    expires_at = datetime.fromtimestamp(token_data.exp, timezone.utc).replace(tzinfo=None)
+    return token_crud.revoke_token(db, token_data.jti, token_data.id, expires_at)
 
 
 def get_current_user(
@@ -83,14 +210,16 @@ def get_current_user(
 
     This function extracts the current user from the provided JWT token.
     It is typically used as a dependency in protected endpoints to ensure
-    that only authenticated users can access them.
+    that only authenticated users can access them. The user is served from
+    the principal cache, so most requests do not query the customer table;
+    load the customer with crud.get_customer_by_id for any other field.
 
     Args:
         token (str, optional): The JWT token from the Authorization header. Defaults to Depends(oauth2_scheme).
         db (Session, optional): Database session. Defaults to Depends(get_db).
 
     Returns:
-        models.Customer: The authenticated customer.
+        schemas.Principal: The authenticated customer.
 
     Raises:
         HTTPException: If the token is invalid or the user doesn't exist.
@@ -99,10 +228,10 @@ def get_current_user(
         ```python
         # Using this function as a dependency in a protected endpoint
         @router.get("/protected-resource")
-        def get_protected_resource(current_user: models.Customer = Depends(get_current_user)):
+        def get_protected_resource(current_user: schemas.Principal = Depends(get_current_user)):
             # Only authenticated users can access this endpoint
             # The current_user parameter contains the authenticated customer's data
-            return {"message": f"Hello, {current_user.first_name}!"}
+            return {"message": f"Hello, {current_user.name}!"}
         ```
 
     Usage in API requests:
@@ -120,24 +249,54 @@ def get_current_user(
 
     token = verify_access_token(token, credentials_exception)
 
-    customer = (
-        db.query(models.Customer).filter(models.Customer.c_id == token.id).first()
-    )
+    customer = customer_crud.get_principal(db, token.id)
+    if customer is None:
+        raise credentials_exception
 
     return customer
 
 
-def get_admin_user(current_user: models.Customer = Depends(get_current_user)):
+def get_token_user(token: str = Depends(oauth2_scheme)):
+    """
+    Get the current authenticated user from the verified JWT token alone.
+
+    Unlike get_current_user, the customer is neither loaded nor looked up in the
+    principal cache: the ID and role come from the token's claims, and a revoked
+    token is rejected through the in-memory token version table.
+
+    Args:
+        token (str, optional): The JWT token from the Authorization header. Defaults to Depends(oauth2_scheme).
+
+    Returns:
+        schemas.Principal: The authenticated customer, without name and email.
+
+    Raises:
+        HTTPException: If the token is invalid, expired or revoked.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    token = verify_access_token(token, credentials_exception)
+
+    return schemas.Principal(c_id=token.id, is_admin=token.role == ROLE_ADMIN)
+
+
+def get_admin_user(current_user: schemas.Principal = Depends(get_token_user)):
     """
     Verify that the current user has admin privileges.
 
     This dependency can be used in route functions that require admin access.
+    The role is read from the access token, so admin requests do not query the
+    customer table.
 
     Args:
-        current_user (models.Customer, optional): The authenticated customer. Defaults to Depends(get_current_user).
+        current_user (schemas.Principal, optional): The authenticated customer. Defaults to Depends(get_token_user).
 
     Returns:
-        models.Customer: The authenticated admin customer.
+        schemas.Principal: The authenticated admin customer.
 
     Raises:
         HTTPException: If the user doesn't have admin privileges.
@@ -1,84 +1,308 @@
-from fastapi import APIRouter, Depends, HTTPException
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.crud import order as crud
-from app.models.customer import Customer
-from app.routers.oauth2 import get_current_user
+from app.routers.oauth2 import get_admin_user, get_current_user
 from app.schemas import order as schemas
-from app.utils.database import get_db
+from app.schemas.customer import Principal
+from app.utils.database import SessionLocal, get_db
+from app.utils.idempotency import check_idempotency_key, idempotency_store, request_fingerprint
+from app.utils.pagination import next_cursor, set_next_cursor
+from app.utils.streaming import StreamFormat, export_response
+from app.utils.write_behind import GroupCommitQueue
 
 router = APIRouter()
 
+# Write-behind mode for POST /order/: orders are queued and group-committed
+ORDER_WRITE_BEHIND = os.getenv("ORDER_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+# Maximum number of orders per group commit
+ORDER_BATCH_SIZE = int(os.getenv("ORDER_BATCH_SIZE", "100"))
+# Maximum milliseconds the first queued order waits for more orders
+ORDER_BATCH_DELAY_MS = float(os.getenv("ORDER_BATCH_DELAY_MS", "5"))
+
+
+def _write_orders(orders: List[schemas.OrderCreate]):
+    """
+    Write a batch of queued orders with one commit.
+
+    Args:
+        orders (List[schemas.OrderCreate]): The queued orders.
+
+    Returns:
+        List: The created order or the rejecting HTTPException for every order.
+    """
+    with SessionLocal() as db:
+        return crud.create_orders(db, orders)
+
+
+order_queue = GroupCommitQueue(_write_orders, ORDER_BATCH_SIZE, ORDER_BATCH_DELAY_MS / 1000)
+_order_adapter = TypeAdapter(schemas.Order)
+
+
+def _check_order_access(c_id: int, current_user: Principal):
+    """
+    Allow access to or placing an order only for its customer and for admins.
+
+    Args:
+        c_id (int): ID of the customer who placed the order.
+        current_user (Principal): The authenticated user.
+
+    Raises:
+        HTTPException: If a non-admin user tries to access or place another customer's order.
+    """
+    if c_id != current_user.c_id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this order"
+        )
+
 
 @router.post("/order/", response_model=schemas.Order)
-def create_order(
+async def create_order(
     order: schemas.OrderCreate, 
+    idempotency_key: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: Customer = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Create a new order.
 
-    This endpoint allows creating a new order.
+    This endpoint allows creating a new order. The order number is allocated by
+    the server. Customers can only order for themselves; admins can place
+    orders for any customer.
+
+    With ORDER_WRITE_BEHIND enabled, the order is queued and written together
+    with other orders in one transaction (group commit). The response is only
+    sent after that commit, so an acknowledged order is stored durably; it may
+    take up to ORDER_BATCH_DELAY_MS longer.
+
+    With an Idempotency-Key header, a retry with the same key and body gets the
+    response of the first request (marked with Idempotent-Replayed: true)
+    instead of creating the order again; concurrent retries wait for the first
+    request. Keys are scoped to the customer.
 
     Args:
         order (schemas.OrderCreate): Order data to create.
+        idempotency_key (Optional[str], optional): Idempotency-Key header. Defaults to None.
         db (Session, optional): Database session. Defaults to Depends(get_db).
-        current_user (Customer): The authenticated user.
+        current_user (Principal): The authenticated user.
 
     Returns:
         schemas.Order: The created order with its ID.
+
+    Raises:
+        HTTPException: If a non-admin user orders for another customer (403), the
+            amount is not positive, the product does not exist (400), is out of
+            stock (409), or the Idempotency-Key was used for a different order (422).
+    """
+    _check_order_access(order.c_id, current_user)
+
+    async def place_order():
+        if order_queue.running:
+            return await order_queue.submit(order)
+        return await run_in_threadpool(crud.create_order, db, order)
+
+    key = check_idempotency_key(idempotency_key)
+    if key is None:
+        return await place_order()
+    return await idempotency_store.run(
+        ("order", current_user.c_id, key), request_fingerprint(order), place_order, _order_adapter
+    )
+
+
+@router.post("/order/checkout", response_model=schemas.Checkout, status_code=status.HTTP_201_CREATED)
+def checkout(
+    checkout: schemas.CheckoutCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Place an order with all cart lines at once.
+
+    All lines are validated together and stored in one transaction for the
+    authenticated customer under a new order number, so a failed or interrupted
+    checkout never leaves a partial order behind. Lines for the same product are
+    merged.
+
+    Args:
+        checkout (schemas.CheckoutCreate): The cart lines, or the ID of a stock reservation.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (Principal): The authenticated user, who places the order.
+
+    Returns:
+        schemas.Checkout: The created order with all its lines.
+
+    Raises:
+        HTTPException: If a line is invalid, a product does not exist or a database
+            error occurs, or if a product is out of stock or the reservation has
+            expired (409).
+
+    Example:
+        ```
+        # Request
+        POST /api/order/checkout
+        {
+            "lines": [{"p_id": 1, "amount": 2}, {"p_id": 3, "amount": 1}]
+        }
+
+        # Response (201 Created)
+        {
+            "order_nr": "0000340927471026176",
+            "c_id": 7,
+            "lines": [
+                {"p_id": 1, "c_id": 7, "amount": 2, "o_id": 41, "order_nr": "0000340927471026176"},
+                {"p_id": 3, "c_id": 7, "amount": 1, "o_id": 42, "order_nr": "0000340927471026176"}
+            ]
+        }
+        ```
     """
-    return crud.create_order(db=db, order=order)
+    return crud.create_checkout(db=db, c_id=current_user.c_id, checkout=checkout)
 
 
 @router.get("/orders/", response_model=list[schemas.Order])
 def get_orders(
+    response: Response,
     skip: int = 0, 
     limit: int = 10, 
+    cursor: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    expand: Optional[schemas.OrderExpand] = None,
     db: Session = Depends(get_db),
-    current_user: Customer = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
-    Get a list of orders with pagination.
+    Get the order history of a customer with pagination.
 
-    This endpoint returns a paginated list of orders.
+    This endpoint returns a paginated list of the current user's orders ordered
+    by ID. Admins can pass customer_id to get the orders of another customer.
+    The cursor for the next page is returned in the X-Next-Cursor response header.
 
     Args:
-        skip (int, optional): Number of orders to skip. Defaults to 0.
+        response (Response): The outgoing response, used to set the X-Next-Cursor header.
+        skip (int, optional): Number of orders to skip, ignored when a cursor is given. Defaults to 0.
         limit (int, optional): Maximum number of orders to return. Defaults to 10.
+        cursor (Optional[str], optional): Cursor from a previous page. Defaults to None.
+        customer_id (Optional[int], optional): Customer whose orders to return (admins only).
+            Defaults to None (the current user).
+        expand (Optional[schemas.OrderExpand], optional): "product" to embed the product
+            details of every order. Defaults to None.
         db (Session, optional): Database session. Defaults to Depends(get_db).
-        current_user (Customer): The authenticated user.
+        current_user (Principal): The authenticated user.
 
     Returns:
         list[schemas.Order]: List of orders.
+
+    Raises:
+        HTTPException: If the cursor is invalid or a non-admin user requests another customer's orders.
+    """
+    if customer_id is None:
+        customer_id = current_user.c_id
+    elif customer_id != current_user.c_id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this customer's orders"
+        )
+
+    try:
+        orders = crud.get_order(
+            db=db, skip=skip, limit=limit, cursor=cursor, c_id=customer_id,
+            expand_product=expand == schemas.OrderExpand.product
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+    set_next_cursor(response, next_cursor(orders, limit, "o_id"))
+    return orders
+
+
+@router.get("/orders/export")
+def export_orders(
+    format: StreamFormat = StreamFormat.ndjson,
+    current_user: Principal = Depends(get_admin_user)
+):
+    """
+    Export all orders as NDJSON or CSV for reconciliation.
+
+    Requires admin privileges.
+
+    Args:
+        format (StreamFormat, optional): ndjson or csv. Defaults to ndjson.
+        current_user (Principal): The authenticated admin user.
+
+    Returns:
+        StreamingResponse: The order lines ordered by ID, as orders.ndjson or orders.csv.
+    """
+    return export_response(crud.export_orders, crud.ORDER_EXPORT_COLUMNS, format, "orders")
+
+
+@router.get("/orders/by-number/{order_nr}", response_model=schemas.Checkout)
+def get_order_by_number(
+    order_nr: str,
+    expand: Optional[schemas.OrderExpand] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Get an order with all its lines by order number.
+
+    Users can only access their own orders, admins can access any order.
+
+    Args:
+        order_nr (str): The order number.
+        expand (Optional[schemas.OrderExpand], optional): "product" to embed the product
+            details of every line. Defaults to None.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (Principal): The authenticated user.
+
+    Returns:
+        schemas.Checkout: The order with its lines.
+
+    Raises:
+        HTTPException: If the order is not found or belongs to another customer.
     """
-    return crud.get_order(db=db, skip=skip, limit=limit)
+    db_order = crud.get_order_by_number(
+        db=db, order_nr=order_nr, expand_product=expand == schemas.OrderExpand.product
+    )
+    if db_order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    _check_order_access(db_order.c_id, current_user)
+    return db_order
 
 
 @router.get("/orders/{order_id}", response_model=schemas.Order)
 def get_order_by_id(
     order_id: int, 
+    expand: Optional[schemas.OrderExpand] = None,
     db: Session = Depends(get_db),
-    current_user: Customer = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get an order by ID.
 
-    This endpoint returns a single order by its ID.
+    This endpoint returns a single order by its ID. Users can only access their
+    own orders, admins can access any order.
 
     Args:
         order_id (int): ID of the order to retrieve.
+        expand (Optional[schemas.OrderExpand], optional): "product" to embed the product
+            details. Defaults to None.
         db (Session, optional): Database session. Defaults to Depends(get_db).
-        current_user (Customer): The authenticated user.
+        current_user (Principal): The authenticated user.
 
     Returns:
         schemas.Order: The requested order.
 
     Raises:
-        HTTPException: If the order is not found.
+        HTTPException: If the order is not found or belongs to another customer.
     """
-    db_order = crud.get_order_by_id(db=db, order_id=order_id)
+    db_order = crud.get_order_by_id(
+        db=db, order_id=order_id, expand_product=expand == schemas.OrderExpand.product
+    )
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
+    _check_order_access(db_order.c_id, current_user)
     return db_order
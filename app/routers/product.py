@@ -1,39 +1,52 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.crud import product as crud
 from app.crud.product import delete_product_by_id
-from app.models.customer import Customer
 from app.routers.oauth2 import get_admin_user
 from app.schemas import product as schemas
+from app.schemas.customer import Principal
 from app.utils.database import get_db
+from app.utils.http_cache import conditional_response
+from app.utils.pagination import next_cursor, set_next_cursor
+from app.utils.streaming import StreamFormat, export_response, iter_csv, iter_ndjson
 
 router = APIRouter()
 
+# Rejected rows listed in an import report; further errors are only counted
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
 
 @router.post("/products/", response_model=List[schemas.Product], status_code=status.HTTP_201_CREATED)
 def create_products(
     product: List[schemas.ProductCreate], 
     db: Session = Depends(get_db),
-    current_user: Customer = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """
     Create multiple products.
 
-    This endpoint allows creating multiple products in a single request.
+    This endpoint allows creating multiple products in a single request. The list
+    is validated as a whole and inserted in one transaction, so either all
+    products are created or none.
     Requires admin privileges.
 
     Args:
         product (List[schemas.ProductCreate]): List of products to create.
         db (Session, optional): Database session. Defaults to Depends(get_db).
-        current_user (Customer): The authenticated admin user.
+        current_user (Principal): The authenticated admin user.
 
     Returns:
         List[schemas.Product]: List of created products with their IDs.
 
+    Raises:
+        HTTPException: If any product is invalid or a database error occurs.
+
     Example:
         ```
         # Request
@@ -84,23 +97,163 @@ def create_products(
         ]
         ```
     """
-    return [crud.create_product(db=db, product=p) for p in product]
+    return crud.create_products(db=db, products=product)
+
+
+def _record_import_error(report: schemas.ProductImportReport, row: int, error: str):
+    """
+    Count a rejected import row and list it if the report has room.
+
+    Args:
+        report (schemas.ProductImportReport): The import report.
+        row (int): Line number of the row.
+        error (str): Why the row was rejected.
+    """
+    report.failed += 1
+    if len(report.errors) < IMPORT_MAX_REPORTED_ERRORS:
+        report.errors.append(schemas.ProductImportError(row=row, error=error))
+    else:
+        report.errors_truncated = True
+
+
+async def _import_chunk(db: Session, chunk: list, report: schemas.ProductImportReport):
+    """
+    Upsert a chunk of validated import rows and update the report.
+
+    Args:
+        db (Session): Database session.
+        chunk (list): (line number, schemas.ProductCreate) pairs.
+        report (schemas.ProductImportReport): The import report.
+    """
+    try:
+        inserted, updated = await run_in_threadpool(
+            crud.upsert_products_by_slug, db, [product for _, product in chunk]
+        )
+    except SQLAlchemyError as error:
+        for row, _ in chunk:
+            _record_import_error(report, row, f"Database error: {error.__class__.__name__}")
+        return
+    report.inserted += inserted
+    report.updated += updated
+
+
+@router.post("/products/import", response_model=schemas.ProductImportReport)
+async def import_products(
+    request: Request,
+    format: StreamFormat = StreamFormat.ndjson,
+    chunk_size: int = Query(500, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_admin_user)
+):
+    """
+    Import a product catalog from an NDJSON or CSV stream.
+
+    The request body is consumed as a stream and validated row by row, and valid
+    rows are upserted in chunks of chunk_size rows with one commit per chunk.
+    Products are matched by slug: an existing slug updates the product, all
+    other rows create new products. Memory use depends on chunk_size and
+    MAX_IMPORT_LINE_BYTES only, not on the size of the upload; longer rows
+    are reported as failed. Invalid rows are skipped and reported; a failing
+    chunk is rolled back and its rows are reported, later chunks still import.
+    Requires admin privileges.
+
+    Args:
+        request (Request): The incoming request, whose body is streamed.
+        format (StreamFormat, optional): ndjson (one JSON object per line) or csv
+            (with a header row). Defaults to ndjson.
+        chunk_size (int, optional): Number of rows per transaction. Defaults to 500.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+        current_user (Principal): The authenticated admin user.
+
+    Returns:
+        schemas.ProductImportReport: Counts of processed, inserted, updated and failed rows.
+
+    Example:
+        ```
+        # Request
+        POST /api/products/import?format=csv
+        name,price,genetic,thc,cbd,effect,slug
+        Premium Indica,29.99,Indica,18.5,0.2,Relaxing,premium-indica
+        Broken Row,free,Indica,18.5,0.2,Relaxing,broken-row
+
+        # Response (200 OK)
+        {
+            "processed": 2,
+            "inserted": 1,
+            "updated": 0,
+            "failed": 1,
+            "errors": [{"row": 3, "error": "price: Input should be a valid number, unable to parse string as a number"}],
+            "errors_truncated": false
+        }
+        ```
+    """
+    report = schemas.ProductImportReport()
+    parse = iter_csv if format == StreamFormat.csv else iter_ndjson
+    chunk = []
+
+    async for row, record, error in parse(request.stream()):
+        report.processed += 1
+        if error is None:
+            try:
+                product = schemas.ProductCreate.model_validate(record)
+            except ValidationError as validation_error:
+                error = "; ".join(
+                    f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+                    for detail in validation_error.errors()
+                )
+            else:
+                error = crud.validate_product(product)
+        if error is not None:
+            _record_import_error(report, row, error)
+            continue
+
+        chunk.append((row, product))
+        if len(chunk) >= chunk_size:
+            await _import_chunk(db, chunk, report)
+            chunk = []
+
+    if chunk:
+        await _import_chunk(db, chunk, report)
+    return report
 
 
 @router.get("/products/", response_model=list[schemas.Product])
-def get_products(skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
+def get_products(
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: Optional[schemas.ProductSort] = None,
+    filters: schemas.ProductFilter = Depends(),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
-    Get a list of products with pagination.
+    Get a list of products with pagination, filtering and sorting.
 
-    This endpoint returns a paginated list of products.
+    This endpoint returns a paginated list of products. Filters on genetic,
+    effect and THC/CBD/price ranges and the sort order are applied in the
+    database. The cursor for the next page is returned in the X-Next-Cursor
+    response header; pass it back as the cursor query parameter together with
+    the same filters and sort to continue. The header is omitted on the last page.
+
+    The response carries an ETag and Cache-Control header. Clients that send
+    the ETag back in If-None-Match get 304 Not Modified without a body while
+    the page is unchanged.
 
     Args:
-        skip (int, optional): Number of products to skip. Defaults to 0.
+        skip (int, optional): Number of products to skip, ignored when a cursor is given. Defaults to 0.
         limit (int, optional): Maximum number of products to return. Defaults to 20.
+        cursor (Optional[str], optional): Cursor from a previous page. Defaults to None.
+        sort (Optional[schemas.ProductSort], optional): Sort by price, thc, cbd or name. Defaults to None (by ID).
+        filters (schemas.ProductFilter): genetic, effect, thc_min/max, cbd_min/max and price_min/max query parameters.
+        if_none_match (Optional[str], optional): ETag of the client's cached copy. Defaults to None.
         db (Session, optional): Database session. Defaults to Depends(get_db).
 
     Returns:
-        list[schemas.Product]: List of products.
+        Response: List of products, or 304 Not Modified.
+
+    Raises:
+        HTTPException: If the cursor is invalid.
 
     Example:
         ```
@@ -132,32 +285,236 @@ def get_products(skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
         ]
         ```
     """
-    return crud.get_products(db=db, skip=skip, limit=limit)
+    try:
+        rendered = crud.get_rendered_products(
+            db=db, skip=skip, limit=limit, cursor=cursor, filters=filters, sort=sort
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+    response = conditional_response(rendered, if_none_match)
+    sort_key = sort.value if sort is not None else None
+    set_next_cursor(response, next_cursor(rendered.data, limit, "p_id", sort_key))
+    return response
+
+
+@router.get("/products/search", response_model=list[schemas.Product])
+def search_products(
+    q: str = Query(..., min_length=1, max_length=255),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Search products by name, genetic and effect.
+
+    This endpoint ranks products by relevance using an in-memory full-text index,
+    so it does not touch the database. Matching is fuzzy: "indca" finds "Indica".
+
+    Args:
+        q (str): The search text.
+        limit (int, optional): Maximum number of products to return. Defaults to 20.
+
+    Returns:
+        list[schemas.Product]: Matching products, most relevant first.
+
+    Example:
+        ```
+        # Request
+        GET /api/products/search?q=indca%20relax
+
+        # Response (200 OK)
+        [
+            {
+                "p_id": 1,
+                "name": "Premium Indica",
+                "price": 29.99,
+                "genetic": "Indica",
+                "thc": 18.5,
+                "cbd": 0.2,
+                "effect": "Relaxing",
+                "slug": "premium-indica"
+            }
+        ]
+        ```
+    """
+    return crud.search_products(q, limit)
+
+
+@router.get("/products/export")
+def export_products(
+    format: StreamFormat = StreamFormat.ndjson,
+    current_user: Principal = Depends(get_admin_user)
+):
+    """
+    Export the whole catalog as NDJSON or CSV.
+
+    The products are streamed straight from a server-side database cursor, so
+    the export works the same for any catalog size. Requires admin privileges.
+
+    Args:
+        format (StreamFormat, optional): ndjson or csv. Defaults to ndjson.
+        current_user (Principal): The authenticated admin user.
+
+    Returns:
+        StreamingResponse: The products ordered by ID, as products.ndjson or products.csv.
+    """
+    return export_response(crud.export_products, crud.PRODUCT_EXPORT_COLUMNS, format, "products")
+
+
+def _batch_response(db: Session, ids: List[int]) -> schemas.ProductBatch:
+    """
+    Look up a batch of products and map an oversized batch to 400.
+
+    Args:
+        db (Session): Database session.
+        ids (List[int]): The requested product IDs.
+
+    Returns:
+        schemas.ProductBatch: The found products and the missing IDs.
+
+    Raises:
+        HTTPException: If too many IDs are requested.
+    """
+    try:
+        products, missing = crud.get_products_by_ids(db=db, ids=ids)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+    return schemas.ProductBatch(products=products, missing=missing)
+
+
+@router.get("/products/batch", response_model=schemas.ProductBatch)
+def get_products_batch(
+    ids: str = Query(..., min_length=1, description="Comma-separated product IDs"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get several products by ID in one request.
+
+    This endpoint resolves all IDs with a single database query (or none if they
+    are cached) and returns the products in the requested order. IDs without a
+    product are listed in missing instead of failing the request. Use the POST
+    variant for lists that are too long for a URL.
+
+    Args:
+        ids (str): Comma-separated product IDs, e.g. 1,2,3.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+
+    Returns:
+        schemas.ProductBatch: The found products and the missing IDs.
+
+    Raises:
+        HTTPException: If ids is not a list of integers or too many IDs are requested.
+
+    Example:
+        ```
+        # Request
+        GET /api/products/batch?ids=2,99
+
+        # Response (200 OK)
+        {
+            "products": [
+                {
+                    "p_id": 2,
+                    "name": "Sativa Delight",
+                    "price": 24.99,
+                    "genetic": "Sativa",
+                    "thc": 22.0,
+                    "cbd": 0.1,
+                    "effect": "Energizing",
+                    "slug": "sativa-delight"
+                }
+            ],
+            "missing": [99]
+        }
+        ```
+    """
+    try:
+        product_ids = [int(p_id) for p_id in ids.split(",") if p_id.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    return _batch_response(db, product_ids)
+
+
+@router.post("/products/batch", response_model=schemas.ProductBatch)
+def post_products_batch(batch: schemas.ProductBatchRequest, db: Session = Depends(get_db)):
+    """
+    Get several products by ID, with the IDs in the request body.
+
+    Same as GET /products/batch for ID lists that are too long for a URL.
+
+    Args:
+        batch (schemas.ProductBatchRequest): The requested product IDs.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+
+    Returns:
+        schemas.ProductBatch: The found products and the missing IDs.
+
+    Raises:
+        HTTPException: If too many IDs are requested.
+    """
+    return _batch_response(db, batch.ids)
+
 
 @router.get("/products/{product_id}", response_model=schemas.Product)
-def get_product_by_id(product_id: int, db: Session = Depends(get_db)):
+def get_product_by_id(
+    product_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
     Get a product by ID.
 
-    This endpoint returns a single product by its ID.
+    This endpoint returns a single product by its ID, with an ETag and
+    Cache-Control header. If If-None-Match carries the current ETag, the
+    response is 304 Not Modified without a body.
 
     Args:
         product_id (int): ID of the product to retrieve.
+        if_none_match (Optional[str], optional): ETag of the client's cached copy. Defaults to None.
         db (Session, optional): Database session. Defaults to Depends(get_db).
 
     Returns:
-        schemas.Product: The requested product.
+        Response: The requested product, or 304 Not Modified.
 
     Raises:
         HTTPException: If a database error occurs or the product is not found.
     """
     try:
-        return crud.get_product_by_id(db=db, p_id=product_id)
-    except SQLAlchemyError:
+        rendered = crud.get_rendered_product(db=db, p_id=product_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    except (SQLAlchemyError, RuntimeError):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database error occured while getting product id."
         )
+    return conditional_response(rendered, if_none_match)
+
+
+@router.get("/products/{product_id}/similar", response_model=list[schemas.Product])
+def get_similar_products(product_id: int, k: int = Query(10, ge=1, le=100)):
+    """
+    Get the products most similar to a product.
+
+    Products are compared by THC, CBD and price (each scaled to the spread of
+    the catalog) and by genetic. The answer comes from an in-memory index, so it
+    does not touch the database.
+
+    Args:
+        product_id (int): ID of the reference product.
+        k (int, optional): Number of similar products to return. Defaults to 10.
+
+    Returns:
+        list[schemas.Product]: Similar products, most similar first.
+
+    Raises:
+        HTTPException: If the product is not found.
+    """
+    try:
+        return crud.get_similar_products(product_id, k)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
 
 @router.patch("/products/{product_id}", response_model=schemas.Product)
@@ -165,7 +522,7 @@ def patch_product_by_id(
     product_id: int, 
     update_data: schemas.ProductUpdate, 
     db: Session = Depends(get_db),
-    current_user: Customer = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """
     Update a product.
@@ -177,7 +534,7 @@ def patch_product_by_id(
         product_id (int): ID of the product to update.
         update_data (schemas.ProductUpdate): Data to update the product with.
         db (Session, optional): Database session. Defaults to Depends(get_db).
-        current_user (Customer): The authenticated admin user.
+        current_user (Principal): The authenticated admin user.
 
     Returns:
         schemas.Product: The updated product.
@@ -195,7 +552,7 @@ def patch_product_by_id(
 async def remove_product_by_id(
     product_id: int, 
     db: Session = Depends(get_db),
-    current_user: Customer = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """
     Delete a product.
@@ -206,7 +563,7 @@ async def remove_product_by_id(
     Args:
         product_id (int): ID of the product to delete.
         db (Session, optional): Database session. Defaults to Depends(get_db).
-        current_user (Customer): The authenticated admin user.
+        current_user (Principal): The authenticated admin user.
 
     Returns:
         Response: Empty response with 204 status code if successful.
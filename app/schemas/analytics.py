@@ -0,0 +1,71 @@
+from datetime import date, datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class SalesMetric(str, Enum):
+    """
+    Enum of the metrics products can be ranked by.
+    """
+    units = "units"
+    revenue = "revenue"
+
+
+class ProductDailySales(BaseModel):
+    """
+    Pydantic model for the sales of a product on one day.
+
+    Attributes:
+        p_id (int): ID of the product.
+        day (date): UTC day.
+        units (int): Units sold.
+        revenue (float): Revenue.
+    """
+    p_id: int
+    day: date
+    units: int
+    revenue: float
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class ProductSales(BaseModel):
+    """
+    Pydantic model for the sales of a product.
+
+    Attributes:
+        p_id (int): ID of the product.
+        name (str): Name of the product.
+        units (int): Units sold.
+        revenue (float): Revenue.
+    """
+    p_id: int
+    name: str
+    units: int
+    revenue: float
+
+
+class CustomerSales(BaseModel):
+    """
+    Pydantic model for the lifetime value of a customer.
+
+    Attributes:
+        c_id (int): ID of the customer.
+        order_lines (int): Order lines placed.
+        units (int): Units bought.
+        revenue (float): Revenue.
+        last_order_at (Optional[datetime]): UTC time of the latest order, if known.
+    """
+    c_id: int
+    order_lines: int
+    units: int
+    revenue: float
+    last_order_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
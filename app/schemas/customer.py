@@ -6,12 +6,20 @@ class TokenData(BaseModel):
     """
     Schema for JWT token data.
 
-    Contains the customer ID extracted from a JWT token.
+    Contains the claims extracted from a JWT token.
 
     Attributes:
         id (Optional[int]): The customer ID, can be None if not provided.
+        role (Optional[str]): The customer's role at login, None for tokens without a role claim.
+        version (int): The customer's token version at login. Defaults to 0.
+        jti (Optional[str]): The token's unique ID, None for tokens issued without one.
+        exp (Optional[float]): Expiry of the token as a Unix timestamp.
     """
     id: Optional[int] = None
+    role: Optional[str] = None
+    version: int = 0
+    jti: Optional[str] = None
+    exp: Optional[float] = None
 
 
 class CustomerBase(BaseModel):
@@ -121,3 +129,58 @@ class CustomerResponse(BaseModel):
         "from_attributes": True,
         "populate_by_name": True
     }
+
+
+class Principal(BaseModel):
+    """
+    Schema for the authenticated customer of a request.
+
+    Holds only the fields needed to authorize a request, so it can be cached
+    instead of loading the customer on every request. Principals built from the
+    access token alone (admin checks) carry no name and email.
+
+    Attributes:
+        c_id (int): Customer ID.
+        name (Optional[str]): Customer's full name.
+        email (Optional[str]): Customer's email address.
+        is_admin (bool): Whether the customer has admin privileges.
+    """
+    c_id: int
+    name: Optional[str] = None
+    email: Optional[str] = None
+    is_admin: bool = False
+
+    model_config = {
+        "from_attributes": True,
+        "frozen": True
+    }
+
+
+class CustomerRoleUpdate(BaseModel):
+    """
+    Schema for changing a customer's role.
+
+    Attributes:
+        is_admin (bool): Whether the customer has admin privileges.
+    """
+    is_admin: bool
+
+
+class RefreshRequest(BaseModel):
+    """
+    Schema for exchanging a refresh token.
+
+    Attributes:
+        refresh_token (str): The refresh token from the login or the previous refresh.
+    """
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    """
+    Schema for logging out.
+
+    Attributes:
+        refresh_token (Optional[str]): The refresh token to revoke along with the access token.
+    """
+    refresh_token: Optional[str] = None
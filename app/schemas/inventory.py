@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.schemas.order import CheckoutLine
+
+
+class StockLevel(BaseModel):
+    """
+    Pydantic model for the stock of a product.
+
+    Attributes:
+        p_id (int): ID of the product.
+        stock (Optional[int]): Units in stock, None if stock is not tracked.
+    """
+    p_id: int
+    stock: Optional[int]
+
+
+class StockUpdate(BaseModel):
+    """
+    Pydantic model for setting the stock of a product.
+
+    Attributes:
+        stock (Optional[int]): New units in stock, None to stop tracking stock.
+    """
+    stock: Optional[int] = Field(..., ge=0)
+
+
+class StockAdjustment(BaseModel):
+    """
+    Pydantic model for changing the stock of a product relative to its current value.
+
+    Attributes:
+        delta (int): Units to add (positive) or remove (negative).
+    """
+    delta: int
+
+
+class ReservationCreate(BaseModel):
+    """
+    Pydantic model for reserving stock for a cart.
+
+    Attributes:
+        lines (List[CheckoutLine]): The products and amounts to reserve.
+    """
+    lines: List[CheckoutLine]
+
+
+class Reservation(BaseModel):
+    """
+    Pydantic model for a stock reservation.
+
+    Attributes:
+        reservation_id (str): ID to pass to the checkout.
+        c_id (int): ID of the customer holding the reservation.
+        expires_at (datetime): UTC time after which the reserved stock is released.
+        lines (List[CheckoutLine]): The reserved products and amounts.
+    """
+    reservation_id: str
+    c_id: int
+    expires_at: datetime
+    lines: List[CheckoutLine]
@@ -1,4 +1,10 @@
-from pydantic import BaseModel
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, model_validator
+
+from app.schemas.product import ProductSummary
 
 
 class OrderBase(BaseModel):
@@ -7,12 +13,41 @@ class OrderBase(BaseModel):
     amount: int
 
 class OrderCreate(OrderBase):
-    order_nr: str
+    # Order numbers are allocated by the server; a client-sent order_nr is ignored
+    pass
 
 class Order(OrderBase):
     o_id: int
     order_nr: str
+    created_at: Optional[datetime] = None
+    # Only set when the order was requested with expand=product
+    product: Optional[ProductSummary] = None
 
     model_config = {
         "from_attributes": True
     }
+
+    @model_validator(mode="before")
+    @classmethod
+    def _skip_unloaded_product(cls, data):
+        # Order.product raises unless it was eager-loaded, which puts it in __dict__
+        if hasattr(data, "__dict__") and "product" not in vars(data):
+            return {name: getattr(data, name) for name in cls.model_fields if name != "product"}
+        return data
+
+class OrderExpand(str, Enum):
+    product = "product"
+
+class CheckoutLine(BaseModel):
+    p_id: int
+    amount: int
+
+class CheckoutCreate(BaseModel):
+    # Either the cart lines or a reservation holding them
+    lines: List[CheckoutLine] = []
+    reservation_id: Optional[str] = None
+
+class Checkout(BaseModel):
+    order_nr: str
+    c_id: int
+    lines: List[Order]
@@ -1,6 +1,7 @@
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ProductBase(BaseModel):
@@ -33,12 +34,14 @@ class ProductCreate(ProductBase):
     Pydantic model for creating a new product.
 
     This model inherits all fields from ProductBase and is used for validating
-    data when creating a new product. It doesn't add any additional fields.
+    data when creating a new product. Stock is only set on creation; afterwards
+    it changes through orders and the inventory endpoints.
 
     Attributes:
         Inherits all attributes from ProductBase.
+        stock (Optional[int]): Initial units in stock (not negative), None to not track stock (optional).
     """
-    pass
+    stock: Optional[int] = Field(None, ge=0)
 
 
 class ProductUpdate(BaseModel):
@@ -80,3 +83,115 @@ class Product(ProductBase):
     p_id: int
 
     model_config = {"from_attributes": True}
+
+
+class ProductSummary(BaseModel):
+    """
+    Pydantic model for the product details embedded in other resources.
+
+    Attributes:
+        p_id (int): Unique identifier for the product.
+        name (str): Name of the product.
+        price (float): Price of the product.
+        genetic (str): Genetic information of the weed.
+        slug (Optional[str]): Path to the product picture (optional).
+    """
+    p_id: int
+    name: str
+    price: float
+    genetic: str
+    slug: Optional[str] = None
+
+    model_config = {"from_attributes": True}
+
+
+class ProductSort(str, Enum):
+    """
+    Sort orders supported by the product list.
+
+    Products are sorted ascending by the chosen column, ties are broken by p_id.
+    """
+    price = "price"
+    thc = "thc"
+    cbd = "cbd"
+    name = "name"
+
+
+class ProductFilter(BaseModel):
+    """
+    Pydantic model for filtering the product list.
+
+    All filters are optional and combined with AND. Range bounds are inclusive.
+
+    Attributes:
+        genetic (Optional[str]): Only products with this genetic (e.g. "Indica").
+        effect (Optional[str]): Only products with this effect (e.g. "Relaxing").
+        thc_min (Optional[float]): Minimum THC content.
+        thc_max (Optional[float]): Maximum THC content.
+        cbd_min (Optional[float]): Minimum CBD content.
+        cbd_max (Optional[float]): Maximum CBD content.
+        price_min (Optional[float]): Minimum price.
+        price_max (Optional[float]): Maximum price.
+    """
+    genetic: Optional[str] = None
+    effect: Optional[str] = None
+    thc_min: Optional[float] = None
+    thc_max: Optional[float] = None
+    cbd_min: Optional[float] = None
+    cbd_max: Optional[float] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+
+
+class ProductBatchRequest(BaseModel):
+    """
+    Pydantic model for looking up many products at once.
+
+    Attributes:
+        ids (List[int]): IDs of the products, in the order they should be returned.
+    """
+    ids: List[int]
+
+
+class ProductBatch(BaseModel):
+    """
+    Pydantic model for the result of a batch product lookup.
+
+    Attributes:
+        products (List[Product]): The found products, in the requested order.
+        missing (List[int]): Requested IDs without a product.
+    """
+    products: List[Product]
+    missing: List[int]
+
+
+class ProductImportError(BaseModel):
+    """
+    Pydantic model for a rejected row of a product import.
+
+    Attributes:
+        row (int): Line number of the row in the uploaded file.
+        error (str): Why the row was rejected.
+    """
+    row: int
+    error: str
+
+
+class ProductImportReport(BaseModel):
+    """
+    Pydantic model for the result of a product import.
+
+    Attributes:
+        processed (int): Number of rows read.
+        inserted (int): Number of products created.
+        updated (int): Number of existing products updated by slug.
+        failed (int): Number of rejected rows.
+        errors (List[ProductImportError]): The first rejected rows with their errors.
+        errors_truncated (bool): Whether more rows failed than are listed in errors.
+    """
+    processed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[ProductImportError] = []
+    errors_truncated: bool = False
@@ -0,0 +1,24 @@
+import asyncio
+from typing import Callable
+
+from starlette.concurrency import run_in_threadpool
+
+
+async def run_periodically(interval: float, func: Callable, *args):
+    """
+    Run a blocking function in the threadpool every interval seconds.
+
+    Errors are printed and do not stop the loop, so a temporary database outage
+    only skips a round. Cancel the task to stop the loop.
+
+    Args:
+        interval (float): Seconds between two runs.
+        func (Callable): The function to run.
+        *args: Arguments passed to func.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(func, *args)
+        except Exception as e:
+            print(f"Background task {func.__name__} failed: {e}")
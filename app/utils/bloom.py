@@ -0,0 +1,79 @@
+import hashlib
+import math
+import threading
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter for string keys.
+
+    A membership test answers "definitely not added" or "probably added" with
+    k bit lookups, whatever the number of keys, and the bit array takes about
+    1.8 bytes per key at a 0.1% false positive rate. The bit array and the
+    number of hash functions are sized for the expected capacity; beyond it the
+    false positive rate grows, so callers rebuild the filter with a larger
+    capacity. Keys cannot be removed.
+
+    The k bit positions are derived from one BLAKE2b digest by double hashing.
+    Adding takes a lock; membership tests do not.
+
+    Attributes:
+        capacity (int): Expected number of keys.
+        error_rate (float): False positive rate at capacity.
+        size (int): Number of bits.
+        hash_count (int): Number of bit positions per key.
+        count (int): Number of keys added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        if capacity <= 0:
+            raise ValueError("capacity must be greater than zero")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        # Odd, so the step is never zero
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str):
+        """
+        Add a key.
+
+        Args:
+            key (str): The key to add.
+        """
+        positions = self._positions(key)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def stats(self) -> dict:
+        """
+        Get the filter's size and fill.
+
+        Returns:
+            dict: Number of keys, capacity, size in bytes and hash functions.
+        """
+        return {
+            "count": self.count,
+            "capacity": self.capacity,
+            "bytes": len(self._bits),
+            "hash_functions": self.hash_count,
+        }
@@ -0,0 +1,137 @@
+import os
+import secrets
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import Session
+
+# Maximum number of rows per INSERT statement
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "1000"))
+
+_autoinc_settings = {}
+
+
+def _autoinc_settings_of(db: Session) -> Tuple[int, int]:
+    """
+    Get the auto-increment settings of a MySQL server, cached per database URL.
+
+    Args:
+        db (Session): Database session.
+
+    Returns:
+        Tuple[int, int]: The values of @@auto_increment_increment and
+        @@innodb_autoinc_lock_mode.
+    """
+    url = db.get_bind().url
+    settings = _autoinc_settings.get(url)
+    if settings is None:
+        step, lock_mode = db.execute(
+            text("SELECT @@auto_increment_increment, @@innodb_autoinc_lock_mode")
+        ).one()
+        settings = _autoinc_settings[url] = (int(step), int(lock_mode))
+    return settings
+
+
+def _read_back_keys(db: Session, model, batch: List[dict], key_columns: Sequence[str],
+                    marker_column: Optional[str]) -> List[dict]:
+    """
+    Select the generated primary keys of a batch that was just inserted.
+
+    Args:
+        db (Session): Database session.
+        model: Mapped class.
+        batch (List[dict]): The inserted rows.
+        key_columns (Sequence[str]): Columns that identify every row of the batch.
+        marker_column (Optional[str]): Column holding the batch's marker.
+
+    Returns:
+        List[dict]: The rows of the batch including their primary key, in insertion order.
+    """
+    pk = model.__table__.autoincrement_column
+    if key_columns:
+        columns = [model.__table__.c[name] for name in key_columns]
+        # Filtering on the first key column uses the prefix of the table's unique index
+        found = db.execute(
+            select(pk, *columns).where(columns[0].in_({row[key_columns[0]] for row in batch}))
+        ).all()
+        ids = {tuple(found_row[1:]): found_row[0] for found_row in found}
+        return [{**row, pk.name: ids[tuple(row[name] for name in key_columns)]} for row in batch]
+    # A multi-row INSERT allocates its keys in row order, even when interleaved with others
+    marker_value = batch[0][marker_column]
+    ids = db.execute(
+        select(pk).where(model.__table__.c[marker_column] == marker_value).order_by(pk)
+    ).scalars().all()
+    return [{**row, pk.name: id_} for row, id_ in zip(batch, ids)]
+
+
+def bulk_insert(db: Session, model, rows: Sequence[dict], key_columns: Sequence[str] = (),
+                marker_column: Optional[str] = None) -> List[dict]:
+    """
+    Insert many rows with multi-row INSERT statements and return them with their keys.
+
+    The rows are written with one INSERT ... VALUES (...), (...) statement per
+    BULK_INSERT_BATCH_SIZE rows inside the caller's transaction; nothing is
+    committed here. Generated primary keys come back with at most one more
+    query per batch:
+
+    - Databases with INSERT ... RETURNING (SQLite, MariaDB, PostgreSQL) return
+      the inserted rows directly.
+    - On MySQL with innodb_autoinc_lock_mode 0 or 1, InnoDB allocates the keys
+      of a multi-row INSERT as one consecutive block, so they are derived from
+      LAST_INSERT_ID() (the first key of the statement) and
+      auto_increment_increment.
+    - With lock mode 2 (interleaved, the MySQL 8 default), concurrent inserts
+      can interleave their keys, so they are selected after the INSERT: by
+      key_columns if the rows have a natural unique key, otherwise by a random
+      marker written to marker_column for every row of the batch.
+
+    Tables without an auto-increment primary key are inserted without reading
+    keys back, as their keys are part of the rows.
+
+    Args:
+        db (Session): Database session.
+        model: Mapped class.
+        rows (Sequence[dict]): Column values of the rows to insert, keyed by column name.
+        key_columns (Sequence[str], optional): Columns that are unique together in
+            the table, with an index starting with the first. Defaults to ().
+        marker_column (Optional[str], optional): Indexed column that stores the
+            marker of the batch, for tables without such a key. Defaults to None.
+
+    Returns:
+        List[dict]: The inserted rows including their primary key, in insertion order.
+
+    Raises:
+        ValueError: If the keys have to be selected but neither key_columns nor
+            marker_column is given.
+    """
+    table = model.__table__
+    autoinc_column = table.autoincrement_column
+    dialect = db.get_bind().dialect
+    inserted: List[dict] = []
+
+    for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+        batch = list(rows[start:start + BULK_INSERT_BATCH_SIZE])
+        if autoinc_column is None:
+            db.execute(insert(table).values(batch))
+            inserted.extend(batch)
+        elif dialect.insert_returning:
+            result = db.execute(insert(table).values(batch).returning(*table.c))
+            inserted.extend(dict(row) for row in result.mappings())
+        else:
+            step, lock_mode = _autoinc_settings_of(db)
+            if lock_mode in (0, 1):
+                result = db.execute(insert(table).values(batch))
+                inserted.extend(
+                    {**row, autoinc_column.name: result.lastrowid + i * step} for i, row in enumerate(batch)
+                )
+            else:
+                if not key_columns:
+                    if marker_column is None:
+                        raise ValueError(
+                            f"Reading back the keys of {table.name} needs key_columns or marker_column"
+                        )
+                    marker = secrets.token_hex(16)
+                    batch = [{**row, marker_column: marker} for row in batch]
+                db.execute(insert(table).values(batch))
+                inserted.extend(_read_back_keys(db, model, batch, key_columns, marker_column))
+    return inserted
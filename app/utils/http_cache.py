@@ -0,0 +1,95 @@
+import hashlib
+import os
+from typing import Any, NamedTuple, Optional
+
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+# Seconds clients may reuse a cached catalog response before revalidating it
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+
+class Rendered(NamedTuple):
+    """
+    A value together with its serialized JSON body and ETag.
+
+    Caching the rendered form lets a cache hit be answered, or confirmed with
+    304 Not Modified, without serializing the value again.
+    """
+    data: Any
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Compute a strong ETag from a response body.
+
+    Args:
+        body (bytes): The serialized response body.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def render_json(data: Any, adapter: TypeAdapter) -> Rendered:
+    """
+    Serialize a value to JSON and compute its ETag.
+
+    Args:
+        data (Any): The value to serialize.
+        adapter (TypeAdapter): Adapter for the response model of the value.
+
+    Returns:
+        Rendered: The value, its body and its ETag.
+    """
+    body = adapter.dump_json(data)
+    return Rendered(data, body, make_etag(body))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match request header against an ETag.
+
+    Follows RFC 9110: the header may list several ETags or be "*", and
+    If-None-Match uses weak comparison, so a W/ prefix is ignored.
+
+    Args:
+        if_none_match (Optional[str]): The If-None-Match header, if sent.
+        etag (str): The current ETag of the resource.
+
+    Returns:
+        bool: True if the client already has the current representation.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_response(rendered: Rendered, if_none_match: Optional[str],
+                         max_age: int = HTTP_CACHE_MAX_AGE) -> Response:
+    """
+    Answer a GET with the rendered body or with 304 Not Modified.
+
+    Both responses carry the ETag and a Cache-Control header, so clients may
+    reuse the body for max_age seconds and revalidate it cheaply afterwards.
+
+    Args:
+        rendered (Rendered): The rendered resource.
+        if_none_match (Optional[str]): The If-None-Match request header, if sent.
+        max_age (int, optional): Cache-Control max-age in seconds. Defaults to HTTP_CACHE_MAX_AGE.
+
+    Returns:
+        Response: 304 without body if the client's copy is current, else 200 with the JSON body.
+    """
+    headers = {"ETag": rendered.etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(if_none_match, rendered.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=rendered.body, media_type="application/json", headers=headers)
@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, TypeAdapter
+
+from app.utils.cache import TTLCache
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+# Set on responses that were replayed from the store
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+# Seconds a response is kept for replays
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Maximum number of stored responses per worker process
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+# Maximum length of an Idempotency-Key
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class StoredResponse(NamedTuple):
+    """
+    The response to the first request with an idempotency key.
+
+    Attributes:
+        status_code (int): HTTP status code.
+        body (bytes): JSON body.
+        headers (Dict[str, str]): Extra headers, e.g. of an HTTPException.
+        fingerprint (str): Hash of the request the response belongs to.
+    """
+    status_code: int
+    body: bytes
+    headers: Dict[str, str]
+    fingerprint: str
+
+    def replay(self) -> Response:
+        """
+        Build the response for a retried request.
+
+        Returns:
+            Response: The stored response, marked with IDEMPOTENT_REPLAYED_HEADER.
+        """
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            media_type="application/json",
+            headers={**self.headers, IDEMPOTENT_REPLAYED_HEADER: "true"},
+        )
+
+
+def request_fingerprint(request: BaseModel) -> str:
+    """
+    Hash a request body, so a reused key with a different request is detected.
+
+    Only the hash is stored, not the request, which may contain a password.
+
+    Args:
+        request (BaseModel): The validated request body.
+
+    Returns:
+        str: The hex digest.
+    """
+    return hashlib.blake2b(request.model_dump_json().encode(), digest_size=16).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Bounded in-process store that runs a request once per idempotency key.
+
+    The first request with a key runs normally and its response is kept for
+    the time to live, so a retry gets the same response without running the
+    request again. Client errors (4xx) are stored as well, while server errors
+    and unexpected exceptions are not, so a retry after a failure runs the
+    request again. Requests with a key that is still running wait for the first
+    one and get its response, so concurrent duplicates also run only once.
+
+    Keys are scoped by the caller (e.g. endpoint and customer). A key reused
+    with a different request body is rejected with 422. The store is per worker
+    process; route retries of one client to the same worker (sticky sessions)
+    or run one worker if duplicates across workers must be caught.
+
+    Attributes:
+        responses (TTLCache): The stored responses by scoped key.
+    """
+
+    def __init__(self, maxsize: int = IDEMPOTENCY_MAX_KEYS, ttl: float = IDEMPOTENCY_TTL_SECONDS):
+        self.responses = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Futures of the requests that are running, resolved with their StoredResponse or None
+        self._running: Dict[Hashable, Tuple[str, asyncio.Future]] = {}
+
+    @staticmethod
+    def _check_fingerprint(stored_fingerprint: str, fingerprint: str):
+        if stored_fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail=f"{IDEMPOTENCY_KEY_HEADER} was already used for a different request",
+            )
+
+    async def run(self, key: Hashable, fingerprint: str, call: Callable[[], Awaitable[Any]],
+                  adapter: TypeAdapter, status_code: int = status.HTTP_200_OK) -> Response:
+        """
+        Run a request once per key and replay its response to retries.
+
+        Args:
+            key (Hashable): The scoped idempotency key.
+            fingerprint (str): Fingerprint of the request, see request_fingerprint.
+            call (Callable[[], Awaitable[Any]]): Runs the request and returns the response data.
+            adapter (TypeAdapter): Adapter for the response model.
+            status_code (int, optional): Status code of a successful response. Defaults to 200.
+
+        Returns:
+            Response: The JSON response of the request, or the stored one for a retry.
+
+        Raises:
+            HTTPException: If the key was used for a different request (422), or
+                a server error of the request that is not stored.
+        """
+        while True:
+            stored = self.responses.get(key)
+            if stored is not None:
+                self._check_fingerprint(stored.fingerprint, fingerprint)
+                return stored.replay()
+            running = self._running.get(key)
+            if running is None:
+                break
+            self._check_fingerprint(running[0], fingerprint)
+            stored = await asyncio.shield(running[1])
+            if stored is not None:
+                return stored.replay()
+            # The first request failed without a stored response; try again
+
+        future = asyncio.get_running_loop().create_future()
+        self._running[key] = (fingerprint, future)
+        stored = None
+        try:
+            try:
+                data = adapter.validate_python(await call(), from_attributes=True)
+                stored = StoredResponse(status_code, adapter.dump_json(data, by_alias=True), {}, fingerprint)
+            except HTTPException as error:
+                if error.status_code >= 500:
+                    raise
+                stored = StoredResponse(
+                    error.status_code, json.dumps({"detail": error.detail}).encode(),
+                    dict(error.headers or {}), fingerprint,
+                )
+            self.responses.set(key, stored)
+        finally:
+            del self._running[key]
+            future.set_result(stored)
+
+        return Response(
+            content=stored.body, status_code=stored.status_code,
+            media_type="application/json", headers=stored.headers,
+        )
+
+    def stats(self) -> dict:
+        """
+        Get the store counters.
+
+        Returns:
+            dict: Counters of the stored responses and the number of running requests.
+        """
+        return {**self.responses.stats(), "running": len(self._running)}
+
+
+def check_idempotency_key(key: Optional[str]) -> Optional[str]:
+    """
+    Validate an Idempotency-Key header.
+
+    Args:
+        key (Optional[str]): The header value, if sent.
+
+    Returns:
+        Optional[str]: The key, or None if no key was sent.
+
+    Raises:
+        HTTPException: If the key is empty or too long.
+    """
+    if key is None:
+        return None
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_KEY_HEADER} must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters long",
+        )
+    return key
+
+
+idempotency_store = IdempotencyStore()
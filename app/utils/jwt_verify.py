@@ -0,0 +1,126 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from typing import Callable
+
+from app.utils.cache import TTLCache
+
+# Digest of each supported HMAC algorithm
+_HMAC_DIGESTS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+
+class InvalidTokenError(ValueError):
+    """
+    Raised when a token is malformed, has an invalid signature or has expired.
+    """
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+class JWTVerifier:
+    """
+    Verifier for HMAC-signed JWTs with a cache of verified claims.
+
+    The HMAC key schedule is computed once and copied for every token instead
+    of being derived from the secret again, and the claims of a verified token
+    are cached by the token's digest until the token expires. A token that is
+    sent with every request of a session is therefore decoded and verified
+    once; later requests cost one hash and one cache lookup. Only verified
+    tokens are cached, so an invalid token is checked again every time.
+
+    The checks match python-jose for the tokens this API issues: the algorithm
+    in the header must be the configured one, the signature must match and the
+    exp and nbf claims, if present, must be numbers and not be exceeded.
+
+    Attributes:
+        algorithm (str): The accepted algorithm, HS256, HS384 or HS512.
+        cache (TTLCache): Verified claims by token digest.
+    """
+
+    def __init__(self, secret: str, algorithm: str = "HS256", cache_size: int = 10000,
+                 max_ttl: float = 3600.0, clock: Callable[[], float] = time.time):
+        if algorithm not in _HMAC_DIGESTS:
+            raise ValueError(f"Unsupported algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.cache = TTLCache(maxsize=cache_size, ttl=max_ttl)
+        self._mac = hmac.new(secret.encode(), digestmod=_HMAC_DIGESTS[algorithm])
+        self._clock = clock
+
+    def decode(self, token: str) -> dict:
+        """
+        Verify a token and return its claims.
+
+        Args:
+            token (str): The encoded JWT.
+
+        Returns:
+            dict: The claims of the token.
+
+        Raises:
+            InvalidTokenError: If the token is malformed, its signature does not
+                match or it has expired.
+        """
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        claims = self.cache.get(key)
+        if claims is not None:
+            return dict(claims)
+
+        claims = self._verify(token)
+        now = self._clock()
+        ttl = self.cache.ttl
+        if "exp" in claims:
+            ttl = min(ttl, claims["exp"] - now)
+        if ttl > 0:
+            self.cache.set(key, claims, ttl=ttl)
+        return dict(claims)
+
+    def _verify(self, token: str) -> dict:
+        try:
+            signing_input, _, signature = token.rpartition(".")
+            header_segment, _, payload_segment = signing_input.partition(".")
+            if not header_segment or not payload_segment or "." in payload_segment:
+                raise InvalidTokenError("Malformed token")
+
+            mac = self._mac.copy()
+            mac.update(signing_input.encode())
+            if not hmac.compare_digest(mac.digest(), _b64decode(signature)):
+                raise InvalidTokenError("Signature verification failed")
+
+            header = json.loads(_b64decode(header_segment))
+            claims = json.loads(_b64decode(payload_segment))
+        except (binascii.Error, UnicodeError, json.JSONDecodeError):
+            raise InvalidTokenError("Malformed token")
+        if not isinstance(header, dict) or header.get("alg") != self.algorithm:
+            raise InvalidTokenError("Unexpected algorithm")
+        if not isinstance(claims, dict):
+            raise InvalidTokenError("Malformed token")
+
+        now = self._clock()
+        for claim in ("exp", "nbf"):
+            if claim in claims and (
+                isinstance(claims[claim], bool) or not isinstance(claims[claim], (int, float))
+            ):
+                raise InvalidTokenError(f"Invalid {claim} claim")
+        if "exp" in claims and claims["exp"] < now:
+            raise InvalidTokenError("Token has expired")
+        if "nbf" in claims and claims["nbf"] > now:
+            raise InvalidTokenError("Token is not yet valid")
+        return claims
+
+    def stats(self) -> dict:
+        """
+        Get the counters of the claims cache.
+
+        Returns:
+            dict: Size, capacity and hit/miss/eviction/expiration counters.
+        """
+        return self.cache.stats()
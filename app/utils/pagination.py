@@ -0,0 +1,150 @@
+import base64
+import binascii
+import json
+from typing import Any, NamedTuple, Optional, Sequence
+
+from fastapi import Response
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Cursor(NamedTuple):
+    """
+    Decoded keyset pagination cursor.
+
+    Attributes:
+        pk (int): Primary key of the last row of the previous page.
+        sort_key (Optional[str]): Name of the sort column the cursor was issued for.
+        sort_value (Any): Value of the sort column in the last row of the previous page.
+    """
+    pk: int
+    sort_key: Optional[str] = None
+    sort_value: Any = None
+
+
+def encode_cursor(pk: int, sort_key: Optional[str] = None, sort_value: Any = None) -> str:
+    """
+    Encode the position of the last row of a page into an opaque cursor.
+
+    Args:
+        pk (int): Primary key of the last row.
+        sort_key (Optional[str], optional): Name of the sort column. Defaults to None.
+        sort_value (Any, optional): Value of the sort column in the last row. Defaults to None.
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    payload = {"pk": pk}
+    if sort_key is not None:
+        payload["key"] = sort_key
+        payload["value"] = sort_value
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Decode an opaque cursor created by encode_cursor.
+
+    Args:
+        cursor (str): The cursor string received from the client.
+
+    Returns:
+        Cursor: The decoded cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        pk = payload["pk"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(pk, int) or isinstance(pk, bool):
+        raise ValueError("Invalid cursor")
+    return Cursor(pk=pk, sort_key=payload.get("key"), sort_value=payload.get("value"))
+
+
+def apply_keyset(query: Query, pk_column, cursor: Optional[str] = None,
+                 sort_key: Optional[str] = None, sort_column=None) -> Query:
+    """
+    Order a query for keyset pagination and continue after the given cursor.
+
+    Rows are ordered by (sort_column, pk_column), or by pk_column alone when no
+    sort column is given. With a cursor, only rows strictly after the cursor
+    position are returned, so the database can seek through the index instead
+    of scanning and discarding skipped rows.
+
+    Args:
+        query (Query): The query to paginate.
+        pk_column: Primary key column used as the unique tie breaker.
+        cursor (Optional[str], optional): Cursor from a previous page. Defaults to None.
+        sort_key (Optional[str], optional): Name of the sort column. Defaults to None.
+        sort_column (optional): Column to sort by before the primary key. Defaults to None.
+
+    Returns:
+        Query: The ordered and filtered query.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort order.
+    """
+    if sort_column is None:
+        query = query.order_by(pk_column)
+    else:
+        query = query.order_by(sort_column, pk_column)
+
+    if cursor is None:
+        return query
+
+    position = decode_cursor(cursor)
+    if position.sort_key != sort_key:
+        raise ValueError("Cursor does not match the requested sort order")
+
+    if sort_column is None:
+        return query.filter(pk_column > position.pk)
+    if position.sort_value is None:
+        raise ValueError("Invalid cursor")
+    return query.filter(
+        or_(
+            sort_column > position.sort_value,
+            and_(sort_column == position.sort_value, pk_column > position.pk),
+        )
+    )
+
+
+def next_cursor(items: Sequence, limit: int, pk_attr: str,
+                sort_key: Optional[str] = None) -> Optional[str]:
+    """
+    Build the cursor pointing after the last item of a page.
+
+    Args:
+        items (Sequence): The rows of the current page.
+        limit (int): The page size that was requested.
+        pk_attr (str): Name of the primary key attribute on the items.
+        sort_key (Optional[str], optional): Name of the sort attribute on the items. Defaults to None.
+
+    Returns:
+        Optional[str]: The next cursor, or None if this was the last page.
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    if sort_key is None:
+        return encode_cursor(getattr(last, pk_attr))
+    return encode_cursor(getattr(last, pk_attr), sort_key, getattr(last, sort_key))
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]):
+    """
+    Attach the next page cursor to a response.
+
+    Args:
+        response (Response): The outgoing response.
+        cursor (Optional[str]): The next cursor, or None on the last page.
+    """
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -1,7 +1,66 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, Tuple
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from passlib.hash import bcrypt
+from starlette.concurrency import run_in_threadpool
+
+# Target time of one bcrypt hash in milliseconds; the cost is calibrated to it
+# at startup. 0 keeps passlib's default cost.
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+# Bounds of the calibrated cost (log2 of the bcrypt iterations)
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "16"))
+# Stored hashes whose cost differs from the calibrated one by more are rehashed on login
+BCRYPT_ROUNDS_TOLERANCE = int(os.getenv("BCRYPT_ROUNDS_TOLERANCE", "1"))
+# Cost at which calibration measures the hash time
+_CALIBRATION_PROBE_ROUNDS = 8
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def make_password_context(rounds: Optional[int] = None,
+                          tolerance: int = BCRYPT_ROUNDS_TOLERANCE) -> CryptContext:
+    """
+    Create the passlib context for a bcrypt cost.
+
+    Hashes with a cost more than tolerance away from rounds are reported by
+    needs_update, so they are rehashed at the next login.
+
+    Args:
+        rounds (Optional[int], optional): The bcrypt cost. Defaults to None
+            (passlib's default cost, no cost-based updates).
+        tolerance (int, optional): Accepted difference of a stored hash's cost.
+            Defaults to BCRYPT_ROUNDS_TOLERANCE.
+
+    Returns:
+        CryptContext: The context.
+    """
+    if rounds is None:
+        return CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=max(bcrypt.min_rounds, rounds - tolerance),
+        bcrypt__max_rounds=min(bcrypt.max_rounds, rounds + tolerance),
+    )
+
+
+pwd_context = make_password_context()
+# The calibrated cost, None while passlib's default is used
+bcrypt_rounds: Optional[int] = None
+
+# Processes hashing and verifying passwords; 0 runs bcrypt in the threadpool instead
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+# Maximum number of hash and verify calls waiting for a process before new ones get 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "256"))
 
 
 def password_hash(password: str):
@@ -33,3 +92,252 @@ def verify_password(plain_password, hashed_password):
         bool: True if the password matches the hash, False otherwise.
     """
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and rehash it if the stored hash's cost is out of date.
+
+    Args:
+        plain_password (str): The plain text password to verify.
+        hashed_password (str): The hashed password to compare against.
+
+    Returns:
+        Tuple[bool, Optional[str]]: Whether the password matches, and a new hash
+        at the current cost if the password matches and the hash needs an update.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def hash_time(rounds: int, samples: int = 3) -> float:
+    """
+    Measure the time of one bcrypt hash in this process.
+
+    Args:
+        rounds (int): The bcrypt cost.
+        samples (int, optional): Number of hashes; the fastest counts. Defaults to 3.
+
+    Returns:
+        float: Seconds per hash.
+    """
+    handler = bcrypt.using(rounds=rounds)
+    # The first hash loads the bcrypt backend
+    handler.hash("calibration")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash("calibration")
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def calibrate_bcrypt_rounds(target_ms: float = BCRYPT_TARGET_MS, min_rounds: int = BCRYPT_MIN_ROUNDS,
+                            max_rounds: int = BCRYPT_MAX_ROUNDS,
+                            measure: Callable[[int], float] = hash_time) -> int:
+    """
+    Find the bcrypt cost whose hash time is closest to a target on this machine.
+
+    Each additional round doubles the hash time, so the time of a cheap probe
+    hash is enough to extrapolate the cost for the target.
+
+    Args:
+        target_ms (float, optional): Target time per hash in milliseconds. Defaults to BCRYPT_TARGET_MS.
+        min_rounds (int, optional): Lowest cost to return. Defaults to BCRYPT_MIN_ROUNDS.
+        max_rounds (int, optional): Highest cost to return. Defaults to BCRYPT_MAX_ROUNDS.
+        measure (Callable[[int], float], optional): Returns the seconds per hash
+            at a cost. Defaults to hash_time.
+
+    Returns:
+        int: The calibrated cost.
+    """
+    probe_seconds = measure(_CALIBRATION_PROBE_ROUNDS)
+    rounds = _CALIBRATION_PROBE_ROUNDS + round(math.log2(target_ms / 1000 / probe_seconds))
+    return max(min_rounds, min(max_rounds, rounds))
+
+
+def set_bcrypt_rounds(rounds: Optional[int]):
+    """
+    Use a bcrypt cost for new hashes in this process.
+
+    Args:
+        rounds (Optional[int]): The bcrypt cost, None for passlib's default.
+    """
+    global pwd_context, bcrypt_rounds
+    pwd_context = make_password_context(rounds)
+    bcrypt_rounds = rounds
+
+
+class PasswordHasherPool:
+    """
+    Bounded process pool for bcrypt.
+
+    bcrypt is deliberately slow and CPU-bound. Run in the request threadpool,
+    a burst of logins occupies the threads and competes with every other
+    request for the GIL. The pool runs it in worker processes instead, one per
+    core by default, so hashing scales with cores and the API process only
+    awaits the result. Calls beyond the pool size queue; once max_queue calls
+    are waiting, new calls are rejected with 503 instead of letting the queue
+    and the latency grow without bound.
+
+    The processes are started on first use with the spawn method, so they do
+    not inherit the API process's threads or database connections, and use
+    the bcrypt cost of the API process at that time. Without workers, calls
+    run in the threadpool.
+
+    Attributes:
+        workers (int): Number of worker processes.
+        max_queue (int): Maximum number of waiting calls.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=set_bcrypt_rounds, initargs=(bcrypt_rounds,),
+                )
+            return self._executor
+
+    async def run(self, func: Callable, *args):
+        """
+        Run a password function in a worker process.
+
+        Args:
+            func (Callable): password_hash, verify_password or verify_and_update_password.
+            *args: Arguments passed to func.
+
+        Returns:
+            Any: The result of func.
+
+        Raises:
+            HTTPException: If max_queue calls are already waiting (503).
+        """
+        if self.in_flight - self.workers >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent logins, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(func, *args)
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+            except BrokenProcessPool:
+                # A worker died; start a new pool for later calls and answer this one in a thread
+                self.shutdown(wait=False)
+                return await run_in_threadpool(func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the worker processes. The pool starts new ones when it is used again.
+
+        Args:
+            wait (bool, optional): Wait for running calls. Defaults to True.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def stats(self) -> dict:
+        """
+        Get the pool counters.
+
+        Returns:
+            dict: Pool size, running and queued calls, peak concurrency, call
+            counters and the bcrypt cost of new hashes (None for passlib's default).
+        """
+        in_flight = self.in_flight
+        return {
+            "workers": self.workers,
+            "running": min(in_flight, self.workers) if self.workers > 0 else in_flight,
+            "queued": max(in_flight - self.workers, 0) if self.workers > 0 else 0,
+            "max_queue": self.max_queue,
+            "peak_in_flight": self.max_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "bcrypt_rounds": bcrypt_rounds,
+        }
+
+
+password_pool = PasswordHasherPool()
+
+
+async def password_hash_async(password: str) -> str:
+    """
+    Hash a password in the password process pool.
+
+    Args:
+        password (str): The plain text password to hash.
+
+    Returns:
+        str: The hashed password.
+    """
+    return await password_pool.run(password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against a hash in the password process pool.
+
+    Args:
+        plain_password (str): The plain text password to verify.
+        hashed_password (str): The hashed password to compare against.
+
+    Returns:
+        bool: True if the password matches the hash, False otherwise.
+    """
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(plain_password: str,
+                                           hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and get a new hash if needed, in the password process pool.
+
+    Args:
+        plain_password (str): The plain text password to verify.
+        hashed_password (str): The hashed password to compare against.
+
+    Returns:
+        Tuple[bool, Optional[str]]: See verify_and_update_password.
+    """
+    return await password_pool.run(verify_and_update_password, plain_password, hashed_password)
+
+
+def calibrate_password_hashing(target_ms: float = BCRYPT_TARGET_MS) -> Optional[int]:
+    """
+    Calibrate the bcrypt cost to the target time and use it for new hashes.
+
+    Running worker processes of the password pool are stopped, so the pool
+    starts new ones with the calibrated cost.
+
+    Args:
+        target_ms (float, optional): Target time per hash in milliseconds, 0 to
+            keep passlib's default cost. Defaults to BCRYPT_TARGET_MS.
+
+    Returns:
+        Optional[int]: The calibrated cost, or None if calibration is disabled.
+    """
+    if target_ms <= 0:
+        return None
+    set_bcrypt_rounds(calibrate_bcrypt_rounds(target_ms))
+    password_pool.shutdown()
+    return bcrypt_rounds
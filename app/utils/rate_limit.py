@@ -0,0 +1,180 @@
+import heapq
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Tuple
+
+from fastapi import HTTPException, status
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated_at", "allowed", "rejected")
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+        self.allowed = 0
+        self.rejected = 0
+
+
+class TokenBucketLimiter:
+    """
+    In-process token-bucket rate limiter with one bucket per key.
+
+    Every key (e.g. a client IP or an email address) has a bucket that holds up
+    to burst tokens and refills at rate tokens per second. A request takes one
+    token; with an empty bucket it is rejected along with the number of seconds
+    until the next token is available. A key therefore gets burst requests at
+    once and rate requests per second sustained.
+
+    At most max_keys buckets are kept, in LRU order, so memory stays bounded
+    whatever the number of keys. A new key only evicts the least recently used
+    bucket if it has refilled to burst, as an evicted key starts with a full
+    bucket again; otherwise rotating through throwaway keys would reset a
+    throttled key. While no bucket can be evicted, new keys share one overflow
+    bucket with the same rate and burst. Each bucket counts its allowed and
+    rejected requests.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        burst (int): Bucket capacity.
+        max_keys (int): Maximum number of buckets.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000,
+                 timer: Callable[[], float] = time.monotonic):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be greater than zero and burst at least 1")
+        if max_keys <= 0:
+            raise ValueError("max_keys must be greater than zero")
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._timer = timer
+        self._buckets: "OrderedDict[Hashable, _Bucket]" = OrderedDict()
+        self._overflow = _Bucket(burst, timer())
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+        self.overflowed = 0
+
+    def _tokens(self, bucket: _Bucket, now: float) -> float:
+        return min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+
+    def _bucket_for_new_key(self, key: Hashable, now: float) -> _Bucket:
+        if len(self._buckets) >= self.max_keys:
+            oldest_key, oldest = next(iter(self._buckets.items()))
+            if self._tokens(oldest, now) < self.burst:
+                self.overflowed += 1
+                return self._overflow
+            del self._buckets[oldest_key]
+            self.evictions += 1
+        bucket = self._buckets[key] = _Bucket(self.burst, now)
+        return bucket
+
+    def acquire(self, key: Hashable) -> float:
+        """
+        Take a token from a key's bucket.
+
+        Args:
+            key (Hashable): The rate-limited key.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the seconds until the
+            bucket holds a token again.
+        """
+        now = self._timer()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._bucket_for_new_key(key, now)
+            else:
+                self._buckets.move_to_end(key)
+            bucket.tokens = self._tokens(bucket, now)
+            bucket.updated_at = now
+
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                bucket.allowed += 1
+                self.allowed += 1
+                return 0.0
+            bucket.rejected += 1
+            self.rejected += 1
+            return (1 - bucket.tokens) / self.rate
+
+    def counters(self, key: Hashable) -> dict:
+        """
+        Get the counters of a key's bucket.
+
+        Args:
+            key (Hashable): The rate-limited key.
+
+        Returns:
+            dict: Allowed and rejected requests and the tokens left, or zeros
+            and a full bucket if the key has no bucket.
+        """
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return {"allowed": 0, "rejected": 0, "tokens": float(self.burst)}
+            tokens = self._tokens(bucket, self._timer())
+            return {"allowed": bucket.allowed, "rejected": bucket.rejected, "tokens": tokens}
+
+    def top_rejected(self, limit: int = 10) -> List[Tuple[Hashable, int]]:
+        """
+        Get the keys with the most rejected requests.
+
+        Args:
+            limit (int, optional): Maximum number of keys. Defaults to 10.
+
+        Returns:
+            List[Tuple[Hashable, int]]: Keys and their rejected requests, most first.
+        """
+        with self._lock:
+            rejected = [(key, bucket.rejected) for key, bucket in self._buckets.items() if bucket.rejected]
+        return heapq.nlargest(limit, rejected, key=lambda item: item[1])
+
+    def stats(self) -> dict:
+        """
+        Get the limiter counters.
+
+        Returns:
+            dict: Settings, number of buckets, allowed/rejected/eviction counters,
+            requests of new keys served by the overflow bucket and the keys with
+            the most rejected requests.
+        """
+        with self._lock:
+            counters = {
+                "keys": len(self._buckets),
+                "max_keys": self.max_keys,
+                "rate": self.rate,
+                "burst": self.burst,
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "evictions": self.evictions,
+                "overflowed": self.overflowed,
+            }
+        counters["top_rejected"] = [{"key": str(key), "rejected": count} for key, count in self.top_rejected()]
+        return counters
+
+
+def enforce_rate_limit(limiter: TokenBucketLimiter, key: Hashable):
+    """
+    Take a token for a request or reject it.
+
+    Args:
+        limiter (TokenBucketLimiter): The limiter to take the token from.
+        key (Hashable): The rate-limited key.
+
+    Raises:
+        HTTPException: If the key's bucket is empty (429, with Retry-After).
+    """
+    retry_after = limiter.acquire(key)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
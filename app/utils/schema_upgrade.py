@@ -0,0 +1,75 @@
+from typing import List
+
+from sqlalchemy import String, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from app.utils.database import Base
+
+
+def _column_spec(engine: Engine, column) -> str:
+    return str(CreateColumn(column).compile(dialect=engine.dialect))
+
+
+def _needs_widening(existing_type, column) -> bool:
+    """
+    Check whether a stored string column is shorter than the model's.
+
+    Args:
+        existing_type: The column type reported by the database.
+        column: The model column.
+
+    Returns:
+        bool: True if the model's column is a bounded String and the stored
+        column is unbounded (TEXT) or shorter.
+    """
+    if not isinstance(column.type, String) or column.type.length is None:
+        return False
+    length = getattr(existing_type, "length", None)
+    return length is None or length < column.type.length
+
+
+def upgrade_schema(engine: Engine) -> List[str]:
+    """
+    Bring an existing database up to the models' schema.
+
+    create_all only creates missing tables, so columns and indexes added to
+    existing tables need these steps. Every step checks the current schema
+    first, so the upgrade can run any number of times:
+
+    - Missing tables are created.
+    - Missing columns are added with their type, default and NOT NULL constraint.
+    - Bounded string columns stored as TEXT or with a shorter length are
+      widened (not on SQLite, which does not enforce lengths).
+    - Missing indexes are created. Unique indexes fail if existing rows
+      violate them; the error names the index.
+
+    Args:
+        engine (Engine): Engine of the database to upgrade.
+
+    Returns:
+        List[str]: The DDL statements that were run, empty if the schema was up to date.
+    """
+    Base.metadata.create_all(bind=engine)
+    statements = []
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            table_name = preparer.format_table(table)
+            existing = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    statements.append(f"ALTER TABLE {table_name} ADD COLUMN {_column_spec(engine, column)}")
+                elif engine.dialect.name != "sqlite" and _needs_widening(existing[column.name], column):
+                    statements.append(f"ALTER TABLE {table_name} MODIFY COLUMN {_column_spec(engine, column)}")
+
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    statements.append(str(CreateIndex(index).compile(dialect=engine.dialect)))
+
+        # Each table's columns come before its indexes, so indexes can cover new columns
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+    return statements
@@ -0,0 +1,298 @@
+import re
+import threading
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase alphanumeric tokens.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The tokens in order of appearance.
+    """
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def trigrams(token: str) -> frozenset:
+    """
+    Get the trigrams of a token.
+
+    The token is padded like PostgreSQL's pg_trgm (two spaces in front, one
+    behind), so short tokens and word starts get trigrams of their own.
+
+    Args:
+        token (str): A lowercase token.
+
+    Returns:
+        frozenset: The set of trigrams.
+    """
+    padded = f"  {token} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class SearchIndex:
+    """
+    In-memory inverted index with trigram fuzzy matching and relevance ranking.
+
+    Documents consist of weighted text fields. Each distinct token is stored once
+    in a vocabulary that is itself indexed by trigrams, so a query term is matched
+    against the vocabulary (not against every document) by trigram similarity
+    (Jaccard index of the trigram sets). Typos such as "indca" therefore still
+    match "indica". The postings of the matching tokens are merged into document
+    scores:
+
+        score(doc) = sum over query terms of max(similarity * field weight)
+
+    Both steps run on NumPy arrays: trigram and posting lists are materialised as
+    integer arrays on first use and cached until a write touches them, so a query
+    costs a few vectorised passes instead of a Python loop per document.
+
+    Documents carry an opaque payload that is returned with the results, so
+    callers can answer a search without going back to the database. The index is
+    guarded by a lock and can be updated while it is being searched.
+
+    Attributes:
+        weights (Dict[str, float]): Weight of each indexed field.
+        min_similarity (float): Minimum trigram similarity for a fuzzy token match.
+        max_expansions (int): Maximum number of vocabulary tokens a query term expands to.
+    """
+
+    _STATE = (
+        "_doc_slots", "_slot_docs", "_slot_payloads", "_slot_tokens", "_free_slots",
+        "_token_ids", "_tokens", "_token_sizes", "_free_token_ids", "_postings",
+        "_trigram_tokens", "_posting_arrays", "_trigram_arrays",
+    )
+
+    def __init__(self, weights: Dict[str, float], min_similarity: float = 0.3,
+                 max_expansions: int = 32):
+        self.weights = dict(weights)
+        self.min_similarity = min_similarity
+        self.max_expansions = max_expansions
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Documents live in dense slots so scores can be accumulated in arrays
+        self._doc_slots: Dict[Hashable, int] = {}
+        self._slot_docs: List[Optional[Hashable]] = []
+        self._slot_payloads: List[Any] = []
+        self._slot_tokens: List[frozenset] = []
+        self._free_slots: List[int] = []
+        # Vocabulary: token -> token id, and token id -> token / number of trigrams
+        self._token_ids: Dict[str, int] = {}
+        self._tokens: List[Optional[str]] = []
+        self._token_sizes = np.zeros(0, dtype=np.float32)
+        self._free_token_ids: List[int] = []
+        # token -> {slot: best field weight of the token in that document}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        # trigram -> ids of the tokens containing it
+        self._trigram_tokens: Dict[str, set] = {}
+        # Lazily built arrays, dropped when the underlying set changes
+        self._posting_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._trigram_arrays: Dict[str, np.ndarray] = {}
+
+    def _new_token(self, token: str):
+        if self._free_token_ids:
+            token_id = self._free_token_ids.pop()
+            self._tokens[token_id] = token
+        else:
+            token_id = len(self._tokens)
+            self._tokens.append(token)
+            if token_id >= len(self._token_sizes):
+                sizes = np.zeros(max(64, 2 * len(self._token_sizes)), dtype=np.float32)
+                sizes[:len(self._token_sizes)] = self._token_sizes
+                self._token_sizes = sizes
+        self._token_ids[token] = token_id
+        grams = trigrams(token)
+        self._token_sizes[token_id] = len(grams)
+        for gram in grams:
+            self._trigram_tokens.setdefault(gram, set()).add(token_id)
+            self._trigram_arrays.pop(gram, None)
+
+    def _drop_token(self, token: str):
+        token_id = self._token_ids.pop(token)
+        self._tokens[token_id] = None
+        self._free_token_ids.append(token_id)
+        for gram in trigrams(token):
+            token_ids = self._trigram_tokens[gram]
+            token_ids.discard(token_id)
+            if not token_ids:
+                del self._trigram_tokens[gram]
+            self._trigram_arrays.pop(gram, None)
+
+    def _add(self, doc_id: Hashable, fields: Dict[str, Optional[str]], payload: Any):
+        weights: Dict[str, float] = {}
+        for field, text in fields.items():
+            weight = self.weights.get(field)
+            if weight is None or not text:
+                continue
+            for token in tokenize(text):
+                if weights.get(token, 0.0) < weight:
+                    weights[token] = weight
+
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._slot_docs[slot] = doc_id
+            self._slot_payloads[slot] = payload
+            self._slot_tokens[slot] = frozenset(weights)
+        else:
+            slot = len(self._slot_docs)
+            self._slot_docs.append(doc_id)
+            self._slot_payloads.append(payload)
+            self._slot_tokens.append(frozenset(weights))
+        self._doc_slots[doc_id] = slot
+
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._new_token(token)
+            postings[slot] = weight
+            self._posting_arrays.pop(token, None)
+
+    def _remove(self, doc_id: Hashable):
+        slot = self._doc_slots.pop(doc_id, None)
+        if slot is None:
+            return
+        for token in self._slot_tokens[slot]:
+            postings = self._postings[token]
+            del postings[slot]
+            self._posting_arrays.pop(token, None)
+            if not postings:
+                del self._postings[token]
+                self._drop_token(token)
+        self._slot_docs[slot] = None
+        self._slot_payloads[slot] = None
+        self._slot_tokens[slot] = frozenset()
+        self._free_slots.append(slot)
+
+    def add(self, doc_id: Hashable, fields: Dict[str, Optional[str]], payload: Any = None):
+        """
+        Add a document, replacing any document with the same ID.
+
+        Args:
+            doc_id (Hashable): Unique document ID.
+            fields (Dict[str, Optional[str]]): Field name to text. Fields without a weight are ignored.
+            payload (Any, optional): Value returned for this document by search. Defaults to None.
+        """
+        with self._lock:
+            self._remove(doc_id)
+            self._add(doc_id, fields, payload)
+
+    def remove(self, doc_id: Hashable):
+        """
+        Remove a document if it is indexed.
+
+        Args:
+            doc_id (Hashable): The document ID.
+        """
+        with self._lock:
+            self._remove(doc_id)
+
+    def rebuild(self, documents: Iterable[Tuple[Hashable, Dict[str, Optional[str]], Any]]):
+        """
+        Replace the whole index with the given documents.
+
+        The new index is built without holding the lock and swapped in at once,
+        so searches keep running against the old index in the meantime.
+
+        Args:
+            documents (Iterable[Tuple[Hashable, Dict[str, Optional[str]], Any]]):
+                (doc_id, fields, payload) tuples.
+        """
+        fresh = SearchIndex(self.weights, self.min_similarity, self.max_expansions)
+        for doc_id, fields, payload in documents:
+            fresh._remove(doc_id)
+            fresh._add(doc_id, fields, payload)
+        with self._lock:
+            for name in self._STATE:
+                setattr(self, name, getattr(fresh, name))
+
+    def _trigram_array(self, gram: str) -> np.ndarray:
+        array = self._trigram_arrays.get(gram)
+        if array is None:
+            array = np.fromiter(self._trigram_tokens[gram], dtype=np.int64)
+            self._trigram_arrays[gram] = array
+        return array
+
+    def _posting_array(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._posting_arrays.get(token)
+        if arrays is None:
+            postings = self._postings[token]
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float32, count=len(postings)),
+            )
+            self._posting_arrays[token] = arrays
+        return arrays
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """
+        Find the vocabulary tokens similar to a query term.
+
+        Args:
+            term (str): A lowercase query term.
+
+        Returns:
+            List[Tuple[str, float]]: (token, similarity) pairs.
+        """
+        grams = [gram for gram in trigrams(term) if gram in self._trigram_tokens]
+        if not grams:
+            return []
+        token_ids = np.concatenate([self._trigram_array(gram) for gram in grams])
+        shared = np.bincount(token_ids, minlength=len(self._tokens)).astype(np.float32)
+        candidates = np.flatnonzero(shared)
+        shared = shared[candidates]
+        similarity = shared / (len(trigrams(term)) + self._token_sizes[candidates] - shared)
+
+        keep = similarity >= self.min_similarity
+        candidates, similarity = candidates[keep], similarity[keep]
+        if len(candidates) > self.max_expansions:
+            best = np.argpartition(-similarity, self.max_expansions - 1)[:self.max_expansions]
+            candidates, similarity = candidates[best], similarity[best]
+        return [(self._tokens[token_id], float(sim))
+                for token_id, sim in zip(candidates.tolist(), similarity.tolist())]
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[float, Any]]:
+        """
+        Search the index.
+
+        Args:
+            query (str): The search query.
+            limit (int, optional): Maximum number of results. Defaults to 20.
+
+        Returns:
+            List[Tuple[float, Any]]: (score, payload) pairs, most relevant first.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or limit <= 0:
+            return []
+
+        with self._lock:
+            scores = np.zeros(len(self._slot_docs), dtype=np.float32)
+            for term in terms:
+                term_scores = np.zeros_like(scores)
+                for token, similarity in self._expand(term):
+                    slots, weights = self._posting_array(token)
+                    term_scores[slots] = np.maximum(term_scores[slots], similarity * weights)
+                scores += term_scores
+
+            slots = np.flatnonzero(scores)
+            if len(slots) > limit:
+                slots = slots[np.argpartition(-scores[slots], limit - 1)[:limit]]
+            results = [(float(scores[slot]), self._slot_docs[slot], self._slot_payloads[slot])
+                       for slot in slots.tolist()]
+
+        results.sort(key=lambda result: (-result[0], result[1]))
+        return [(score, payload) for score, _, payload in results]
+
+    def __len__(self) -> int:
+        return len(self._doc_slots)
@@ -0,0 +1,178 @@
+import threading
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SimilarityIndex:
+    """
+    In-memory nearest-neighbour index over numeric and categorical features.
+
+    Every document is a point in a feature space made of its numeric features,
+    standardised to zero mean and unit variance over the whole index, and a
+    one-hot encoding of its category. Distances are Euclidean in that space.
+    Two different one-hot vectors are always sqrt(2) apart, so the category term
+    is added as a constant instead of materialising the one-hot columns.
+
+    Raw features live in dense column-major NumPy arrays with one slot per
+    document. Writes only touch their slot and drop the cached standardised
+    columns, which are recomputed on the next query, so a query is a handful of
+    vectorised passes over contiguous columns and top-k selection uses
+    argpartition instead of a full sort.
+
+    The index is guarded by a lock and can be updated while it is being queried.
+
+    Attributes:
+        numeric_fields (Tuple[str, ...]): Names of the numeric features.
+        category_field (str): Name of the categorical feature.
+    """
+
+    _STATE = (
+        "_doc_slots", "_slot_docs", "_slot_payloads", "_free_slots",
+        "_values", "_categories", "_active", "_category_codes", "_scaled",
+    )
+
+    def __init__(self, numeric_fields: Sequence[str], category_field: str):
+        self.numeric_fields = tuple(numeric_fields)
+        self.category_field = category_field
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._doc_slots: Dict[Hashable, int] = {}
+        self._slot_docs: List[Optional[Hashable]] = []
+        self._slot_payloads: List[Any] = []
+        self._free_slots: List[int] = []
+        # Raw numeric features (one row per field), category codes and a mask of occupied slots
+        self._values = np.zeros((len(self.numeric_fields), 0), dtype=np.float64)
+        self._categories = np.zeros(0, dtype=np.int32)
+        self._active = np.zeros(0, dtype=bool)
+        self._category_codes: Dict[str, int] = {}
+        # Standardised copy of _values, None when a write changed it
+        self._scaled: Optional[np.ndarray] = None
+
+    def _grow(self):
+        capacity = max(64, 2 * len(self._active))
+        values = np.zeros((len(self.numeric_fields), capacity), dtype=np.float64)
+        values[:, :self._values.shape[1]] = self._values
+        categories = np.zeros(capacity, dtype=np.int32)
+        categories[:len(self._categories)] = self._categories
+        active = np.zeros(capacity, dtype=bool)
+        active[:len(self._active)] = self._active
+        self._values, self._categories, self._active = values, categories, active
+
+    def _add(self, doc_id: Hashable, features: Dict[str, Any], payload: Any):
+        slot = self._doc_slots.get(doc_id)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                slot = len(self._slot_docs)
+                self._slot_docs.append(None)
+                self._slot_payloads.append(None)
+                if slot >= len(self._active):
+                    self._grow()
+            self._doc_slots[doc_id] = slot
+
+        category = str(features.get(self.category_field) or "").strip().lower()
+        code = self._category_codes.setdefault(category, len(self._category_codes))
+        self._slot_docs[slot] = doc_id
+        self._slot_payloads[slot] = payload
+        self._values[:, slot] = [float(features[field]) for field in self.numeric_fields]
+        self._categories[slot] = code
+        self._active[slot] = True
+        self._scaled = None
+
+    def _remove(self, doc_id: Hashable):
+        slot = self._doc_slots.pop(doc_id, None)
+        if slot is None:
+            return
+        self._slot_docs[slot] = None
+        self._slot_payloads[slot] = None
+        self._active[slot] = False
+        self._free_slots.append(slot)
+        self._scaled = None
+
+    def add(self, doc_id: Hashable, features: Dict[str, Any], payload: Any = None):
+        """
+        Add a document, replacing any document with the same ID.
+
+        Args:
+            doc_id (Hashable): Unique document ID.
+            features (Dict[str, Any]): Values of the numeric fields and the category field.
+            payload (Any, optional): Value returned for this document by nearest. Defaults to None.
+        """
+        with self._lock:
+            self._add(doc_id, features, payload)
+
+    def remove(self, doc_id: Hashable):
+        """
+        Remove a document if it is indexed.
+
+        Args:
+            doc_id (Hashable): The document ID.
+        """
+        with self._lock:
+            self._remove(doc_id)
+
+    def rebuild(self, documents: Iterable[Tuple[Hashable, Dict[str, Any], Any]]):
+        """
+        Replace the whole index with the given documents.
+
+        The new index is built without holding the lock and swapped in at once.
+
+        Args:
+            documents (Iterable[Tuple[Hashable, Dict[str, Any], Any]]):
+                (doc_id, features, payload) tuples.
+        """
+        fresh = SimilarityIndex(self.numeric_fields, self.category_field)
+        for doc_id, features, payload in documents:
+            fresh._add(doc_id, features, payload)
+        with self._lock:
+            for name in self._STATE:
+                setattr(self, name, getattr(fresh, name))
+
+    def _standardised(self) -> np.ndarray:
+        # Distances only depend on differences, so standardising needs no mean
+        if self._scaled is None:
+            size = len(self._slot_docs)
+            std = self._values[:, :size][:, self._active[:size]].std(axis=1)
+            # Constant features carry no information; avoid dividing by zero
+            std[std == 0] = 1.0
+            self._scaled = self._values[:, :size] / std[:, None]
+        return self._scaled
+
+    def nearest(self, doc_id: Hashable, k: int = 10) -> Optional[List[Tuple[float, Any]]]:
+        """
+        Find the documents closest to a document.
+
+        Args:
+            doc_id (Hashable): ID of the reference document, which is not returned.
+            k (int, optional): Maximum number of results. Defaults to 10.
+
+        Returns:
+            Optional[List[Tuple[float, Any]]]: (distance, payload) pairs, closest
+            first, or None if the document is not indexed.
+        """
+        with self._lock:
+            slot = self._doc_slots.get(doc_id)
+            if slot is None:
+                return None
+            k = min(k, len(self._doc_slots) - 1)
+            if k <= 0:
+                return []
+
+            size = len(self._slot_docs)
+            squared = 2.0 * (self._categories[:size] != self._categories[slot])
+            for column in self._standardised():
+                difference = column - column[slot]
+                squared += difference * difference
+            squared[~self._active[:size]] = np.inf
+            squared[slot] = np.inf
+
+            best = np.argpartition(squared, k - 1)[:k]
+            best = best[np.lexsort((best, squared[best]))]
+            return [(float(np.sqrt(squared[i])), self._slot_payloads[i]) for i in best.tolist()]
+
+    def __len__(self) -> int:
+        return len(self._doc_slots)
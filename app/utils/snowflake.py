@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+# Custom epoch (2024-01-01 UTC) in milliseconds; 41 timestamp bits last until 2093
+SNOWFLAKE_EPOCH_MS = 1704067200000
+
+WORKER_ID_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_ID_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Fixed worker ID (0-1023) of this process. Only for deployments that run a
+# single API process per ID; without it, every process leases a worker ID from
+# the database at startup (see app.crud.worker_lease).
+WORKER_ID = os.getenv("WORKER_ID")
+
+
+class SnowflakeGenerator:
+    """
+    Thread-safe generator of unique, time-ordered 63-bit IDs.
+
+    An ID is composed of a millisecond timestamp (41 bits), a worker ID
+    (10 bits) and a per-millisecond sequence (12 bits), so IDs need no database
+    round trip, sort by creation time, and generators with different worker IDs
+    never produce the same ID. A worker produces up to 4096 IDs per millisecond;
+    beyond that, and when the system clock goes backwards, the generator keeps
+    counting on its last timestamp instead of waiting, so IDs stay increasing.
+
+    The generator refuses to produce IDs until a worker ID is assigned, and
+    after its lease ran out, so two processes never share a worker ID. A forked
+    child drops the worker ID it inherited and needs its own.
+
+    Attributes:
+        worker_id (Optional[int]): Worker ID of the current process, None if unassigned.
+    """
+
+    def __init__(self, worker_id: Optional[int] = None, epoch_ms: int = SNOWFLAKE_EPOCH_MS,
+                 clock: Callable[[], int] = time.time_ns):
+        self._epoch_ms = epoch_ms
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.worker_id: Optional[int] = None
+        self._valid_until: Optional[float] = None
+        self._last_ms = -1
+        self._sequence = 0
+        if worker_id is not None:
+            self.assign(worker_id)
+
+    def assign(self, worker_id: int, valid_until: Optional[float] = None):
+        """
+        Use a worker ID in this process.
+
+        Args:
+            worker_id (int): The worker ID (0-1023).
+            valid_until (Optional[float], optional): time.monotonic() value at
+                which the worker ID's lease runs out. Defaults to None (no expiry).
+
+        Raises:
+            ValueError: If the worker ID is out of range.
+        """
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        with self._lock:
+            self._pid = os.getpid()
+            self.worker_id = worker_id
+            self._valid_until = valid_until
+
+    def release(self):
+        """
+        Stop using the worker ID, e.g. when its lease was lost.
+        """
+        with self._lock:
+            self.worker_id = None
+            self._valid_until = None
+
+    def next_id(self) -> int:
+        """
+        Generate the next ID.
+
+        Returns:
+            int: A unique, positive ID greater than all IDs generated before in this process.
+
+        Raises:
+            RuntimeError: If no worker ID is assigned or its lease ran out.
+        """
+        with self._lock:
+            if os.getpid() != self._pid:
+                # The parent process keeps using the inherited worker ID
+                self._pid = os.getpid()
+                self.worker_id = None
+                self._valid_until = None
+                self._last_ms = -1
+                self._sequence = 0
+            if self.worker_id is None:
+                raise RuntimeError("No worker ID is assigned to this process")
+            if self._valid_until is not None and time.monotonic() >= self._valid_until:
+                raise RuntimeError(f"The lease of worker ID {self.worker_id} ran out")
+            now_ms = self._clock() // 1_000_000 - self._epoch_ms
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                # Sequence exhausted or clock moved backwards: borrow the next millisecond
+                self._last_ms += 1
+                self._sequence = 0
+            return (
+                (self._last_ms << (WORKER_ID_BITS + SEQUENCE_BITS))
+                | (self.worker_id << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+
+order_number_generator = SnowflakeGenerator(int(WORKER_ID) if WORKER_ID else None)
+
+
+def new_order_nr() -> str:
+    """
+    Allocate a new order number.
+
+    Returns:
+        str: The next snowflake ID, zero-padded to 19 digits so that order
+        numbers sort by creation time as strings.
+
+    Raises:
+        RuntimeError: If this process has no worker ID.
+    """
+    return f"{order_number_generator.next_id():019d}"
@@ -0,0 +1,248 @@
+import codecs
+import csv
+import io
+import json
+import os
+from enum import Enum
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.utils.database import SessionLocal
+
+# Rows fetched per round trip from the server-side cursor of an export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Approximate size of the chunks an export is written in
+EXPORT_CHUNK_BYTES = 64 * 1024
+# Maximum length of a line (NDJSON) or record (CSV) of an import; longer ones
+# are skipped and reported, so an import never buffers more than this
+MAX_IMPORT_LINE_BYTES = int(os.getenv("MAX_IMPORT_LINE_BYTES", "65536"))
+
+
+class StreamFormat(str, Enum):
+    """
+    Line-based formats supported for streaming imports and exports.
+    """
+    ndjson = "ndjson"
+    csv = "csv"
+
+    @property
+    def media_type(self) -> str:
+        return "application/x-ndjson" if self is StreamFormat.ndjson else "text/csv"
+
+
+# (line number, parsed record or None, error message or None)
+ParsedRecord = Tuple[int, Optional[dict], Optional[str]]
+
+
+def _decode_line(data: bytes, first: bool) -> str:
+    if first and data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+    if data.endswith(b"\r"):
+        data = data[:-1]
+    return data.decode("utf-8")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes],
+                     max_line_bytes: Optional[int] = None) -> AsyncIterator[Optional[str]]:
+    """
+    Decode a stream of UTF-8 byte chunks into lines.
+
+    Only the current line is buffered, as a list of chunk pieces, and a line
+    longer than max_line_bytes is dropped while the stream is skipped to its
+    end, so memory use is bounded by the line limit whatever the size of the
+    stream or its lines. A leading byte order mark is dropped and both \\n and
+    \\r\\n line endings are accepted.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The byte stream, e.g. Request.stream().
+        max_line_bytes (Optional[int], optional): Maximum length of a line in
+            bytes. Defaults to None (MAX_IMPORT_LINE_BYTES).
+
+    Yields:
+        Optional[str]: The lines without line terminator, None for a line that
+        was longer than max_line_bytes.
+    """
+    if max_line_bytes is None:
+        max_line_bytes = MAX_IMPORT_LINE_BYTES
+    parts: List[bytes] = []
+    size = 0
+    first = True
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            piece = chunk[start:] if end < 0 else chunk[start:end]
+            size += len(piece)
+            if size <= max_line_bytes:
+                parts.append(piece)
+            else:
+                parts = []
+            if end < 0:
+                break
+            # No UTF-8 sequence contains a newline byte, so every line decodes on its own
+            yield _decode_line(b"".join(parts), first) if size <= max_line_bytes else None
+            parts, size, first = [], 0, False
+            start = end + 1
+    if size:
+        yield _decode_line(b"".join(parts), first) if size <= max_line_bytes else None
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRecord]:
+    """
+    Parse a stream of newline-delimited JSON objects.
+
+    Blank lines are skipped. Lines that are not a JSON object or are longer
+    than MAX_IMPORT_LINE_BYTES are reported as errors instead of aborting the
+    stream.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The byte stream.
+
+    Yields:
+        ParsedRecord: (line number, record, error) for every non-blank line.
+    """
+    line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if line is None:
+            yield line_number, None, f"Line longer than {MAX_IMPORT_LINE_BYTES} bytes"
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield line_number, None, f"Invalid JSON: {error}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
+
+
+async def iter_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRecord]:
+    """
+    Parse a stream of CSV records with a header row.
+
+    Quoted fields may span several lines. Empty fields are returned as None so
+    optional columns can be left blank. A record longer than
+    MAX_IMPORT_LINE_BYTES is reported as an error; its lines are only scanned
+    for quotes to find where it ends. After a single line longer than the
+    limit, parsing resumes with the next line.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The byte stream.
+
+    Yields:
+        ParsedRecord: (line number, record, error) for every data record, where
+        the line number is the line the record starts on.
+    """
+    header = None
+    pending: Optional[List[str]] = None
+    pending_bytes = quotes = 0
+    start_line = line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if pending is None:
+            pending, pending_bytes, quotes, start_line = [], 0, 0, line_number
+        if line is None:
+            # The quotes of a skipped line are unknown, so the record ends with it
+            yield start_line, None, f"Record longer than {MAX_IMPORT_LINE_BYTES} bytes"
+            pending = None
+            continue
+        pending_bytes += len(line.encode()) + 1
+        quotes += line.count('"')
+        if pending_bytes <= MAX_IMPORT_LINE_BYTES:
+            pending.append(line)
+        if quotes % 2:
+            # Inside a quoted field that continues on the next line
+            continue
+        if pending_bytes > MAX_IMPORT_LINE_BYTES:
+            yield start_line, None, f"Record longer than {MAX_IMPORT_LINE_BYTES} bytes"
+            pending = None
+            continue
+
+        text, pending = "\n".join(pending), None
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start_line, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start_line, {name: value if value != "" else None
+                           for name, value in zip(header, values)}, None
+
+    if pending is not None:
+        yield start_line, None, "Unterminated quoted field"
+
+
+def encode_rows(rows: Iterable[dict], columns: List[str], format: StreamFormat) -> Iterator[bytes]:
+    """
+    Serialize rows as NDJSON or CSV.
+
+    Lines are collected into chunks of about EXPORT_CHUNK_BYTES, so a large
+    export is sent in few writes without holding more than one chunk in memory.
+
+    Args:
+        rows (Iterable[dict]): The rows, keyed by column name.
+        columns (List[str]): The columns to write, in order. CSV gets them as header row.
+        format (StreamFormat): The output format.
+
+    Yields:
+        bytes: UTF-8 encoded chunks of complete lines.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+    if format == StreamFormat.csv:
+        writer.writerow(columns)
+
+    for row in rows:
+        if format == StreamFormat.csv:
+            writer.writerow([row[column] for column in columns])
+        else:
+            buffer.write(encoder.encode({column: row[column] for column in columns}))
+            buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_response(rows: Callable[[Session], Iterable[dict]], columns: List[str],
+                    format: StreamFormat, filename: str) -> StreamingResponse:
+    """
+    Build a streaming download of rows read from the database.
+
+    The rows are read while the response is being sent, so the export runs in
+    its own session that stays open until the last chunk is written; the
+    request's session is already closed by then.
+
+    Args:
+        rows (Callable[[Session], Iterable[dict]]): Function that reads the rows from a session.
+        columns (List[str]): The columns to write, in order.
+        format (StreamFormat): The output format.
+        filename (str): File name without extension offered to the client.
+
+    Returns:
+        StreamingResponse: The download.
+    """
+    def body():
+        db = SessionLocal()
+        try:
+            yield from encode_rows(rows(db), columns, format)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        body(),
+        media_type=format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format.value}"'},
+    )
@@ -0,0 +1,82 @@
+import threading
+from typing import Dict, Iterable, Tuple
+
+
+class TokenVersionTable:
+    """
+    In-memory table of the current token version of each customer.
+
+    Access tokens carry the token version of their customer at login. Bumping a
+    customer's version in the database revokes all tokens issued before, and
+    a token is only accepted while its version is not older than the version in
+    this table. The table is compact: customers whose tokens were never revoked
+    (version 0) are not stored.
+
+    The table is refreshed from the database in the background and bumped
+    directly by changes made in this process. Versions only grow, so a refresh
+    keeps the higher of the loaded and the known version; a refresh that read
+    the database before a local bump cannot bring a revoked token back.
+    """
+
+    def __init__(self):
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    def is_current(self, c_id: int, version: int) -> bool:
+        """
+        Check whether a token version is still valid.
+
+        Args:
+            c_id (int): ID of the customer the token was issued to.
+            version (int): Token version from the token.
+
+        Returns:
+            bool: True if no newer version is known for the customer.
+        """
+        # A single dict lookup, no lock needed
+        return version >= self._versions.get(c_id, 0)
+
+    def set(self, c_id: int, version: int):
+        """
+        Record a customer's new token version.
+
+        Args:
+            c_id (int): ID of the customer.
+            version (int): The current token version.
+        """
+        with self._lock:
+            if version > self._versions.get(c_id, 0):
+                self._versions[c_id] = version
+
+    def refresh(self, versions: Iterable[Tuple[int, int]]):
+        """
+        Merge the token versions loaded from the database.
+
+        Args:
+            versions (Iterable[Tuple[int, int]]): Pairs of customer ID and token
+                version, for customers with a version above 0.
+        """
+        loaded = dict(versions)
+        with self._lock:
+            for c_id, version in self._versions.items():
+                if version > loaded.get(c_id, 0):
+                    loaded[c_id] = version
+            self._versions = loaded
+            self.refreshes += 1
+
+    def clear(self):
+        """
+        Forget all token versions until the next refresh.
+        """
+        with self._lock:
+            self._versions = {}
+
+    def stats(self) -> dict:
+        """
+        Get the table counters.
+
+        Returns:
+            dict: Number of customers with revoked tokens and number of refreshes.
+        """
+        return {"size": len(self._versions), "refreshes": self.refreshes}
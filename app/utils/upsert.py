@@ -0,0 +1,53 @@
+from typing import Sequence
+
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def upsert_add(db: Session, model, rows: Sequence[dict], keys: Sequence[str],
+               add: Sequence[str], latest: Sequence[str] = ()):
+    """
+    Insert rows or add their values to existing rows with the same key.
+
+    All rows are written with one multi-row INSERT ... ON DUPLICATE KEY UPDATE
+    (MySQL, MariaDB) or INSERT ... ON CONFLICT DO UPDATE (SQLite, PostgreSQL)
+    statement inside the caller's transaction; nothing is committed here. The
+    database adds the values to the stored ones, so concurrent writers never
+    lose each other's increments. Rows are sorted by key, so concurrent
+    statements lock existing rows in the same order.
+
+    Args:
+        db (Session): Database session.
+        model: Mapped class whose primary key or a unique index is made of keys.
+        rows (Sequence[dict]): Column values of the rows, at most one per key.
+        keys (Sequence[str]): Columns identifying a row.
+        add (Sequence[str]): Columns whose values are added to the stored values.
+        latest (Sequence[str], optional): Columns overwritten with the new value
+            unless it is None. Defaults to ().
+
+    Raises:
+        NotImplementedError: If the database has no upsert statement.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    rows = sorted(rows, key=lambda row: tuple(row[key] for key in keys))
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(table).values(rows)
+        new = statement.inserted
+    elif dialect in ("sqlite", "postgresql"):
+        statement = (sqlite if dialect == "sqlite" else postgresql).insert(table).values(rows)
+        new = statement.excluded
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+
+    values = {column: table.c[column] + new[column] for column in add}
+    values.update({column: func.coalesce(new[column], table.c[column]) for column in latest})
+    if dialect in ("mysql", "mariadb"):
+        statement = statement.on_duplicate_key_update(values)
+    else:
+        statement = statement.on_conflict_do_update(index_elements=list(keys), set_=values)
+    db.execute(statement)
@@ -0,0 +1,130 @@
+import asyncio
+from typing import Any, Callable, List, Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+
+# Marks the end of the queue when it is stopped
+_STOP = object()
+
+
+class GroupCommitQueue:
+    """
+    In-process write-behind queue that writes submitted items in batches.
+
+    Callers submit items and wait for their result, while one background task
+    collects the queued items and passes them to a blocking write function in
+    the threadpool. A batch is written as soon as it holds max_batch_size items
+    or max_delay seconds after its first item arrived, whichever comes first.
+    Items submitted while a batch is written wait for the next batch, so under
+    load batches grow on their own and a single commit acknowledges many items.
+
+    The write function receives a list of items and returns one result per item
+    in the same order. A returned exception is raised to that item's caller
+    only; if the write function itself raises, every caller of the batch gets
+    the error. A caller is only answered after the write function returned, so
+    an acknowledged item is as durable as the write function makes it.
+
+    Attributes:
+        max_batch_size (int): Maximum number of items per write.
+        max_delay (float): Maximum seconds the first item of a batch waits for more items.
+    """
+
+    def __init__(self, write: Callable[[List[Any]], Sequence[Any]], max_batch_size: int = 100,
+                 max_delay: float = 0.005):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._write = write
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """
+        bool: Whether the queue accepts items.
+        """
+        return self._task is not None
+
+    def start(self):
+        """
+        Start the background writer on the running event loop.
+        """
+        if self._task is not None:
+            raise RuntimeError("Queue is already running")
+        self._queue = asyncio.Queue()
+        self._batch_ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop accepting items, write all queued items and stop the background writer.
+        """
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        self._queue.put_nowait(_STOP)
+        self._batch_ready.set()
+        await task
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item and wait until it has been written.
+
+        Args:
+            item (Any): The item to write.
+
+        Returns:
+            Any: The result of the write function for this item.
+
+        Raises:
+            RuntimeError: If the queue is not running.
+            Exception: The error returned or raised by the write function for this item.
+        """
+        if self._task is None:
+            raise RuntimeError("Queue is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        if self._queue.qsize() >= self.max_batch_size:
+            self._batch_ready.set()
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if batch[0] is not _STOP and self._queue.qsize() + 1 < self.max_batch_size:
+                # Give concurrent callers a moment to join this batch
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            stopped = _STOP in batch
+            if stopped:
+                # Items queued before stop() are still written
+                batch.remove(_STOP)
+                while not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+            for start in range(0, len(batch), self.max_batch_size):
+                await self._write_batch(batch[start:start + self.max_batch_size])
+            if stopped:
+                return
+
+    async def _write_batch(self, batch: List[tuple]):
+        items = [item for item, future in batch]
+        try:
+            results = await run_in_threadpool(self._write, items)
+        except Exception as error:
+            results = [error] * len(batch)
+        for (item, future), result in zip(batch, results):
+            if future.done():
+                # The caller went away; the item was written anyway
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
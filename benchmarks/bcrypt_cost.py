@@ -0,0 +1,48 @@
+"""
+Benchmark of the bcrypt cost factor, the CPU cost of a login per cost.
+
+Hashes a password at each cost in a range and reports the time per hash and
+the hashes per second one core sustains, which is the login throughput per
+password pool worker. Each round doubles the time, so the table shows what
+BCRYPT_TARGET_MS buys on this machine and which cost the startup calibration
+picks for it.
+
+Usage:
+    python -m benchmarks.bcrypt_cost --min-rounds 10 --max-rounds 14
+"""
+import argparse
+
+from app.utils.password import BCRYPT_TARGET_MS, calibrate_bcrypt_rounds, hash_time
+
+
+def run(min_rounds: int, max_rounds: int, samples: int) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        min_rounds (int): Lowest cost to measure.
+        max_rounds (int): Highest cost to measure.
+        samples (int): Hashes per cost; the fastest counts.
+
+    Returns:
+        dict: Seconds per hash by cost.
+    """
+    return {rounds: hash_time(rounds, samples) for rounds in range(min_rounds, max_rounds + 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--min-rounds", type=int, default=10, help="lowest cost")
+    parser.add_argument("--max-rounds", type=int, default=14, help="highest cost")
+    parser.add_argument("--samples", type=int, default=3, help="hashes per cost")
+    parser.add_argument("--target-ms", type=float, default=BCRYPT_TARGET_MS or 250, help="calibration target")
+    args = parser.parse_args()
+
+    for rounds, seconds in run(args.min_rounds, args.max_rounds, args.samples).items():
+        print(f"rounds {rounds:>2}: {seconds * 1000:8.1f} ms/hash {1 / seconds:8.2f} hashes/s per core")
+    calibrated = calibrate_bcrypt_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    print(f"calibrated cost for {args.target_ms:.0f} ms: {calibrated}")
+
+
+if __name__ == "__main__":
+    main()
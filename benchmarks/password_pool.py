@@ -0,0 +1,71 @@
+"""
+Throughput benchmark for password verification, the CPU cost of a login.
+
+Verifies one bcrypt hash many times concurrently, first in the request
+threadpool and then in the password process pool with 1, 2, 4, ... workers up
+to the number of cores, and reports logins per second for each. In the
+threadpool, throughput stays flat because bcrypt contends for one process;
+with the process pool it grows with the number of workers until the cores are
+saturated.
+
+Usage:
+    python -m benchmarks.password_pool --logins 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.utils.password import PasswordHasherPool, password_hash, verify_password
+
+
+async def _verify_all(pool: PasswordHasherPool, hashed: str, logins: int) -> float:
+    # Start the worker processes before timing
+    warmup = max(pool.workers, 1)
+    await asyncio.gather(*(pool.run(verify_password, "password", hashed) for _ in range(warmup)))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(pool.run(verify_password, "password", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    return elapsed
+
+
+def run(logins: int, max_workers: int) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        logins (int): Number of password verifications per configuration.
+        max_workers (int): Largest pool size to measure.
+
+    Returns:
+        dict: Logins per second by number of worker processes, 0 for the threadpool.
+    """
+    hashed = password_hash("password")
+    sizes = [0] + sorted({min(2 ** i, max_workers) for i in range(max_workers.bit_length() + 1)})
+    throughput = {}
+    for workers in sizes:
+        pool = PasswordHasherPool(workers=workers, max_queue=logins)
+        try:
+            elapsed = asyncio.run(_verify_all(pool, hashed, logins))
+        finally:
+            pool.shutdown()
+        throughput[workers] = logins / elapsed
+    return throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200, help="verifications per configuration")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="largest pool size")
+    args = parser.parse_args()
+
+    throughput = run(args.logins, args.max_workers)
+    baseline = throughput[0]
+    for workers, rate in throughput.items():
+        label = "threadpool" if workers == 0 else f"{workers} process{'es' if workers > 1 else ''}"
+        print(f"{label:>14}: {rate:8.1f} logins/s ({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
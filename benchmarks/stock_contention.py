@@ -0,0 +1,117 @@
+"""
+Contention benchmark for checkouts of a single hot product.
+
+Many threads check out the same product through crud.create_checkout against
+the configured database, as during a flash sale. The benchmark reports the
+throughput and verifies that the product was sold exactly as often as it was in
+stock: no oversell, no lost decrements and no deadlocks.
+
+Usage:
+    python -m benchmarks.stock_contention --stock 1000 --checkouts 3000 --threads 15
+
+The database must be reachable with the DB_* environment variables. The engine
+pool opens at most 15 connections, so further threads queue for a connection.
+The benchmark creates its own customer and product and deletes them afterwards.
+
+Only a MySQL run (e.g. the docker-compose database) shows the behaviour under
+InnoDB row locks. The benchmark has not been run against MySQL yet, so there
+are no MySQL figures. On SQLite, writers take the whole database in turn, so
+checkouts never contend for a row lock: a passing SQLite run only checks the
+stock arithmetic and says nothing about lost updates or deadlocks under
+contention, and its throughput is not comparable.
+"""
+import argparse
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app import models  # noqa: F401
+from app.crud import order as order_crud
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.product import Product
+from app.schemas import order as order_schemas
+from app.utils.database import Base, SessionLocal, engine
+
+
+def run(stock: int, checkouts: int, threads: int) -> dict:
+    """
+    Run the benchmark.
+
+    Args:
+        stock (int): Units of the hot product in stock.
+        checkouts (int): Number of checkouts of one unit each.
+        threads (int): Number of concurrent clients.
+
+    Returns:
+        dict: Outcome counts, elapsed seconds and the final stock.
+    """
+    Base.metadata.create_all(bind=engine)
+    tag = uuid.uuid4().hex[:12]
+    with SessionLocal() as db:
+        customer = Customer(name="Benchmark", address="-", email=f"bench-{tag}@example.com",
+                            password="-", is_admin=False)
+        product = Product(name=f"Benchmark {tag}", price=1.0, genetic="-", thc=0.0, cbd=0.0,
+                          effect="-", stock=stock)
+        db.add_all([customer, product])
+        db.commit()
+        c_id, p_id = customer.c_id, product.p_id
+
+    outcomes = Counter()
+    lock = threading.Lock()
+    checkout = order_schemas.CheckoutCreate(lines=[order_schemas.CheckoutLine(p_id=p_id, amount=1)])
+
+    def buy(_):
+        with SessionLocal() as db:
+            try:
+                order_crud.create_checkout(db, c_id, checkout)
+                outcome = "sold"
+            except HTTPException as error:
+                outcome = "sold_out" if error.status_code == 409 else f"error_{error.status_code}"
+        with lock:
+            outcomes[outcome] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(buy, range(checkouts)))
+    elapsed = time.perf_counter() - start
+
+    with SessionLocal() as db:
+        final_stock = db.query(Product.stock).filter(Product.p_id == p_id).scalar()
+        ordered = db.query(Order).filter(Order.p_id == p_id).count()
+        db.query(Order).filter(Order.p_id == p_id).delete(synchronize_session=False)
+        db.query(Product).filter(Product.p_id == p_id).delete(synchronize_session=False)
+        db.query(Customer).filter(Customer.c_id == c_id).delete(synchronize_session=False)
+        db.commit()
+
+    return {**outcomes, "elapsed": elapsed, "final_stock": final_stock, "ordered": ordered}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stock", type=int, default=1000, help="units of the hot product in stock")
+    parser.add_argument("--checkouts", type=int, default=3000, help="checkouts of one unit each")
+    parser.add_argument("--threads", type=int, default=15, help="concurrent clients")
+    args = parser.parse_args()
+
+    if engine.dialect.name == "sqlite":
+        print("Warning: SQLite serializes all writers; this run says nothing about row-lock contention")
+    result = run(args.stock, args.checkouts, args.threads)
+    sold = result.get("sold", 0)
+    errors = {key: value for key, value in result.items() if key.startswith("error_")}
+    print(f"{args.checkouts} checkouts with {args.threads} threads in {result['elapsed']:.2f}s "
+          f"({args.checkouts / result['elapsed']:.0f} checkouts/s)")
+    print(f"sold: {sold}, sold out: {result.get('sold_out', 0)}, errors: {errors or 0}")
+    print(f"orders stored: {result['ordered']}, stock left: {result['final_stock']}")
+
+    assert sold == result["ordered"] == min(args.stock, args.checkouts), "sold count does not match stock"
+    assert result["final_stock"] == args.stock - sold, "stock does not match orders"
+    assert not errors, "checkouts failed with errors (e.g. deadlocks)"
+
+
+if __name__ == "__main__":
+    main()
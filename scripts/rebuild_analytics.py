@@ -0,0 +1,27 @@
+"""
+Rebuild the sales summary tables from the order table.
+
+The summary tables are maintained incrementally when orders are created. Run
+this once after upgrading an existing database, or whenever the summaries need
+a backfill:
+
+    python -m scripts.rebuild_analytics
+
+The rebuild scans the whole order table in one transaction; run it while
+traffic is low.
+"""
+from app import models  # noqa: F401
+from app.crud import analytics
+from app.utils.database import Base, SessionLocal, engine
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        counts = analytics.rebuild_analytics(db)
+    for table, count in counts.items():
+        print(f"{table}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
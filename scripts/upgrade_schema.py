@@ -0,0 +1,29 @@
+"""
+Upgrade an existing database to the current schema.
+
+The application creates missing tables at startup, but create_all does not
+add columns or indexes to tables that already exist. Run this once after
+upgrading the application on an existing database, before starting it:
+
+    python -m scripts.upgrade_schema
+
+Every step checks the schema first, so running it again is harmless. Adding
+indexes to large tables locks them for writes on some MySQL versions; run it
+while traffic is low. Afterwards, fill the sales summaries with
+python -m scripts.rebuild_analytics.
+"""
+from app import models  # noqa: F401
+from app.utils.database import engine
+from app.utils.schema_upgrade import upgrade_schema
+
+
+def main():
+    statements = upgrade_schema(engine)
+    for statement in statements:
+        print(statement)
+    if not statements:
+        print("Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import pytest
+
+from app.utils.snowflake import order_number_generator
+
+
+@pytest.fixture(autouse=True)
+def order_number_worker_id():
+    """Give the order number generator a worker ID, as the lease at startup does."""
+    order_number_generator.assign(0)
+    yield
+    order_number_generator.assign(0)
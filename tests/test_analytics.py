@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import pytest
+
+from app.crud import analytics as analytics_crud
+from app.crud import order as order_crud
+from app.models.analytics import CustomerSales, ProductDailySales, ProductSales
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.product import Product
+from app.schemas import order as order_schemas
+from app.schemas.analytics import SalesMetric
+
+
+@pytest.fixture
+def products(test_db):
+    products = [
+        Product(name="Cheap", price=5.0, genetic="Indica", thc=20.0, cbd=1.0, effect="Relaxing"),
+        Product(name="Pricey", price=20.0, genetic="Sativa", thc=25.0, cbd=1.0, effect="Uplifting"),
+    ]
+    test_db.add_all(products)
+    test_db.commit()
+    return products
+
+
+def _summaries(test_db):
+    return (
+        sorted((row.p_id, row.day, row.units, row.revenue) for row in test_db.query(ProductDailySales)),
+        sorted((row.p_id, row.units, row.revenue) for row in test_db.query(ProductSales)),
+        sorted((row.c_id, row.order_lines, row.units, row.revenue) for row in test_db.query(CustomerSales)),
+    )
+
+
+def test_orders_update_summaries(test_db, test_customer, products):
+    """Test that every way of creating orders keeps the summary tables current."""
+    cheap, pricey = products
+    c_id = test_customer.c_id
+    order_crud.create_checkout(db=test_db, c_id=c_id, checkout=order_schemas.CheckoutCreate(lines=[
+        order_schemas.CheckoutLine(p_id=cheap.p_id, amount=4),
+        order_schemas.CheckoutLine(p_id=pricey.p_id, amount=1),
+    ]))
+    order_crud.create_order(db=test_db, order=order_schemas.OrderCreate(p_id=pricey.p_id, c_id=c_id, amount=2))
+    order_crud.create_orders(db=test_db, orders=[
+        order_schemas.OrderCreate(p_id=cheap.p_id, c_id=c_id, amount=1),
+        order_schemas.OrderCreate(p_id=cheap.p_id, c_id=c_id, amount=1),
+    ])
+
+    daily, totals, customers = _summaries(test_db)
+    today = test_db.query(Order.created_at).first()[0].date()
+    assert daily == [(cheap.p_id, today, 6, 30.0), (pricey.p_id, today, 3, 60.0)]
+    assert totals == [(cheap.p_id, 6, 30.0), (pricey.p_id, 3, 60.0)]
+    assert customers == [(c_id, 5, 9, 90.0)]
+
+    top = analytics_crud.get_top_products(test_db, SalesMetric.units, limit=1)
+    assert [(product.name, product.units) for product in top] == [("Cheap", 6)]
+    top = analytics_crud.get_top_products(test_db, SalesMetric.revenue, day=today)
+    assert [product.name for product in top] == ["Pricey", "Cheap"]
+    assert analytics_crud.get_customer_sales(test_db, c_id).last_order_at is not None
+
+    summaries = _summaries(test_db)
+    analytics_crud.rebuild_analytics(test_db)
+    assert _summaries(test_db) == summaries
+
+
+def test_rebuild_analytics(test_db, test_customer, products):
+    """Test that a rebuild backfills summaries from existing orders."""
+    cheap, pricey = products
+    other = Customer(name="Other", address="2 St", email="other@example.com", password="x", is_admin=False)
+    test_db.add(other)
+    test_db.commit()
+    test_db.add_all([
+        Order(p_id=cheap.p_id, c_id=test_customer.c_id, amount=2, order_nr="A",
+              created_at=datetime(2025, 1, 1, 10)),
+        Order(p_id=cheap.p_id, c_id=other.c_id, amount=1, order_nr="B",
+              created_at=datetime(2025, 1, 2, 23)),
+        Order(p_id=pricey.p_id, c_id=other.c_id, amount=1, order_nr="C"),
+    ])
+    test_db.commit()
+
+    counts = analytics_crud.rebuild_analytics(test_db)
+
+    assert counts == {"product_daily_sales": 2, "product_sales": 2, "customer_sales": 2}
+    daily = analytics_crud.get_product_daily_sales(
+        test_db, cheap.p_id, datetime(2025, 1, 2).date(), datetime(2025, 1, 31).date()
+    )
+    assert [(row.day.isoformat(), row.units) for row in daily] == [("2025-01-02", 1)]
+    assert [customer.c_id for customer in analytics_crud.get_top_customers(test_db)] == [
+        other.c_id, test_customer.c_id
+    ]
@@ -0,0 +1,37 @@
+import pytest
+
+from app.utils.bloom import BloomFilter
+
+
+def test_added_keys_are_found():
+    """Test that a Bloom filter has no false negatives."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"token-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    assert len(bloom) == 1000
+
+def test_false_positive_rate():
+    """Test that the false positive rate at capacity stays close to the configured rate."""
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    for i in range(2000):
+        bloom.add(f"revoked-{i}")
+
+    false_positives = sum(f"valid-{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+
+def test_sizing():
+    """Test that the bit array and hash functions are sized from capacity and error rate."""
+    bloom = BloomFilter(capacity=100000, error_rate=0.001)
+    stats = bloom.stats()
+    assert stats["hash_functions"] == 10
+    # About 1.8 bytes per key at 0.1%
+    assert 170000 < stats["bytes"] < 190000
+
+@pytest.mark.parametrize("capacity,error_rate", [(0, 0.01), (100, 0), (100, 1)])
+def test_invalid_parameters(capacity, error_rate):
+    """Test that invalid sizes are rejected."""
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=capacity, error_rate=error_rate)
@@ -0,0 +1,123 @@
+import pytest
+
+from app.crud import product as product_crud
+from app.schemas import product as product_schemas
+from app.utils.cache import TTLCache
+from app.utils.http_cache import conditional_response, etag_matches
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def clear_product_cache():
+    product_crud.invalidate_product_cache()
+    yield
+    product_crud.product_cache.clear()
+    product_crud.product_list_cache.clear()
+
+
+def test_cache_hit_and_miss():
+    """Test that hits and misses are counted."""
+    cache = TTLCache(maxsize=2, ttl=10)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_cache_lru_eviction():
+    """Test that the least recently used entry is evicted when full."""
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_ttl_expiry():
+    """Test that entries expire after their time to live."""
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=5, timer=timer)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=20)
+
+    timer.now = 6
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cache_set_skips_stale_generation():
+    """Test that values loaded before an invalidation are not stored."""
+    cache = TTLCache(maxsize=10, ttl=10)
+    generation = cache.generation
+    cache.clear()
+    cache.set("a", 1, generation=generation)
+    assert cache.get("a") is None
+
+
+def test_product_cache_invalidated_on_writes(test_db):
+    """Test that product writes invalidate the catalog caches."""
+    product = product_crud.create_product(db=test_db, product=product_schemas.ProductCreate(
+        name="Cached", price=10.0, genetic="Indica", thc=20.0, cbd=1.0, effect="Relaxing"
+    ))
+
+    assert [p.name for p in product_crud.get_products(db=test_db)] == ["Cached"]
+    assert product_crud.get_product_by_id(db=test_db, p_id=product.p_id).name == "Cached"
+    product_crud.get_products(db=test_db)
+    product_crud.get_product_by_id(db=test_db, p_id=product.p_id)
+    stats = product_crud.get_cache_stats()
+    assert stats["product_list"]["hits"] == 1
+    assert stats["product"]["hits"] == 1
+
+    update = product_schemas.ProductUpdate.model_construct(name="Renamed")
+    product_crud.update_products(db=test_db, p_id=product.p_id, update_data=update)
+    assert [p.name for p in product_crud.get_products(db=test_db)] == ["Renamed"]
+    assert product_crud.get_product_by_id(db=test_db, p_id=product.p_id).name == "Renamed"
+
+    product_crud.delete_product_by_id(db=test_db, p_id=product.p_id)
+    assert product_crud.get_products(db=test_db) == []
+    with pytest.raises(ValueError):
+        product_crud.get_product_by_id(db=test_db, p_id=product.p_id)
+
+
+def test_etag_matches():
+    """Test If-None-Match parsing with lists, weak ETags and wildcards."""
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+def test_rendered_product_etag(test_db):
+    """Test that the ETag is stable while a product is unchanged and changes with it."""
+    product = product_crud.create_product(db=test_db, product=product_schemas.ProductCreate(
+        name="Tagged", price=10.0, genetic="Indica", thc=20.0, cbd=1.0, effect="Relaxing"
+    ))
+    rendered = product_crud.get_rendered_product(db=test_db, p_id=product.p_id)
+    assert product_crud.get_rendered_product(db=test_db, p_id=product.p_id).etag == rendered.etag
+
+    not_modified = conditional_response(rendered, rendered.etag)
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    assert not_modified.headers["etag"] == rendered.etag
+    assert conditional_response(rendered, None).body == rendered.body
+
+    update = product_schemas.ProductUpdate.model_construct(price=12.0)
+    product_crud.update_products(db=test_db, p_id=product.p_id, update_data=update)
+    assert product_crud.get_rendered_product(db=test_db, p_id=product.p_id).etag != rendered.etag
@@ -86,4 +86,75 @@ def test_get_customer_by_id_with_null_is_admin(test_db):
     db_customer = customer_crud.get_customer_by_id(db=test_db, customer_id=customer.c_id)
     
     # Check that is_admin is False, not None
-    assert db_customer.is_admin is False
\ No newline at end of file
+    assert db_customer.is_admin is False
+
+def test_get_principal_is_cached(test_db, test_customer):
+    """Test that the principal is loaded once and then served from the cache."""
+    customer_crud.principal_cache.clear()
+
+    principal = customer_crud.get_principal(db=test_db, customer_id=test_customer.c_id)
+    assert principal == customer_schemas.Principal(
+        c_id=test_customer.c_id, name=test_customer.name, email=test_customer.email, is_admin=False
+    )
+
+    # A change that bypasses the crud functions is not seen until the entry expires
+    test_customer.name = "Changed Elsewhere"
+    test_db.commit()
+    assert customer_crud.get_principal(db=test_db, customer_id=test_customer.c_id) is principal
+
+    assert customer_crud.get_principal(db=test_db, customer_id=999) is None
+
+def test_update_customer_invalidates_principal(test_db, test_customer):
+    """Test that updating a customer drops the cached principal."""
+    customer_crud.principal_cache.clear()
+    customer_crud.get_principal(db=test_db, customer_id=test_customer.c_id)
+
+    customer_crud.update_customer(
+        db=test_db,
+        customer_id=test_customer.c_id,
+        customer_data=customer_schemas.CustomerUpdate(
+            name="Renamed", address=test_customer.address, email="renamed@example.com"
+        ),
+    )
+
+    principal = customer_crud.get_principal(db=test_db, customer_id=test_customer.c_id)
+    assert principal.name == "Renamed"
+    assert principal.email == "renamed@example.com"
+
+def test_set_customer_admin_invalidates_principal(test_db, test_customer):
+    """Test that a role change applies to the next lookup and revokes the customer's tokens."""
+    customer_crud.principal_cache.clear()
+    assert customer_crud.get_principal(db=test_db, customer_id=test_customer.c_id).is_admin is False
+
+    try:
+        db_customer = customer_crud.set_customer_admin(db=test_db, customer_id=test_customer.c_id, is_admin=True)
+        assert db_customer.is_admin is True
+        assert db_customer.token_version == 1
+        assert customer_crud.get_principal(db=test_db, customer_id=test_customer.c_id).is_admin is True
+        assert not customer_crud.token_versions.is_current(test_customer.c_id, 0)
+        assert customer_crud.token_versions.is_current(test_customer.c_id, 1)
+
+        # Setting the same role again does not revoke the new tokens
+        customer_crud.set_customer_admin(db=test_db, customer_id=test_customer.c_id, is_admin=True)
+        assert customer_crud.token_versions.is_current(test_customer.c_id, 1)
+
+        customer_crud.set_customer_admin(db=test_db, customer_id=test_customer.c_id, is_admin=False)
+        assert customer_crud.get_principal(db=test_db, customer_id=test_customer.c_id).is_admin is False
+        assert not customer_crud.token_versions.is_current(test_customer.c_id, 1)
+
+        assert customer_crud.set_customer_admin(db=test_db, customer_id=999, is_admin=True) is None
+    finally:
+        customer_crud.token_versions.clear()
+
+def test_load_token_versions(test_db, test_customer):
+    """Test that revocations made elsewhere are picked up by a refresh."""
+    try:
+        test_customer.token_version = 4
+        test_db.commit()
+        assert customer_crud.token_versions.is_current(test_customer.c_id, 3)
+
+        customer_crud.load_token_versions(test_db)
+        assert not customer_crud.token_versions.is_current(test_customer.c_id, 3)
+        assert customer_crud.token_versions.is_current(test_customer.c_id, 4)
+    finally:
+        customer_crud.token_versions.clear()
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel, TypeAdapter
+
+from app.utils.idempotency import IDEMPOTENT_REPLAYED_HEADER, IdempotencyStore, request_fingerprint
+
+
+class Item(BaseModel):
+    name: str
+
+
+adapter = TypeAdapter(Item)
+
+
+def test_concurrent_duplicates_run_once():
+    """Test that concurrent and later duplicates share the response of the first request."""
+    calls = []
+
+    async def create():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return Item(name=f"item{len(calls)}")
+
+    async def scenario():
+        store = IdempotencyStore(maxsize=10, ttl=60)
+        fingerprint = request_fingerprint(Item(name="request"))
+        responses = await asyncio.gather(*(store.run("key", fingerprint, create, adapter, 201) for _ in range(3)))
+        responses.append(await store.run("key", fingerprint, create, adapter, 201))
+        return responses
+
+    responses = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert {response.body for response in responses} == {b'{"name":"item1"}'}
+    assert {response.status_code for response in responses} == {201}
+    assert [IDEMPOTENT_REPLAYED_HEADER in response.headers for response in responses] == [False, True, True, True]
+
+
+def test_client_errors_are_stored_and_server_errors_are_not():
+    """Test that 4xx responses are replayed while failed requests run again."""
+    calls = []
+
+    async def reject():
+        calls.append(1)
+        raise HTTPException(status_code=409, detail="Out of stock")
+
+    async def crash():
+        calls.append(1)
+        raise HTTPException(status_code=500, detail="Database error")
+
+    async def scenario():
+        store = IdempotencyStore(maxsize=10, ttl=60)
+        first = await store.run("a", "fp", reject, adapter)
+        second = await store.run("a", "fp", reject, adapter)
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                await store.run("b", "fp", crash, adapter)
+        with pytest.raises(HTTPException) as excinfo:
+            await store.run("a", "other", reject, adapter)
+        return first, second, excinfo.value
+
+    first, second, mismatch = asyncio.run(scenario())
+
+    assert (first.status_code, first.body) == (409, b'{"detail": "Out of stock"}')
+    assert (second.status_code, second.body) == (409, first.body)
+    assert len(calls) == 3
+    assert mismatch.status_code == 422
@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.crud import inventory as inventory_crud
+from app.crud import order as order_crud
+from app.models.order import Order
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation
+from app.schemas import order as order_schemas
+
+
+@pytest.fixture
+def products(test_db):
+    products = [
+        Product(name="Limited", price=10.0, genetic="Indica", thc=20.0, cbd=1.0, effect="Relaxing", stock=5),
+        Product(name="Unlimited", price=10.0, genetic="Sativa", thc=18.0, cbd=1.0, effect="Uplifting"),
+    ]
+    test_db.add_all(products)
+    test_db.commit()
+    return products
+
+
+def _stock(test_db, p_id):
+    return inventory_crud.get_stock(test_db, p_id).stock
+
+
+def _checkout(test_db, c_id, *lines, reservation_id=None):
+    checkout = order_schemas.CheckoutCreate(
+        lines=[order_schemas.CheckoutLine(p_id=p_id, amount=amount) for p_id, amount in lines],
+        reservation_id=reservation_id,
+    )
+    return order_crud.create_checkout(db=test_db, c_id=c_id, checkout=checkout)
+
+
+def test_checkout_takes_stock(test_db, test_customer, products):
+    """Test that a checkout decrements tracked stock and ignores untracked stock."""
+    limited, unlimited = products
+    _checkout(test_db, test_customer.c_id, (limited.p_id, 3), (unlimited.p_id, 100))
+
+    assert _stock(test_db, limited.p_id) == 2
+    assert _stock(test_db, unlimited.p_id) is None
+
+
+def test_checkout_never_oversells(test_db, test_customer, products):
+    """Test that a short line rejects the whole order and leaves all stock untouched."""
+    limited, unlimited = products
+    _checkout(test_db, test_customer.c_id, (limited.p_id, 4))
+
+    with pytest.raises(HTTPException) as excinfo:
+        _checkout(test_db, test_customer.c_id, (unlimited.p_id, 1), (limited.p_id, 2))
+    assert excinfo.value.status_code == 409
+    assert str(limited.p_id) in excinfo.value.detail
+    assert _stock(test_db, limited.p_id) == 1
+    assert test_db.query(Order).count() == 1
+
+    with pytest.raises(HTTPException) as excinfo:
+        order_crud.create_order(db=test_db, order=order_schemas.OrderCreate(
+            p_id=limited.p_id, c_id=test_customer.c_id, amount=2
+        ))
+    assert excinfo.value.status_code == 409
+
+
+def test_reservation_checkout(test_db, test_customer, products):
+    """Test that a reserved cart is checked out without taking stock twice."""
+    limited = products[0]
+    reservation = inventory_crud.create_reservation(
+        test_db, test_customer.c_id, [order_schemas.CheckoutLine(p_id=limited.p_id, amount=5)]
+    )
+    assert _stock(test_db, limited.p_id) == 0
+
+    order = _checkout(test_db, test_customer.c_id, reservation_id=reservation.reservation_id)
+    assert [(line.p_id, line.amount) for line in order.lines] == [(limited.p_id, 5)]
+    assert _stock(test_db, limited.p_id) == 0
+    assert test_db.query(StockReservation).count() == 0
+
+    with pytest.raises(HTTPException) as excinfo:
+        _checkout(test_db, test_customer.c_id, reservation_id=reservation.reservation_id)
+    assert excinfo.value.status_code == 409
+
+
+def test_release_reservation(test_db, test_customer, products):
+    """Test that cancelling a reservation returns its stock once."""
+    limited = products[0]
+    reservation = inventory_crud.create_reservation(
+        test_db, test_customer.c_id, [order_schemas.CheckoutLine(p_id=limited.p_id, amount=2)]
+    )
+    assert not inventory_crud.release_reservation(test_db, reservation.reservation_id, test_customer.c_id + 1)
+    assert inventory_crud.release_reservation(test_db, reservation.reservation_id, test_customer.c_id)
+    assert not inventory_crud.release_reservation(test_db, reservation.reservation_id, test_customer.c_id)
+    assert _stock(test_db, limited.p_id) == 5
+
+
+def test_release_expired_reservations(test_db, test_customer, products):
+    """Test that the sweeper only returns the stock of expired reservations."""
+    limited = products[0]
+    lines = [order_schemas.CheckoutLine(p_id=limited.p_id, amount=1)]
+    expired = inventory_crud.create_reservation(test_db, test_customer.c_id, lines)
+    inventory_crud.create_reservation(test_db, test_customer.c_id, lines)
+    test_db.query(StockReservation).filter(
+        StockReservation.reservation_id == expired.reservation_id
+    ).update({StockReservation.expires_at: expired.expires_at - timedelta(days=1)})
+    test_db.commit()
+
+    assert inventory_crud.release_expired_reservations(test_db, batch_size=1) == 1
+    assert _stock(test_db, limited.p_id) == 4
+    assert test_db.query(StockReservation).count() == 1
+
+    with pytest.raises(HTTPException) as excinfo:
+        _checkout(test_db, test_customer.c_id, reservation_id=expired.reservation_id)
+    assert excinfo.value.status_code == 409
+
+
+def test_adjust_stock(test_db, products):
+    """Test that stock adjustments are relative and cannot go negative."""
+    limited, unlimited = products
+    assert inventory_crud.adjust_stock(test_db, limited.p_id, 3).stock == 8
+    with pytest.raises(HTTPException):
+        inventory_crud.adjust_stock(test_db, limited.p_id, -9)
+    with pytest.raises(HTTPException):
+        inventory_crud.adjust_stock(test_db, unlimited.p_id, 1)
+    assert inventory_crud.set_stock(test_db, unlimited.p_id, 1).stock == 1
+    assert inventory_crud.adjust_stock(test_db, 9999, 1) is None
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+from jose import jwt
+
+from app.utils.jwt_verify import InvalidTokenError, JWTVerifier
+
+SECRET = "test-secret"
+
+
+def test_decode_matches_jose():
+    """Test that a token from python-jose is decoded to the same claims."""
+    claims = {"customer_id": 1, "role": "admin", "ver": 2, "exp": int(time.time()) + 60}
+    token = jwt.encode(claims, SECRET, algorithm="HS256")
+
+    verifier = JWTVerifier(SECRET)
+    assert verifier.decode(token) == jwt.decode(token, SECRET, algorithms=["HS256"]) == claims
+
+def test_decode_caches_verified_tokens():
+    """Test that a reused token is served from the cache."""
+    token = jwt.encode({"customer_id": 1, "exp": int(time.time()) + 60}, SECRET, algorithm="HS256")
+    verifier = JWTVerifier(SECRET)
+
+    verifier.decode(token)
+    claims = verifier.decode(token)
+    assert verifier.stats()["hits"] == 1
+    assert verifier.stats()["size"] == 1
+
+    # Callers get their own copy of the cached claims
+    claims["customer_id"] = 2
+    assert verifier.decode(token)["customer_id"] == 1
+
+def test_cached_token_expires_with_exp():
+    """Test that cached claims are not kept beyond the token's expiry."""
+    token = jwt.encode({"customer_id": 1, "exp": int(time.time()) + 2}, SECRET, algorithm="HS256")
+    verifier = JWTVerifier(SECRET, max_ttl=3600)
+
+    verifier.decode(token)
+    expires_at, _ = next(iter(verifier.cache._data.values()))
+    assert expires_at - time.monotonic() <= 2
+
+@pytest.mark.parametrize("token", [
+    "",
+    "not-a-token",
+    "a.b",
+    "a.b.c.d",
+    "!!!.???.***",
+])
+def test_decode_rejects_malformed_tokens(token):
+    """Test that malformed tokens are rejected."""
+    with pytest.raises(InvalidTokenError):
+        JWTVerifier(SECRET).decode(token)
+
+def test_decode_rejects_invalid_tokens():
+    """Test that forged, expired and foreign-algorithm tokens are rejected and not cached."""
+    verifier = JWTVerifier(SECRET)
+    exp = int(time.time()) + 60
+
+    forged = jwt.encode({"customer_id": 1, "exp": exp}, "other-secret", algorithm="HS256")
+    expired = jwt.encode({"customer_id": 1, "exp": int(time.time()) - 10}, SECRET, algorithm="HS256")
+    other_algorithm = jwt.encode({"customer_id": 1, "exp": exp}, SECRET, algorithm="HS512")
+    bad_exp = jwt.encode({"customer_id": 1, "exp": "tomorrow"}, SECRET, algorithm="HS256")
+    header, payload, signature = jwt.encode({"customer_id": 1, "exp": exp}, SECRET, algorithm="HS256").split(".")
+    tampered = ".".join([header, jwt.encode({"customer_id": 2}, SECRET).split(".")[1], signature])
+
+    for token in (forged, expired, other_algorithm, bad_exp, tampered):
+        with pytest.raises(InvalidTokenError):
+            verifier.decode(token)
+    assert verifier.stats()["size"] == 0
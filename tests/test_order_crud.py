@@ -0,0 +1,143 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.crud import order as order_crud
+from app.models.customer import Customer
+from app.models.order import Order
+from app.models.product import Product
+from app.schemas import order as order_schemas
+from app.utils.pagination import next_cursor
+
+
+@pytest.fixture
+def products(test_db):
+    products = [
+        Product(name=f"P{i}", price=10.0, genetic="Indica", thc=20.0, cbd=1.0, effect="Relaxing")
+        for i in range(3)
+    ]
+    test_db.add_all(products)
+    test_db.commit()
+    return products
+
+
+def test_create_checkout(test_db, test_customer, products):
+    """Test that all cart lines are stored under one order number."""
+    checkout = order_schemas.CheckoutCreate(lines=[
+        order_schemas.CheckoutLine(p_id=products[0].p_id, amount=2),
+        order_schemas.CheckoutLine(p_id=products[2].p_id, amount=1),
+        order_schemas.CheckoutLine(p_id=products[0].p_id, amount=1),
+    ])
+
+    order = order_crud.create_checkout(db=test_db, c_id=test_customer.c_id, checkout=checkout)
+
+    assert len(order.order_nr) == 19
+    assert [(line.p_id, line.amount) for line in order.lines] == [
+        (products[0].p_id, 3), (products[2].p_id, 1)
+    ]
+    stored = test_db.query(Order).order_by(Order.o_id).all()
+    assert [line.o_id for line in order.lines] == [line.o_id for line in stored]
+    assert {line.c_id for line in stored} == {test_customer.c_id}
+    assert {line.order_nr for line in stored} == {order.order_nr}
+
+    found = order_crud.get_order_by_number(db=test_db, order_nr=order.order_nr)
+    assert found == order
+    assert order_crud.get_order_by_number(db=test_db, order_nr="0") is None
+
+
+def test_create_checkout_is_atomic(test_db, test_customer, products):
+    """Test that an invalid line rejects the whole order."""
+    checkout = order_schemas.CheckoutCreate(lines=[
+        order_schemas.CheckoutLine(p_id=products[0].p_id, amount=1),
+        order_schemas.CheckoutLine(p_id=9999, amount=1),
+    ])
+    with pytest.raises(HTTPException) as excinfo:
+        order_crud.create_checkout(db=test_db, c_id=test_customer.c_id, checkout=checkout)
+    assert excinfo.value.status_code == 400
+    assert "9999" in excinfo.value.detail
+
+    checkout.lines = [order_schemas.CheckoutLine(p_id=products[0].p_id, amount=0)]
+    with pytest.raises(HTTPException):
+        order_crud.create_checkout(db=test_db, c_id=test_customer.c_id, checkout=checkout)
+    assert test_db.query(Order).count() == 0
+
+
+def test_order_numbers_are_unique_and_ordered(test_db, test_customer, products):
+    """Test that every order gets its own, increasing order number."""
+    numbers = [
+        order_crud.create_order(db=test_db, order=order_schemas.OrderCreate(
+            p_id=products[0].p_id, c_id=test_customer.c_id, amount=1
+        )).order_nr
+        for _ in range(3)
+    ]
+    assert numbers == sorted(set(numbers))
+
+
+def test_create_orders_group_commit(test_db, test_customer, products):
+    """Test that a batch of orders is written together and rejects invalid orders individually."""
+    products[1].stock = 1
+    test_db.commit()
+    c_id = test_customer.c_id
+    orders = [
+        order_schemas.OrderCreate(p_id=products[1].p_id, c_id=c_id, amount=1),
+        order_schemas.OrderCreate(p_id=9999, c_id=c_id, amount=1),
+        order_schemas.OrderCreate(p_id=products[0].p_id, c_id=c_id, amount=2),
+        order_schemas.OrderCreate(p_id=products[1].p_id, c_id=c_id, amount=1),
+        order_schemas.OrderCreate(p_id=products[0].p_id, c_id=c_id, amount=0),
+    ]
+
+    results = order_crud.create_orders(db=test_db, orders=orders)
+
+    assert [getattr(result, "status_code", None) for result in results] == [None, 400, None, 409, 400]
+    created = [results[0], results[2]]
+    assert [(order.p_id, order.amount) for order in created] == [(products[1].p_id, 1), (products[0].p_id, 2)]
+    assert created[0].order_nr < created[1].order_nr
+    stored = test_db.query(Order).order_by(Order.o_id).all()
+    assert [order.o_id for order in created] == [order.o_id for order in stored]
+
+
+def test_get_order_scoped_to_customer(test_db, test_customer, products):
+    """Test that order history pages only contain the customer's orders."""
+    other = Customer(name="Other", address="2 St", email="other@example.com", password="x", is_admin=False)
+    test_db.add(other)
+    test_db.commit()
+    for i in range(5):
+        c_id = test_customer.c_id if i % 2 == 0 else other.c_id
+        test_db.add(Order(p_id=products[0].p_id, c_id=c_id, amount=1, order_nr=f"NR{i}"))
+    test_db.commit()
+
+    first = order_crud.get_order(db=test_db, limit=2, c_id=test_customer.c_id)
+    assert [order.order_nr for order in first] == ["NR0", "NR2"]
+    second = order_crud.get_order(
+        db=test_db, limit=2, c_id=test_customer.c_id, cursor=next_cursor(first, 2, "o_id")
+    )
+    assert [order.order_nr for order in second] == ["NR4"]
+    assert len(order_crud.get_order(db=test_db, c_id=other.c_id)) == 2
+
+
+def test_get_order_expand_product(test_db, test_customer, products):
+    """Test that expand_product embeds the products with one extra query."""
+    c_id = test_customer.c_id
+    for product in products:
+        test_db.add(Order(p_id=product.p_id, c_id=c_id, amount=1, order_nr=f"NR{product.p_id}"))
+    test_db.commit()
+    test_db.expunge_all()
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_db.get_bind(), "before_cursor_execute", count)
+    try:
+        orders = order_crud.get_order(db=test_db, c_id=c_id, expand_product=True)
+        expanded = [order_schemas.Order.model_validate(order) for order in orders]
+    finally:
+        event.remove(test_db.get_bind(), "before_cursor_execute", count)
+
+    assert len(statements) == 2
+    assert [order.product.name for order in expanded] == ["P0", "P1", "P2"]
+
+    test_db.expunge_all()
+    plain = order_crud.get_order_by_id(db=test_db, order_id=orders[0].o_id)
+    assert order_schemas.Order.model_validate(plain).product is None
@@ -0,0 +1,77 @@
+import pytest
+
+from app.crud import order as order_crud
+from app.crud import product as product_crud
+from app.models.order import Order
+from app.models.product import Product
+from app.utils.pagination import decode_cursor, encode_cursor, next_cursor
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes to the position it was encoded from."""
+    cursor = encode_cursor(42, "price", 19.99)
+    decoded = decode_cursor(cursor)
+    assert decoded.pk == 42
+    assert decoded.sort_key == "price"
+    assert decoded.sort_value == 19.99
+
+    decoded = decode_cursor(encode_cursor(7))
+    assert decoded.pk == 7
+    assert decoded.sort_key is None
+
+
+def test_decode_invalid_cursor():
+    """Test that malformed cursors raise ValueError."""
+    for cursor in ["not-a-cursor", "", encode_cursor(1)[:-3] + "$$$"]:
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+def test_product_cursor_pagination(test_db):
+    """Test walking through all products page by page with cursors."""
+    for i in range(7):
+        test_db.add(Product(
+            name=f"Product {i}",
+            price=10.0 + i,
+            genetic="Indica",
+            thc=20.0,
+            cbd=1.0,
+            effect="Relaxing",
+        ))
+    test_db.commit()
+
+    names = []
+    cursor = None
+    while True:
+        page = product_crud.get_products(db=test_db, limit=3, cursor=cursor)
+        names.extend(p.name for p in page)
+        cursor = next_cursor(page, 3, "p_id")
+        if cursor is None:
+            break
+
+    assert names == [f"Product {i}" for i in range(7)]
+
+    # Skip is ignored when a cursor is given
+    first_page = product_crud.get_products(db=test_db, limit=2)
+    cursor = next_cursor(first_page, 2, "p_id")
+    page = product_crud.get_products(db=test_db, skip=5, limit=2, cursor=cursor)
+    assert [p.name for p in page] == ["Product 2", "Product 3"]
+
+
+def test_order_cursor_pagination(test_db, test_customer):
+    """Test cursor pagination of orders."""
+    product = Product(name="P", price=1.0, genetic="Sativa", thc=1.0, cbd=1.0, effect="E")
+    test_db.add(product)
+    test_db.commit()
+    for i in range(4):
+        test_db.add(Order(p_id=product.p_id, c_id=test_customer.c_id, amount=i + 1, order_nr=f"NR{i}"))
+    test_db.commit()
+
+    first = order_crud.get_order(db=test_db, limit=3)
+    assert [o.order_nr for o in first] == ["NR0", "NR1", "NR2"]
+    second = order_crud.get_order(db=test_db, limit=3, cursor=next_cursor(first, 3, "o_id"))
+    assert [o.order_nr for o in second] == ["NR3"]
+    assert next_cursor(second, 3, "o_id") is None
+
+    with pytest.raises(ValueError):
+        order_crud.get_order(db=test_db, cursor="garbage")
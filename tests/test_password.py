@@ -1,5 +1,16 @@
+import asyncio
+
 import pytest
-from app.utils.password import password_hash, verify_password
+from fastapi import HTTPException
+
+from app.utils import password
+from app.utils.password import (
+    PasswordHasherPool,
+    calibrate_bcrypt_rounds,
+    make_password_context,
+    password_hash,
+    verify_password,
+)
 
 def test_password_hash():
     """Test that password_hash returns a string."""
@@ -36,4 +47,72 @@ def test_same_password_different_hashes():
     hash1 = password_hash(password)
     hash2 = password_hash(password)
     
-    assert hash1 != hash2  # Bcrypt uses random salt, so hashes should be different
\ No newline at end of file
+    assert hash1 != hash2  # Bcrypt uses random salt, so hashes should be different
+
+def test_password_pool_runs_in_worker_process():
+    """Test that the async helpers hash and verify in a worker process."""
+    pool = PasswordHasherPool(workers=1, max_queue=10)
+    try:
+        async def scenario():
+            hashed = await pool.run(password_hash, "test_password")
+            return hashed, await pool.run(verify_password, "test_password", hashed)
+
+        hashed, verified = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    assert verified is True
+    assert verify_password("test_password", hashed) is True
+    assert pool.stats()["completed"] == 2
+
+
+def test_password_pool_rejects_when_queue_is_full():
+    """Test that calls beyond the queue bound get 503 instead of waiting."""
+    pool = PasswordHasherPool(workers=0, max_queue=1)
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(password_hash, "a"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as excinfo:
+            await pool.run(password_hash, "b")
+        await first
+        return excinfo.value
+
+    assert asyncio.run(scenario()).status_code == 503
+    assert pool.stats()["rejected"] == 1
+
+def test_calibrate_bcrypt_rounds():
+    """Test that calibration extrapolates the cost from the probe time and clamps it."""
+    # 2 ms at the probe cost of 8 doubles to 256 ms at 15
+    def measure(rounds):
+        return 0.002
+
+    assert calibrate_bcrypt_rounds(250, 10, 16, measure=measure) == 15
+    assert calibrate_bcrypt_rounds(250, 10, 12, measure=measure) == 12
+    assert calibrate_bcrypt_rounds(1, 10, 16, measure=measure) == 10
+
+def test_hashes_off_the_calibrated_cost_are_rehashed():
+    """Test that only hashes whose cost drifted beyond the tolerance are updated."""
+    context = make_password_context(5, tolerance=1)
+    close = make_password_context(6).hash("test_password")
+    drifted = make_password_context(7).hash("test_password")
+
+    assert context.hash("test_password").startswith("$2b$05$")
+    assert not context.needs_update(close)
+    assert context.needs_update(drifted)
+
+    verified, new_hash = context.verify_and_update("test_password", drifted)
+    assert verified is True
+    assert new_hash.startswith("$2b$05$")
+    assert context.verify_and_update("wrong_password", drifted) == (False, None)
+
+def test_set_bcrypt_rounds():
+    """Test that the configured cost is used for new hashes."""
+    try:
+        password.set_bcrypt_rounds(5)
+        hashed = password_hash("test_password")
+        assert hashed.startswith("$2b$05$")
+        assert password.verify_and_update_password("test_password", hashed) == (True, None)
+        assert password.password_pool.stats()["bcrypt_rounds"] == 5
+    finally:
+        password.set_bcrypt_rounds(None)
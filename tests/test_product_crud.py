@@ -1,10 +1,21 @@
+import json
+
 import pytest
-from fastapi import HTTPException
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.crud import product as product_crud
 from app.schemas import product as product_schemas
+from app.models.order import Order
 from app.models.product import Product
+from app.routers import product as product_router
+from app.routers.oauth2 import get_admin_user
+from app.schemas.customer import Principal
+from app.utils import bulk
+from app.utils.database import get_db
+from app.utils.pagination import next_cursor
 
 def test_create_product(test_db):
     """Test creating a product."""
@@ -206,3 +217,213 @@ def test_delete_product(test_db):
         product_crud.delete_product_by_id(db=test_db, p_id=999)
     assert excinfo.value.status_code == 404
     assert "Product not found" in excinfo.value.detail
+
+def test_get_products_filter_and_sort(test_db):
+    """Test filtering and sorting products in the database."""
+    product_crud.invalidate_product_cache()
+    catalog = [
+        ("A", 30.0, "Indica", 18.0, 0.5, "Relaxing"),
+        ("B", 20.0, "Sativa", 22.0, 0.1, "Energizing"),
+        ("C", 25.0, "Indica", 25.0, 1.0, "Relaxing"),
+        ("D", 15.0, "Indica", 12.0, 8.0, "Calm"),
+        ("E", 25.0, "Indica", 20.0, 0.2, "Relaxing"),
+    ]
+    for name, price, genetic, thc, cbd, effect in catalog:
+        test_db.add(Product(name=name, price=price, genetic=genetic, thc=thc, cbd=cbd, effect=effect))
+    test_db.commit()
+
+    filters = product_schemas.ProductFilter(genetic="Indica", thc_min=15)
+    products = product_crud.get_products(db=test_db, filters=filters, sort=product_schemas.ProductSort.price)
+    assert [p.name for p in products] == ["C", "E", "A"]
+
+    # Keyset pagination continues with ties on the sort column broken by ID
+    first = product_crud.get_products(db=test_db, limit=2, filters=filters, sort=product_schemas.ProductSort.price)
+    cursor = next_cursor(first, 2, "p_id", "price")
+    rest = product_crud.get_products(
+        db=test_db, limit=2, cursor=cursor, filters=filters, sort=product_schemas.ProductSort.price
+    )
+    assert [p.name for p in first + rest] == ["C", "E", "A"]
+
+    # A cursor issued for another sort order is rejected
+    with pytest.raises(ValueError):
+        product_crud.get_products(db=test_db, cursor=cursor, sort=product_schemas.ProductSort.thc)
+
+    products = product_crud.get_products(
+        db=test_db, filters=product_schemas.ProductFilter(effect="Relaxing", price_max=25, cbd_min=0.2)
+    )
+    assert [p.name for p in products] == ["C", "E"]
+    product_crud.invalidate_product_cache()
+
+def test_create_products_bulk(test_db):
+    """Test creating many products in one transaction."""
+    products = [
+        product_schemas.ProductCreate(
+            name=f"Bulk {i}", price=10.0 + i, genetic="Hybrid", thc=18.0, cbd=0.5, effect="Balanced"
+        )
+        for i in range(5)
+    ]
+    created = product_crud.create_products(db=test_db, products=products)
+
+    assert [p.name for p in created] == [f"Bulk {i}" for i in range(5)]
+    assert len({p.p_id for p in created}) == 5
+    for product in created:
+        stored = test_db.query(Product).filter(Product.p_id == product.p_id).first()
+        assert stored.name == product.name
+        assert stored.price == product.price
+
+
+def _interleaved_autoinc(test_db, monkeypatch):
+    """Make the session behave like MySQL with innodb_autoinc_lock_mode = 2."""
+    monkeypatch.setattr(test_db.get_bind().dialect, "insert_returning", False)
+    monkeypatch.setitem(bulk._autoinc_settings, test_db.get_bind().url, (1, 2))
+    monkeypatch.setattr(bulk, "BULK_INSERT_BATCH_SIZE", 2)
+    statements = []
+
+    def listen(conn, cursor, statement, *args):
+        statements.append(statement.split()[0].upper())
+
+    event.listen(test_db.get_bind(), "before_cursor_execute", listen)
+    return statements, lambda: event.remove(test_db.get_bind(), "before_cursor_execute", listen)
+
+def test_create_products_with_interleaved_autoinc_keys(test_db, monkeypatch):
+    """Test that products keep one INSERT per batch and get their keys back by batch marker."""
+    statements, stop = _interleaved_autoinc(test_db, monkeypatch)
+    try:
+        created = product_crud.create_products(test_db, [
+            product_schemas.ProductCreate(
+                name=f"Row {i}", price=10.0, genetic="Hybrid", thc=18.0, cbd=0.5, effect="Balanced"
+            )
+            for i in range(5)
+        ])
+    finally:
+        stop()
+
+    # Three batches, each one INSERT and one SELECT of the keys
+    assert statements.count("INSERT") == 3
+    assert statements.count("SELECT") == 3
+    for product in created:
+        assert test_db.query(Product).filter(Product.p_id == product.p_id).one().name == product.name
+    product_crud.invalidate_product_cache()
+
+def test_bulk_insert_orders_with_interleaved_autoinc_keys(test_db, test_customer, monkeypatch):
+    """Test that order lines get their keys back by their unique (order_nr, p_id)."""
+    statements, stop = _interleaved_autoinc(test_db, monkeypatch)
+    try:
+        rows = bulk.bulk_insert(test_db, Order, [
+            {"p_id": p_id, "c_id": test_customer.c_id, "amount": p_id, "order_nr": "0000000000000000042"}
+            for p_id in (3, 1, 2)
+        ], key_columns=("order_nr", "p_id"))
+    finally:
+        stop()
+    test_db.commit()
+
+    assert statements.count("INSERT") == 2
+    for row in rows:
+        assert test_db.query(Order).filter(Order.o_id == row["o_id"]).one().p_id == row["p_id"]
+    with pytest.raises(ValueError):
+        bulk.bulk_insert(test_db, Order, [{"p_id": 1, "c_id": 1, "amount": 1, "order_nr": "1"}])
+
+
+def test_create_products_bulk_is_atomic(test_db):
+    """Test that one invalid product prevents the whole list from being created."""
+    products = [
+        product_schemas.ProductCreate(
+            name="Valid", price=10.0, genetic="Hybrid", thc=18.0, cbd=0.5, effect="Balanced"
+        ),
+        product_schemas.ProductCreate(
+            name="Invalid", price=0, genetic="Hybrid", thc=18.0, cbd=0.5, effect="Balanced"
+        ),
+    ]
+    with pytest.raises(HTTPException) as excinfo:
+        product_crud.create_products(db=test_db, products=products)
+    assert excinfo.value.status_code == 400
+    assert "Product 1: Price must be greater than zero" in excinfo.value.detail
+    assert test_db.query(Product).count() == 0
+
+def test_upsert_products_by_slug(test_db):
+    """Test that imported products update existing slugs and insert the rest."""
+    def make(name, slug, price=10.0):
+        return product_schemas.ProductCreate(
+            name=name, price=price, genetic="Indica", thc=18.0, cbd=0.5, effect="Relaxing", slug=slug
+        )
+
+    existing = product_crud.create_product(db=test_db, product=make("Old Kush", "kush"))
+
+    inserted, updated = product_crud.upsert_products_by_slug(test_db, [
+        make("Kush", "kush", price=12.0),
+        make("New Haze", "haze"),
+        make("Newer Haze", "haze", price=15.0),
+        make("No Slug", None),
+    ])
+
+    assert (inserted, updated) == (2, 1)
+    assert test_db.query(Product).count() == 3
+    assert product_crud.get_product_by_id(test_db, existing.p_id).price == 12.0
+    haze = test_db.query(Product).filter(Product.slug == "haze").one()
+    assert haze.name == "Newer Haze"
+
+def test_export_products(test_db):
+    """Test that the export reads all products as column mappings in ID order."""
+    products = [
+        product_schemas.ProductCreate(
+            name=f"Export {i}", price=10.0 + i, genetic="Hybrid", thc=15.0, cbd=1.0, effect="Happy"
+        )
+        for i in range(3)
+    ]
+    created = product_crud.create_products(db=test_db, products=products)
+
+    rows = list(product_crud.export_products(test_db))
+
+    assert [row["p_id"] for row in rows] == [product.p_id for product in created]
+    assert list(rows[0].keys()) == product_crud.PRODUCT_EXPORT_COLUMNS
+    assert rows[2]["name"] == "Export 2"
+
+def test_get_products_by_ids(test_db):
+    """Test that a batch lookup keeps the requested order and reports missing IDs."""
+    products = [
+        product_schemas.ProductCreate(
+            name=f"Batch {i}", price=10.0, genetic="Sativa", thc=20.0, cbd=1.0, effect="Uplifting"
+        )
+        for i in range(3)
+    ]
+    first, second, third = product_crud.create_products(db=test_db, products=products)
+    product_crud.product_cache.clear()
+    product_crud.get_product_by_id(test_db, second.p_id)
+
+    statements = []
+
+    def listen(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_db.get_bind(), "before_cursor_execute", listen)
+    try:
+        found, missing = product_crud.get_products_by_ids(
+            test_db, [third.p_id, 9999, second.p_id, first.p_id, third.p_id]
+        )
+    finally:
+        event.remove(test_db.get_bind(), "before_cursor_execute", listen)
+
+    assert [product.p_id for product in found] == [third.p_id, second.p_id, first.p_id]
+    assert missing == [9999]
+    assert len(statements) == 1
+
+    with pytest.raises(ValueError):
+        product_crud.get_products_by_ids(test_db, list(range(product_crud.PRODUCT_BATCH_MAX_IDS + 1)))
+
+def test_negative_stock_is_rejected(test_db):
+    """Test that products cannot be created or imported with negative stock."""
+    app = FastAPI()
+    app.include_router(product_router.router, prefix="/api")
+    app.dependency_overrides[get_db] = lambda: test_db
+    app.dependency_overrides[get_admin_user] = lambda: Principal(c_id=1, is_admin=True)
+    client = TestClient(app)
+    product = dict(name="Short", price=10.0, genetic="Hybrid", thc=18.0, cbd=0.5, effect="Balanced", stock=-1)
+
+    response = client.post("/api/products/", json=[product])
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][-1] == "stock"
+
+    report = client.post("/api/products/import", content=json.dumps(product) + "\n").json()
+    assert (report["inserted"], report["failed"]) == (0, 1)
+    assert report["errors"][0]["error"].startswith("stock:")
+    assert test_db.query(Product).count() == 0
@@ -0,0 +1,89 @@
+import pytest
+from fastapi import HTTPException
+
+from app.utils.rate_limit import TokenBucketLimiter, enforce_rate_limit
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_rate():
+    """Test that a key gets its burst at once and then one request per refill."""
+    timer = FakeTimer()
+    limiter = TokenBucketLimiter(rate=0.5, burst=3, timer=timer)
+
+    assert [limiter.acquire("1.2.3.4") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("1.2.3.4") == pytest.approx(2.0)
+
+    timer.now = 2.0
+    assert limiter.acquire("1.2.3.4") == 0
+    assert limiter.acquire("1.2.3.4") > 0
+
+    # Other keys have their own bucket
+    assert limiter.acquire("5.6.7.8") == 0
+    assert limiter.counters("1.2.3.4") == {"allowed": 4, "rejected": 2, "tokens": 0.0}
+
+def test_idle_bucket_refills_to_burst():
+    """Test that a bucket never holds more than burst tokens."""
+    timer = FakeTimer()
+    limiter = TokenBucketLimiter(rate=1, burst=2, timer=timer)
+    limiter.acquire("key")
+
+    timer.now = 1000.0
+    assert [limiter.acquire("key") for _ in range(3)][-1] > 0
+
+def test_lru_eviction_bounds_memory():
+    """Test that the least recently used buckets are evicted."""
+    timer = FakeTimer()
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2, timer=timer)
+    limiter.acquire("a")
+    limiter.acquire("b")
+    limiter.acquire("a")
+    # "b" has refilled, so it can be evicted
+    timer.now = 1.0
+    limiter.acquire("c")
+
+    stats = limiter.stats()
+    assert stats["keys"] == 2
+    assert stats["evictions"] == 1
+    # "b" was evicted, "a" was kept and is still empty
+    assert limiter.counters("b")["allowed"] == 0
+    assert limiter.counters("a")["rejected"] == 1
+    assert stats["top_rejected"] == [{"key": "a", "rejected": 1}]
+
+def test_rotating_keys_does_not_reset_throttled_buckets():
+    """Test that new keys share an overflow bucket instead of evicting throttled ones."""
+    timer = FakeTimer()
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2, timer=timer)
+    limiter.acquire("victim")
+    assert limiter.acquire("victim") > 0
+
+    # Throwaway keys fill the table and then share the overflow bucket
+    assert [limiter.acquire(f"throwaway-{i}") for i in range(10)][:2] == [0, 0]
+    assert all(limiter.acquire(f"throwaway-{i}") > 0 for i in range(10, 20))
+    assert limiter.acquire("victim") > 0
+
+    stats = limiter.stats()
+    assert stats["keys"] == 2
+    assert stats["evictions"] == 0
+    assert stats["overflowed"] == 19
+
+    # Once the least recently used bucket has refilled, it can be evicted
+    timer.now = 2.0
+    assert limiter.acquire("new") == 0
+    assert limiter.stats()["evictions"] == 1
+
+def test_enforce_rate_limit_raises_429():
+    """Test that an empty bucket is rejected with 429 and Retry-After."""
+    limiter = TokenBucketLimiter(rate=0.1, burst=1, timer=FakeTimer())
+    enforce_rate_limit(limiter, "user@example.com")
+
+    with pytest.raises(HTTPException) as excinfo:
+        enforce_rate_limit(limiter, "user@example.com")
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.headers == {"Retry-After": "10"}
@@ -0,0 +1,55 @@
+from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, MetaData, String, Table, create_engine, inspect
+from sqlalchemy.pool import StaticPool
+
+from app import models  # noqa: F401
+from app.utils.schema_upgrade import upgrade_schema
+
+
+def _baseline_engine():
+    """Create a database with the tables as they were before the upgrade."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    metadata = MetaData()
+    Table(
+        "product", metadata,
+        Column("p_id", Integer, primary_key=True, index=True), Column("name", String(255), nullable=False),
+        Column("price", Float, nullable=False), Column("genetic", String(255), nullable=False),
+        Column("thc", Float, nullable=False), Column("cbd", Float, nullable=False),
+        Column("effect", String(255), nullable=False), Column("slug", String(255)),
+    )
+    Table(
+        "customer", metadata,
+        Column("c_id", Integer, primary_key=True, index=True), Column("name", String(255), nullable=False),
+        Column("address", String(255), nullable=False), Column("email", String(255), nullable=False, unique=True),
+        Column("password", String(255), nullable=False), Column("is_admin", Boolean, nullable=False),
+    )
+    Table(
+        "order", metadata,
+        Column("o_id", Integer, primary_key=True), Column("p_id", Integer, ForeignKey("product.p_id"), nullable=False),
+        Column("c_id", Integer, ForeignKey("customer.c_id"), nullable=False),
+        Column("amount", Integer, nullable=False), Column("order_nr", String, nullable=False),
+    )
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO customer (c_id, name, address, email, password, is_admin) "
+            "VALUES (1, 'Old', '1 St', 'old@example.com', 'x', 0)"
+        )
+    return engine
+
+def test_upgrade_schema_adds_columns_and_indexes():
+    """Test that an existing database gets the new columns and indexes, once."""
+    engine = _baseline_engine()
+
+    statements = upgrade_schema(engine)
+    inspector = inspect(engine)
+    assert "token_version" in {column["name"] for column in inspector.get_columns("customer")}
+    assert "stock" in {column["name"] for column in inspector.get_columns("product")}
+    assert "created_at" in {column["name"] for column in inspector.get_columns("order")}
+    assert {"ux_order_order_nr_p_id", "ix_order_c_id_o_id"} <= {index["name"] for index in inspector.get_indexes("order")}
+    assert "ix_product_slug" in {index["name"] for index in inspector.get_indexes("product")}
+    assert len(statements) == 16
+    with engine.connect() as conn:
+        # Existing customers get the column default
+        assert conn.exec_driver_sql("SELECT token_version FROM customer").scalar() == 0
+
+    assert upgrade_schema(engine) == []
@@ -0,0 +1,74 @@
+import pytest
+
+from app.crud import product as product_crud
+from app.schemas import product as product_schemas
+from app.utils.search import SearchIndex, tokenize
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex(weights={"name": 3.0, "genetic": 2.0, "effect": 1.0})
+    index.add(1, {"name": "Premium Indica", "genetic": "Indica", "effect": "Relaxing"}, "premium")
+    index.add(2, {"name": "Sativa Delight", "genetic": "Sativa", "effect": "Energizing"}, "delight")
+    index.add(3, {"name": "Northern Lights", "genetic": "Indica", "effect": "Sleepy"}, "lights")
+    return index
+
+
+def test_tokenize():
+    """Test that text is split into lowercase tokens."""
+    assert tokenize("Sour-Diesel #5") == ["sour", "diesel", "5"]
+    assert tokenize("") == []
+
+
+def test_search_ranks_name_matches_first(index):
+    """Test that a name match outranks a genetic match."""
+    results = [payload for _, payload in index.search("indica")]
+    assert results == ["premium", "lights"]
+
+
+def test_search_tolerates_typos(index):
+    """Test that misspelled terms still match."""
+    assert [payload for _, payload in index.search("indca")] == ["premium", "lights"]
+    assert [payload for _, payload in index.search("sativ delite")][0] == "delight"
+    assert index.search("xyz") == []
+
+
+def test_search_combines_terms(index):
+    """Test that documents matching more terms rank higher."""
+    results = [payload for _, payload in index.search("indica northern")]
+    assert results[0] == "lights"
+
+
+def test_search_index_updates(index):
+    """Test that replaced and removed documents are reflected in results."""
+    index.add(2, {"name": "Indica Dream", "genetic": "Hybrid", "effect": "Calm"}, "dream")
+    assert "dream" in [payload for _, payload in index.search("indica")]
+    assert index.search("sativa") == []
+
+    index.remove(1)
+    assert "premium" not in [payload for _, payload in index.search("indica")]
+    assert len(index) == 2
+
+    index.rebuild([(9, {"name": "Blue Dream"}, "blue")])
+    assert [payload for _, payload in index.search("dream")] == ["blue"]
+    assert len(index) == 1
+
+
+def test_product_search_follows_crud(test_db):
+    """Test that product writes keep the catalog search index current."""
+    product_crud.build_search_index(test_db)
+    product = product_crud.create_product(db=test_db, product=product_schemas.ProductCreate(
+        name="Gelato Kush", price=12.0, genetic="Hybrid", thc=22.0, cbd=0.3, effect="Happy"
+    ))
+    assert [p.p_id for p in product_crud.search_products("gelatto")] == [product.p_id]
+
+    product_crud.update_products(
+        db=test_db,
+        p_id=product.p_id,
+        update_data=product_schemas.ProductUpdate.model_construct(name="Wedding Cake"),
+    )
+    assert product_crud.search_products("gelato") == []
+    assert [p.name for p in product_crud.search_products("wedding")] == ["Wedding Cake"]
+
+    product_crud.delete_product_by_id(db=test_db, p_id=product.p_id)
+    assert product_crud.search_products("wedding") == []
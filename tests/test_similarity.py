@@ -0,0 +1,62 @@
+import pytest
+
+from app.crud import product as product_crud
+from app.schemas import product as product_schemas
+from app.utils.similarity import SimilarityIndex
+
+
+@pytest.fixture
+def index():
+    index = SimilarityIndex(("thc", "cbd", "price"), category_field="genetic")
+    index.add(1, {"thc": 20.0, "cbd": 1.0, "price": 10.0, "genetic": "Indica"}, "kush")
+    index.add(2, {"thc": 21.0, "cbd": 1.0, "price": 11.0, "genetic": "Indica"}, "bubba")
+    index.add(3, {"thc": 21.0, "cbd": 1.0, "price": 11.0, "genetic": "Sativa"}, "haze")
+    index.add(4, {"thc": 5.0, "cbd": 12.0, "price": 40.0, "genetic": "Indica"}, "cbd-oil")
+    return index
+
+
+def test_nearest_orders_by_distance(index):
+    """Test that the closest products come first and the reference is excluded."""
+    results = index.nearest(1, k=3)
+    assert [payload for _, payload in results] == ["bubba", "haze", "cbd-oil"]
+    assert results[0][0] < results[1][0] < results[2][0]
+    assert [payload for _, payload in index.nearest(1, k=1)] == ["bubba"]
+
+
+def test_nearest_unknown_document(index):
+    """Test that an unknown reference document returns None."""
+    assert index.nearest(99) is None
+
+
+def test_nearest_follows_updates(index):
+    """Test that replaced and removed documents are reflected in results."""
+    index.remove(2)
+    assert [payload for _, payload in index.nearest(1, k=1)] == ["haze"]
+
+    index.add(3, {"thc": 5.0, "cbd": 12.0, "price": 40.0, "genetic": "Indica"}, "oil-2")
+    assert [payload for _, payload in index.nearest(4, k=1)] == ["oil-2"]
+    assert len(index) == 3
+
+
+def test_similar_products_follow_crud(test_db):
+    """Test that product writes keep the similarity index current."""
+    product_crud.build_search_index(test_db)
+    products = [
+        product_schemas.ProductCreate(
+            name=name, price=price, genetic=genetic, thc=thc, cbd=0.5, effect="Relaxing"
+        )
+        for name, price, genetic, thc in [
+            ("Reference", 10.0, "Indica", 20.0),
+            ("Close", 11.0, "Indica", 21.0),
+            ("Far", 60.0, "Sativa", 5.0),
+        ]
+    ]
+    reference, close, far = product_crud.create_products(db=test_db, products=products)
+
+    similar = product_crud.get_similar_products(reference.p_id, k=2)
+    assert [p.p_id for p in similar] == [close.p_id, far.p_id]
+
+    product_crud.delete_product_by_id(db=test_db, p_id=close.p_id)
+    assert [p.p_id for p in product_crud.get_similar_products(reference.p_id)] == [far.p_id]
+    with pytest.raises(ValueError):
+        product_crud.get_similar_products(close.p_id)
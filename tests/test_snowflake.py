@@ -0,0 +1,90 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from app.crud import worker_lease
+from app.crud.inventory import utcnow
+from app.models.worker_lease import WorkerLease
+from app.utils.snowflake import SNOWFLAKE_EPOCH_MS, SnowflakeGenerator, new_order_nr, order_number_generator
+
+
+class FakeClock:
+    def __init__(self, ms):
+        self.ms = ms
+
+    def __call__(self):
+        return (SNOWFLAKE_EPOCH_MS + self.ms) * 1_000_000
+
+
+def test_snowflake_layout():
+    """Test that IDs combine timestamp, worker ID and sequence."""
+    generator = SnowflakeGenerator(worker_id=5, clock=FakeClock(1000))
+    first, second = generator.next_id(), generator.next_id()
+
+    assert first >> 22 == 1000
+    assert (first >> 12) & 0x3FF == 5
+    assert (first & 0xFFF, second & 0xFFF) == (0, 1)
+
+
+def test_snowflake_stays_increasing():
+    """Test that IDs increase on sequence overflow and when the clock goes backwards."""
+    clock = FakeClock(1000)
+    generator = SnowflakeGenerator(worker_id=1, clock=clock)
+    ids = [generator.next_id() for _ in range(5000)]
+    clock.ms = 500
+    ids += [generator.next_id() for _ in range(10)]
+
+    assert all(a < b for a, b in zip(ids, ids[1:]))
+
+
+def test_snowflake_worker_ids_do_not_collide():
+    """Test that generators with different worker IDs produce different IDs."""
+    clock = FakeClock(1000)
+    first, second = SnowflakeGenerator(worker_id=1, clock=clock), SnowflakeGenerator(worker_id=2, clock=clock)
+    assert not {first.next_id() for _ in range(3)} & {second.next_id() for _ in range(3)}
+
+    with pytest.raises(ValueError):
+        SnowflakeGenerator(worker_id=1024)
+
+
+def test_new_order_nr_sorts_as_string():
+    """Test that order numbers have a fixed width and sort by creation."""
+    numbers = [new_order_nr() for _ in range(100)]
+    assert all(len(number) == 19 for number in numbers)
+    assert numbers == sorted(numbers)
+
+def test_snowflake_requires_a_valid_worker_id():
+    """Test that no IDs are generated without a worker ID or after its lease ran out."""
+    generator = SnowflakeGenerator()
+    with pytest.raises(RuntimeError):
+        generator.next_id()
+
+    generator.assign(3, valid_until=time.monotonic() - 1)
+    with pytest.raises(RuntimeError):
+        generator.next_id()
+
+    generator.assign(3, valid_until=time.monotonic() + 60)
+    assert (generator.next_id() >> 12) & 0x3FF == 3
+
+def test_worker_ids_are_leased_exclusively(test_db):
+    """Test that processes lease different worker IDs and expired leases are taken over."""
+    test_db.add_all([
+        WorkerLease(worker_id=0, owner="other-process", expires_at=utcnow() + timedelta(minutes=1)),
+        WorkerLease(worker_id=1, owner="crashed-process", expires_at=utcnow() - timedelta(seconds=1)),
+    ])
+    test_db.commit()
+    try:
+        assert worker_lease.lease_worker_id(test_db) == 1
+        assert order_number_generator.worker_id == 1
+        assert worker_lease.renew_worker_lease(test_db) == 1
+
+        # Another process took the lease over after it expired
+        test_db.query(WorkerLease).filter(WorkerLease.worker_id == 1).update({"owner": "new-owner"})
+        test_db.commit()
+        assert worker_lease.renew_worker_lease(test_db) == 2
+    finally:
+        worker_lease.release_worker_lease(test_db)
+
+    assert order_number_generator.worker_id is None
+    assert {lease.owner for lease in test_db.query(WorkerLease)} == {"other-process", "new-owner"}
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+from app.utils import streaming
+from app.utils.streaming import StreamFormat, encode_rows, iter_csv, iter_ndjson
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def _parse(parser, data: bytes, size: int = 7):
+    async def collect():
+        return [record async for record in parser(_chunks(data, size))]
+    return asyncio.run(collect())
+
+
+def test_iter_ndjson_reports_bad_lines():
+    """Test that NDJSON lines are parsed across chunk boundaries and bad lines are reported."""
+    data = b'{"name": "A\xc3\xa4"}\r\n\n[1, 2]\nnot json\n{"name": "B"}'
+    records = _parse(iter_ndjson, data, size=3)
+
+    assert records[0] == (1, {"name": "Aä"}, None)
+    assert records[1][:2] == (3, None)
+    assert records[1][2] == "Expected a JSON object"
+    assert records[2][0] == 4 and records[2][2].startswith("Invalid JSON")
+    assert records[3] == (5, {"name": "B"}, None)
+
+
+def test_iter_csv_handles_quotes_and_blanks():
+    """Test that CSV records may span lines and empty fields become None."""
+    data = (
+        b'\xef\xbb\xbfname,effect,slug\n'
+        b'"Sour, Diesel","Uplifting\nand clear",\n'
+        b'Short,row\n'
+        b'Kush,Relaxing,kush\n'
+    )
+    records = _parse(iter_csv, data)
+
+    assert records == [
+        (2, {"name": "Sour, Diesel", "effect": "Uplifting\nand clear", "slug": None}, None),
+        (4, None, "Expected 3 columns, got 2"),
+        (5, {"name": "Kush", "effect": "Relaxing", "slug": "kush"}, None),
+    ]
+
+
+def test_iter_csv_unterminated_quote():
+    """Test that an unterminated quoted field is reported."""
+    records = _parse(iter_csv, b'name\n"open\nstill open\n')
+    assert records == [(2, None, "Unterminated quoted field")]
+
+
+def test_overlong_lines_are_skipped(monkeypatch):
+    """Test that lines and records beyond the size limit are reported and parsing resumes after them."""
+    monkeypatch.setattr(streaming, "MAX_IMPORT_LINE_BYTES", 32)
+    data = b'{"name": "A"}\n{"name": "' + b"x" * 1000 + b'"}\n{"name": "B"}'
+    records = _parse(iter_ndjson, data, size=5)
+
+    assert records[0] == (1, {"name": "A"}, None)
+    assert records[1] == (2, None, "Line longer than 32 bytes")
+    assert records[2] == (3, {"name": "B"}, None)
+
+    data = b'name,effect\n"' + b"long\n" * 20 + b'",x\nKush,Relaxing\n'
+    records = _parse(iter_csv, data)
+    assert records[0] == (2, None, "Record longer than 32 bytes")
+    assert records[1:] == [(23, {"name": "Kush", "effect": "Relaxing"}, None)]
+
+
+def test_encode_rows_csv_round_trip():
+    """Test that exported CSV can be parsed by the import parser."""
+    rows = [{"p_id": 1, "name": "Sour, Diesel", "slug": None}, {"p_id": 2, "name": "Kush", "slug": "kush"}]
+    data = b"".join(encode_rows(rows, ["p_id", "name", "slug"], StreamFormat.csv))
+
+    assert data.startswith(b"p_id,name,slug\n")
+    records = _parse(iter_csv, data)
+    assert [record["name"] for _, record, _ in records] == ["Sour, Diesel", "Kush"]
+    assert records[0][1]["slug"] is None
+
+
+def test_encode_rows_ndjson_chunks(monkeypatch):
+    """Test that NDJSON output is split into chunks of complete lines."""
+    monkeypatch.setattr(streaming, "EXPORT_CHUNK_BYTES", 64)
+    rows = [{"o_id": i, "order_nr": f"N{i}"} for i in range(20)]
+    chunks = list(encode_rows(rows, ["o_id", "order_nr"], StreamFormat.ndjson))
+
+    assert len(chunks) > 1
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line) for line in lines] == rows
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.crud import token as token_crud
+from app.crud.inventory import utcnow
+from app.models.revoked_token import RevokedToken
+from app.routers.oauth2 import (
+    ROLE_ADMIN,
+    create_access_token,
+    create_refresh_token,
+    issue_tokens,
+    revoke_token,
+    verify_access_token,
+    verify_refresh_token,
+)
+
+credentials_exception = HTTPException(status_code=401, detail="Could not validate credentials")
+
+
+def test_access_and_refresh_tokens_are_not_interchangeable():
+    """Test that each token type is only accepted where it belongs."""
+    tokens = issue_tokens(1, role=ROLE_ADMIN, version=0)
+
+    assert verify_access_token(tokens["access_token"], credentials_exception).role == ROLE_ADMIN
+    assert verify_refresh_token(tokens["refresh_token"], credentials_exception).id == 1
+    with pytest.raises(HTTPException):
+        verify_access_token(tokens["refresh_token"], credentials_exception)
+    with pytest.raises(HTTPException):
+        verify_refresh_token(tokens["access_token"], credentials_exception)
+
+def test_revoked_tokens_are_rejected(test_db, test_customer):
+    """Test that revoking a token stores it on the denylist and rejects it."""
+    refresh_token = create_refresh_token({"customer_id": test_customer.c_id})
+    access_token = create_access_token({"customer_id": test_customer.c_id})
+    token = verify_refresh_token(refresh_token, credentials_exception)
+
+    assert revoke_token(test_db, token) is True
+    # A token can only be revoked once, so a refresh token can only be exchanged once
+    assert revoke_token(test_db, token) is False
+    assert token_crud.might_be_revoked(token.jti)
+    assert token_crud.is_token_revoked(test_db, token.jti)
+
+    with pytest.raises(HTTPException):
+        verify_refresh_token(refresh_token, credentials_exception)
+    # Other tokens of the customer stay valid
+    assert verify_access_token(access_token, credentials_exception).id == test_customer.c_id
+
+def test_load_revoked_tokens(test_db, test_customer):
+    """Test that a reload picks up revocations from the denylist and purges expired ones."""
+    test_db.add_all([
+        RevokedToken(jti="revoked-elsewhere", c_id=test_customer.c_id, expires_at=utcnow() + timedelta(hours=1)),
+        RevokedToken(jti="expired", c_id=test_customer.c_id, expires_at=utcnow() - timedelta(seconds=1)),
+    ])
+    test_db.commit()
+    assert not token_crud.might_be_revoked("revoked-elsewhere")
+
+    assert token_crud.load_revoked_tokens(test_db) == 1
+    assert token_crud.might_be_revoked("revoked-elsewhere")
+    assert test_db.query(RevokedToken).filter(RevokedToken.jti == "expired").first() is None
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.utils.write_behind import GroupCommitQueue
+
+
+def test_concurrent_items_share_a_write():
+    """Test that items submitted together are written in few batches with their own results."""
+    batches = []
+
+    def write(items):
+        batches.append(list(items))
+        return [ValueError(item) if item < 0 else item * 2 for item in items]
+
+    async def scenario():
+        queue = GroupCommitQueue(write, max_batch_size=4, max_delay=0.05)
+        queue.start()
+        results = await asyncio.gather(
+            *(queue.submit(item) for item in [1, 2, -3, 4, 5]), return_exceptions=True
+        )
+        await queue.stop()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert results[:2] == [2, 4] and results[3:] == [8, 10]
+    assert isinstance(results[2], ValueError)
+    assert [len(batch) for batch in batches] == [4, 1]
+
+
+def test_stop_writes_queued_items():
+    """Test that stopping the queue writes items that are still waiting."""
+    release = threading.Event()
+    written = []
+
+    def write(items):
+        release.wait(5)
+        written.extend(items)
+        return items
+
+    async def scenario():
+        queue = GroupCommitQueue(write, max_batch_size=2, max_delay=0.01)
+        queue.start()
+        pending = [asyncio.ensure_future(queue.submit(item)) for item in range(5)]
+        await asyncio.sleep(0.05)
+        stopping = asyncio.ensure_future(queue.stop())
+        release.set()
+        await stopping
+        with pytest.raises(RuntimeError):
+            await queue.submit(99)
+        return await asyncio.gather(*pending)
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
+    assert written == [0, 1, 2, 3, 4]
+
+
+def test_write_error_fails_the_batch():
+    """Test that an error raised by the write function reaches every caller of the batch."""
+    def write(items):
+        raise RuntimeError("database down")
+
+    async def scenario():
+        queue = GroupCommitQueue(write, max_batch_size=10, max_delay=0.01)
+        queue.start()
+        results = await asyncio.gather(queue.submit(1), queue.submit(2), return_exceptions=True)
+        await queue.stop()
+        return results
+
+    assert [str(result) for result in asyncio.run(scenario())] == ["database down"] * 2